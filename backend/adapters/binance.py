@@ -1,10 +1,12 @@
-import asyncio, json, time
+import asyncio, time
 from typing import Callable, Awaitable, List, Optional, Dict
-import httpx, websockets
+import websockets
 from backend.core.contracts import (
-    ExchangeAdapter, OrderBookMsg, TradeMsg, Candle, PlaceOrder, OrderAck,
+    ExchangeAdapter, AnyBookMsg, AnyTradeMsg, Candle, PlaceOrder, OrderAck,
     CancelAck, Order, Position, Balance, SymbolInfo, Unsub
 )
+from backend.core import http, json_codec
+from backend.core.delivery import ConflatingDelivery, QueueDelivery
 
 WS_SPOT = "wss://stream.binance.com:9443/ws"
 WS_FUT = "wss://fstream.binance.com/ws"
@@ -15,10 +17,11 @@ class BinanceAdapter(ExchangeAdapter):
     id = "binance"
     capabilities = {"spot": True, "futures": True, "margin": False, "l2": True, "l3": False, "userDataWS": False}
 
-    def __init__(self, category: str = "spot"):
+    def __init__(self, category: str = "spot", recorder=None):
         assert category in ("spot","usdt"), "category must be 'spot' or 'usdt' (USDT-margined futures)"
         self.category = category
         self._orders: Dict[str, Order] = {}
+        self.recorder = recorder  # optional backend.core.recorder.MarketRecorder
 
     def normalize_symbol(self, user_input: str) -> str:
         return user_input.replace("-", "").upper()
@@ -29,46 +32,48 @@ class BinanceAdapter(ExchangeAdapter):
     def _ws_url(self):
         return WS_SPOT if self.category == "spot" else WS_FUT
 
-    async def subscribe_book(self, symbol: str, depth, cb: Callable[[OrderBookMsg], Awaitable[None]]) -> Unsub:
+    async def subscribe_book(self, symbol: str, depth, cb: Callable[[AnyBookMsg], Awaitable[None]]) -> Unsub:
         stream = f"{symbol.lower()}@depth20@100ms"
         url = f"{self._ws_url()}/{stream}"
         running = True
+        # depth20 is a full top-20 each time: a slow consumer only needs the latest
+        delivery = ConflatingDelivery(cb, self.id, "book")
         async def _run():
             nonlocal running
             async with websockets.connect(url, ping_interval=20, ping_timeout=20) as ws:
                 while running:
-                    msg = json.loads(await ws.recv())
-                    bids = [{"price": float(p), "size": float(q)} for p,q,_ in msg.get("b", [])] if "b" in msg else [{"price": float(p), "size": float(q)} for p,q in msg.get("bids", [])]
-                    asks = [{"price": float(p), "size": float(q)} for p,q,_ in msg.get("a", [])] if "a" in msg else [{"price": float(p), "size": float(q)} for p,q in msg.get("asks", [])]
-                    ob = OrderBookMsg(ts=int(msg.get("E", time.time()*1000)), symbol=symbol, bids=bids, asks=asks, snapshot=False)
-                    await cb(ob)
+                    raw = await ws.recv()
+                    if self.recorder is not None:
+                        self.recorder.record(stream, raw)
+                    delivery.push(json_codec.decode_depth(raw, symbol))
         task = asyncio.create_task(_run())
         def _unsub():
             nonlocal running
             running = False
             task.cancel()
+            delivery.close()
         return _unsub
 
-    async def subscribe_trades(self, symbol: str, cb: Callable[[TradeMsg], Awaitable[None]]) -> Unsub:
+    async def subscribe_trades(self, symbol: str, cb: Callable[[AnyTradeMsg], Awaitable[None]]) -> Unsub:
         stream = f"{symbol.lower()}@trade"
         url = f"{self._ws_url()}/{stream}"
         running = True
+        delivery = QueueDelivery(cb, self.id, "trades")
         async def _run():
             nonlocal running
             async with websockets.connect(url, ping_interval=20, ping_timeout=20) as ws:
                 while running:
-                    msg = json.loads(await ws.recv())
-                    trade = TradeMsg(
-                        ts=int(msg.get("E", time.time()*1000)),
-                        symbol=symbol, price=float(msg["p"]), size=float(msg["q"]),
-                        side="buy" if msg.get("m") is False else "sell"  # market maker flag
-                    )
-                    await cb(trade)
+                    raw = await ws.recv()
+                    if self.recorder is not None:
+                        self.recorder.record(stream, raw)
+                    # m (buyer is maker) -> aggressor side
+                    delivery.push(json_codec.decode_trade(raw, symbol))
         task = asyncio.create_task(_run())
         def _unsub():
             nonlocal running
             running = False
             task.cancel()
+            delivery.close()
         return _unsub
 
     async def get_ohlcv(self, symbol: str, tf: str, since: Optional[int]=None, limit: Optional[int]=None) -> List[Candle]:
@@ -77,16 +82,15 @@ class BinanceAdapter(ExchangeAdapter):
         base = REST_SPOT if self.category == "spot" else REST_FUT
         path = "/api/v3/klines" if self.category == "spot" else "/fapi/v1/klines"
         params = {"symbol": symbol, "interval": interval, "limit": limit or 200}
-        async with httpx.AsyncClient(base_url=base, timeout=20.0) as client:
-            r = await client.get(path, params=params)
-            r.raise_for_status()
-            rows = r.json()
-            out: List[Candle] = []
-            for row in rows:
-                ts = int(row[0])
-                o,h,l,c,v = float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5])
-                out.append(Candle(ts=ts, o=o,h=h,l=l,c=c,v=v, tf=tf, symbol=symbol))
-            return out
+        r = await http.client(base).get(path, params=params)
+        r.raise_for_status()
+        rows = r.json()
+        out: List[Candle] = []
+        for row in rows:
+            ts = int(row[0])
+            o,h,l,c,v = float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5])
+            out.append(Candle(ts=ts, o=o,h=h,l=l,c=c,v=v, tf=tf, symbol=symbol))
+        return out
 
     async def place_order(self, req: PlaceOrder) -> OrderAck:
         oid = req.client_order_id or f"binance-{int(time.time()*1000)}"
@@ -2,12 +2,14 @@ import asyncio
 import json
 import time
 from typing import Callable, Awaitable, List, Optional, Dict
-import httpx
 import websockets
+from backend.core.book_agg import PriceLadder
 from backend.core.contracts import (
-    ExchangeAdapter, OrderBookMsg, TradeMsg, Candle, PlaceOrder, OrderAck,
+    ExchangeAdapter, AnyBookMsg, AnyTradeMsg, BookMsg, Level, TradeTick, Candle, PlaceOrder, OrderAck,
     CancelAck, Order, Position, Balance, SymbolInfo, Unsub
 )
+from backend.core import http, json_codec
+from backend.core.delivery import ConflatingDelivery, QueueDelivery
 
 # Bybit v5 endpoints
 WS_BASE = {
@@ -15,15 +17,92 @@ WS_BASE = {
     "linear": "wss://stream.bybit.com/v5/public/linear",
 }
 REST_BASE = "https://api.bybit.com"
+# orderbook.{depth} topics; spot has no 500
+BOOK_DEPTHS = {"spot": (1, 50, 200), "linear": (1, 50, 200, 500)}
+
+class BybitBookGap(RuntimeError):
+    """The local book can no longer be trusted; resubscribe for a fresh snapshot."""
+
+class BybitBook:
+    """Local Bybit v5 order book rebuilt from orderbook.{depth} snapshot + delta messages.
+
+    Bybit v5 carries no checksum, so consistency is checked from what it does send:
+    each delta's update id ``u`` must be exactly the previous ``u`` + 1, the
+    cross sequence ``seq`` must not go backwards, and the book must not end up
+    crossed. Any violation raises :class:`BybitBookGap`. A snapshot (or a
+    message with ``u == 1``, sent after a service restart) resets the book.
+    """
+
+    def __init__(self, symbol: str, tick_size: float = 1e-8):
+        self.symbol = symbol
+        self.tick_size = tick_size
+        self.synced = False
+        self.last_u = 0
+        self.last_seq = 0
+        self.ts = 0
+        self.resyncs = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._bids = PriceLadder(self.tick_size, 'bid')
+        self._asks = PriceLadder(self.tick_size, 'ask')
+
+    def invalidate(self) -> None:
+        self.synced = False
+        self._reset()
+
+    def apply(self, msg: Dict) -> bool:
+        """Apply one orderbook message. False: ignored (stale, or delta while waiting for a snapshot)."""
+        data = msg.get("data") or {}
+        u = int(data.get("u") or 0)
+        seq = int(data.get("seq") or 0)
+        if msg.get("type") == "snapshot" or u == 1:
+            self._reset()
+        elif not self.synced:
+            return False
+        elif u <= self.last_u:
+            return False
+        elif u != self.last_u + 1:
+            raise BybitBookGap(f"{self.symbol}: expected u={self.last_u + 1}, got u={u}")
+        elif seq and seq < self.last_seq:
+            raise BybitBookGap(f"{self.symbol}: seq went back {self.last_seq} -> {seq}")
+        for px, q, *_ in data.get("b") or ():
+            self._bids.set(float(px), float(q))
+        for px, q, *_ in data.get("a") or ():
+            self._asks.set(float(px), float(q))
+        bid, ask = self._bids.best(), self._asks.best()
+        if bid is not None and ask is not None and bid[0] >= ask[0]:
+            raise BybitBookGap(f"{self.symbol}: crossed book {bid[0]} >= {ask[0]}")
+        self.last_u = u
+        self.last_seq = seq or self.last_seq
+        self.ts = int(msg.get("ts") or data.get("ts") or time.time()*1000)
+        self.synced = True
+        return True
+
+    def top(self, n: int) -> BookMsg:
+        # the ladders only serve reads here; drop their emit bookkeeping
+        self._bids.mark_emitted(n)
+        self._asks.mark_emitted(n)
+        return BookMsg(
+            self.ts, self.symbol,
+            [Level(px, q) for px, q in self._bids.top(n)],
+            [Level(px, q) for px, q in self._asks.top(n)],
+            True,
+        )
 
 class BybitAdapter(ExchangeAdapter):
     id = "bybit"
     capabilities = {"spot": True, "futures": True, "margin": False, "l2": True, "l3": False, "userDataWS": False}
 
-    def __init__(self, category: str = "spot"):
+    def __init__(self, category: str = "spot", recorder=None, book_depth: int = 50, top_n: Optional[int] = None):
         assert category in ("spot","linear"), "category must be 'spot' or 'linear'"
+        assert book_depth in BOOK_DEPTHS[category], f"book_depth must be one of {BOOK_DEPTHS[category]}"
         self.category = category
         self._orders: Dict[str, Order] = {}
+        self.recorder = recorder  # optional backend.core.recorder.MarketRecorder
+        self.book_depth = book_depth
+        # levels per side sent downstream; a deep upstream book does not mean deep pushes
+        self.top_n = min(top_n or book_depth, book_depth)
 
     def normalize_symbol(self, user_input: str) -> str:
         return user_input.replace("-", "").upper()
@@ -32,10 +111,13 @@ class BybitAdapter(ExchangeAdapter):
         # Minimal spec; for real use, fetch /v5/market/instruments-info
         return SymbolInfo(symbol=symbol, tick_size=0.01, step_size=0.0001, base=symbol[:-4] or "BTC")
 
-    async def subscribe_book(self, symbol: str, depth, cb: Callable[[OrderBookMsg], Awaitable[None]]) -> Unsub:
+    async def subscribe_book(self, symbol: str, depth, cb: Callable[[AnyBookMsg], Awaitable[None]]) -> Unsub:
         url = WS_BASE[self.category]
-        topic = f"orderbook.50.{symbol}"
+        topic = f"orderbook.{self.book_depth}.{symbol}"
         running = True
+        book = BybitBook(symbol)
+        # consumers only ever get consistent top-N snapshots, latest wins
+        delivery = ConflatingDelivery(cb, self.id, "book")
 
         async def _run():
             nonlocal running
@@ -43,17 +125,22 @@ class BybitAdapter(ExchangeAdapter):
                 sub = {"op":"subscribe","args":[topic]}
                 await ws.send(json.dumps(sub))
                 while running:
-                    msg = json.loads(await ws.recv())
-                    # Expect data like { "topic":"orderbook.50.BTCUSDT", "type":"snapshot"/"delta", "data":{ "b":[[price, size],...], "a":[[price,size],...], "ts": ... } }
-                    data = msg.get("data") or {}
-                    bids = [{"price": float(p), "size": float(s)} for p,s in data.get("b", [])]
-                    asks = [{"price": float(p), "size": float(s)} for p,s in data.get("a", [])]
-                    ob = OrderBookMsg(
-                        ts = int(data.get("ts") or time.time()*1000),
-                        symbol=symbol, bids=bids, asks=asks,
-                        snapshot = (msg.get("type") == "snapshot")
-                    )
-                    await cb(ob)
+                    raw = await ws.recv()
+                    if self.recorder is not None:
+                        self.recorder.record(topic, raw)
+                    msg = json_codec.loads(raw)
+                    # { "topic":"orderbook.50.BTCUSDT", "type":"snapshot"/"delta", "ts": ..., "data":{ "s", "b":[[price, size],...], "a":[...], "u", "seq" } }
+                    if msg.get("topic") != topic:
+                        continue    # subscribe acks, pongs
+                    try:
+                        if book.apply(msg):
+                            delivery.push(book.top(self.top_n))
+                    except BybitBookGap:
+                        book.resyncs += 1
+                        book.invalidate()
+                        # resubscribing makes Bybit send a fresh snapshot
+                        await ws.send(json.dumps({"op":"unsubscribe","args":[topic]}))
+                        await ws.send(json.dumps(sub))
 
         task = asyncio.create_task(_run())
 
@@ -61,13 +148,15 @@ class BybitAdapter(ExchangeAdapter):
             nonlocal running
             running = False
             task.cancel()
+            delivery.close()
 
         return _unsub
 
-    async def subscribe_trades(self, symbol: str, cb: Callable[[TradeMsg], Awaitable[None]]) -> Unsub:
+    async def subscribe_trades(self, symbol: str, cb: Callable[[AnyTradeMsg], Awaitable[None]]) -> Unsub:
         url = WS_BASE[self.category]
         topic = f"publicTrade.{symbol}"
         running = True
+        delivery = QueueDelivery(cb, self.id, "trades")
 
         async def _run():
             nonlocal running
@@ -75,17 +164,20 @@ class BybitAdapter(ExchangeAdapter):
                 sub = {"op":"subscribe","args":[topic]}
                 await ws.send(json.dumps(sub))
                 while running:
-                    msg = json.loads(await ws.recv())
+                    raw = await ws.recv()
+                    if self.recorder is not None:
+                        self.recorder.record(topic, raw)
+                    msg = json_codec.loads(raw)
                     data = msg.get("data") or []
                     for t in data:
-                        trade = TradeMsg(
-                            ts = int(t.get("T") or time.time()*1000),
-                            symbol = symbol,
-                            price = float(t["p"]),
-                            size = float(t["v"]),
-                            side = "buy" if t.get("S","Buy").lower().startswith("b") else "sell"
+                        trade = TradeTick(
+                            int(t.get("T") or time.time()*1000),
+                            symbol,
+                            float(t["p"]),
+                            float(t["v"]),
+                            "buy" if t.get("S","Buy").lower().startswith("b") else "sell"
                         )
-                        await cb(trade)
+                        delivery.push(trade)
 
         task = asyncio.create_task(_run())
 
@@ -93,6 +185,7 @@ class BybitAdapter(ExchangeAdapter):
             nonlocal running
             running = False
             task.cancel()
+            delivery.close()
 
         return _unsub
 
@@ -101,19 +194,18 @@ class BybitAdapter(ExchangeAdapter):
         tf_map = {"1m":"1", "3m":"3", "5m":"5", "15m":"15", "30m":"30", "1h":"60", "4h":"240", "1d":"D"}
         interval = tf_map.get(tf, "1")
         params = {"category": self.category, "symbol": symbol, "interval": interval, "limit": str(limit or 200)}
-        async with httpx.AsyncClient(base_url=REST_BASE, timeout=20.0) as client:
-            r = await client.get("/v5/market/kline", params=params)
-            r.raise_for_status()
-            payload = r.json()
-            rows = payload.get("result", {}).get("list", []) or payload.get("result", {}).get("klineList", []) or []
-            out: List[Candle] = []
-            for row in rows:
-                # Bybit returns [startTs, open, high, low, close, volume, ...]
-                ts = int(row[0])
-                o,h,l,c,v = map(float, row[1:6])
-                out.append(Candle(ts=ts, o=o,h=h,l=l,c=c,v=v, tf=tf, symbol=symbol))
-            out.sort(key=lambda x: x.ts)
-            return out
+        r = await http.client(REST_BASE).get("/v5/market/kline", params=params)
+        r.raise_for_status()
+        payload = r.json()
+        rows = payload.get("result", {}).get("list", []) or payload.get("result", {}).get("klineList", []) or []
+        out: List[Candle] = []
+        for row in rows:
+            # Bybit returns [startTs, open, high, low, close, volume, ...]
+            ts = int(row[0])
+            o,h,l,c,v = map(float, row[1:6])
+            out.append(Candle(ts=ts, o=o,h=h,l=l,c=c,v=v, tf=tf, symbol=symbol))
+        out.sort(key=lambda x: x.ts)
+        return out
 
     # Trading (Dry-Run for now)
     async def place_order(self, req: PlaceOrder) -> OrderAck:
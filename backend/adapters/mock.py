@@ -1,9 +1,10 @@
 import asyncio, time, random
 from typing import Callable, Awaitable, List, Dict, Optional
 from backend.core.contracts import (
-    ExchangeAdapter, OrderBookMsg, TradeMsg, Candle, PlaceOrder, OrderAck,
+    ExchangeAdapter, AnyBookMsg, AnyTradeMsg, BookMsg, TradeTick, Level, Candle, PlaceOrder, OrderAck,
     CancelAck, Order, Position, Balance, SymbolInfo, Unsub
 )
+from backend.core.delivery import ConflatingDelivery, QueueDelivery
 
 class MockAdapter(ExchangeAdapter):
     id = "mock"
@@ -19,9 +20,10 @@ class MockAdapter(ExchangeAdapter):
     async def get_symbol_info(self, symbol: str) -> SymbolInfo:
         return SymbolInfo(symbol=symbol, tick_size=0.01, step_size=0.00001, base=symbol[:-4] or "BTC")
 
-    async def subscribe_book(self, symbol: str, depth, cb: Callable[[OrderBookMsg], Awaitable[None]]) -> Unsub:
+    async def subscribe_book(self, symbol: str, depth, cb: Callable[[AnyBookMsg], Awaitable[None]]) -> Unsub:
         key = f"book:{symbol}"
         self._running[key] = True
+        delivery = ConflatingDelivery(cb, self.id, "book")
 
         async def loop():
             mid = 60000.0
@@ -30,40 +32,37 @@ class MockAdapter(ExchangeAdapter):
                 best_bid = mid - spread/2
                 best_ask = mid + spread/2
                 def ladder(start, inc, n=10):
-                    return [{"price": round(start + i*inc, 2), "size": round(random.uniform(0.01, 0.5), 5)} for i in range(n)]
-                msg = OrderBookMsg(
-                    ts=int(time.time()*1000),
-                    symbol=symbol,
-                    bids=[*map(lambda d: d, ladder(best_bid, -0.5))],
-                    asks=[*map(lambda d: d, ladder(best_ask, +0.5))],
-                    snapshot=False
-                )
-                await cb(msg)
+                    return [Level(round(start + i*inc, 2), round(random.uniform(0.01, 0.5), 5)) for i in range(n)]
+                msg = BookMsg(int(time.time()*1000), symbol, ladder(best_bid, -0.5), ladder(best_ask, +0.5), False)
+                delivery.push(msg)
                 await asyncio.sleep(0.1)
         task = asyncio.create_task(loop())
         def _unsub():
             self._running[key] = False
             task.cancel()
+            delivery.close()
         return _unsub
 
-    async def subscribe_trades(self, symbol: str, cb: Callable[[TradeMsg], Awaitable[None]]) -> Unsub:
+    async def subscribe_trades(self, symbol: str, cb: Callable[[AnyTradeMsg], Awaitable[None]]) -> Unsub:
         key = f"trades:{symbol}"
         self._running[key] = True
+        delivery = QueueDelivery(cb, self.id, "trades")
         async def loop():
             while self._running.get(key):
-                t = TradeMsg(
-                    ts=int(time.time()*1000),
-                    symbol=symbol,
-                    price=round(60000 + random.uniform(-50, 50), 2),
-                    size=round(random.uniform(0.001, 0.2), 5),
-                    side=random.choice(["buy","sell"])
+                t = TradeTick(
+                    int(time.time()*1000),
+                    symbol,
+                    round(60000 + random.uniform(-50, 50), 2),
+                    round(random.uniform(0.001, 0.2), 5),
+                    random.choice(["buy","sell"])
                 )
-                await cb(t)
+                delivery.push(t)
                 await asyncio.sleep(0.15)
         task = asyncio.create_task(loop())
         def _unsub():
             self._running[key] = False
             task.cancel()
+            delivery.close()
         return _unsub
 
     async def get_ohlcv(self, symbol: str, tf: str, since: Optional[int]=None, limit: Optional[int]=None) -> List[Candle]:
@@ -1,14 +1,24 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import make_asgi_app
+from backend.core import http
 from .routers import trades, risk_ext, backtest
 
-app = FastAPI(title="Amadeus API (patch v12 mega)")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # pooled REST clients live for the whole process; close their connections on shutdown
+    await http.aclose_all()
+
+app = FastAPI(title="Amadeus API (patch v12 mega)", lifespan=lifespan)
 
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
 app.include_router(trades.router, prefix="/api")
 app.include_router(risk_ext.router, prefix="/api")
 app.include_router(backtest.router, prefix="/api")
+app.mount("/metrics", make_asgi_app())
 
 @app.get("/healthz")
 def healthz(): return {"ok": True}
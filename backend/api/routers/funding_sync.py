@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends
 from sqlmodel import Session
 from datetime import datetime, timezone
-import httpx, hmac, hashlib
+import hmac, hashlib
+from backend.core import http
 from backend.core.db import get_session
 from backend.core.keys import get_keys
 from backend.core.models import RealizedPnlRow
@@ -23,10 +24,9 @@ async def sync_binance(symbol: str, start_ms: int, end_ms: int, category: str="u
     params = f"symbol={symbol}&incomeType=FUNDING_FEE&startTime={start_ms}&endTime={end_ms}&timestamp={int(datetime.now(timezone.utc).timestamp()*1000)}"
     sig = _sign(secret, params)
     headers = {"X-MBX-APIKEY": key}
-    async with httpx.AsyncClient(base_url=BINANCE_FUT, timeout=20.0, headers=headers) as client:
-        r = await client.get(f"/fapi/v1/income?{params}&signature={sig}")
-        r.raise_for_status()
-        data = r.json()
+    r = await http.client(BINANCE_FUT).get(f"/fapi/v1/income?{params}&signature={sig}", headers=headers)
+    r.raise_for_status()
+    data = r.json()
     # Persist as RealizedPnlRow funding adjustments (no qty/price)
     count = 0
     for it in data:
@@ -1,8 +1,7 @@
-import inspect
 from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, Query
 from backend.api.deps import require_token
 from backend.adapters.registry import get_adapter
-from backend.core.contracts import OrderBookMsg, TradeMsg
+from backend.core.md_hub import hub
 
 router = APIRouter(prefix="/market", tags=["market"])
 
@@ -11,46 +10,24 @@ async def get_ohlcv(exchange: str = "mock", category: str = "spot", symbol: str
     adapter = get_adapter(exchange, category)
     return [c.model_dump() for c in await adapter.get_ohlcv(symbol, tf, limit=limit)]
 
-@router.websocket("/ws/book")
-async def ws_book(ws: WebSocket, exchange: str = Query("mock"), category: str = Query("spot"), symbol: str = Query(...), depth: str = Query("L2")):
+async def _stream(ws: WebSocket, exchange: str, category: str, symbol: str, channel: str):
+    # all clients of the same topic share one upstream subscription in the hub
     await ws.accept()
-    adapter = get_adapter(exchange, category)
     unsub = None
     try:
-        async def push(msg: OrderBookMsg):
-            await ws.send_json({"type": "book", "exchange": exchange, **msg.model_dump()})
-        unsub = await adapter.subscribe_book(symbol, "L2", push)
+        unsub = await hub.subscribe(exchange, category, symbol, channel, ws.send_text)
         while True:
             await ws.receive_text()
     except WebSocketDisconnect:
         pass
     finally:
         if unsub:
-            if inspect.iscoroutinefunction(unsub):
-                await unsub()
-            else:
-                result = unsub()
-                if inspect.iscoroutine(result):
-                    await result
+            await unsub()
+
+@router.websocket("/ws/book")
+async def ws_book(ws: WebSocket, exchange: str = Query("mock"), category: str = Query("spot"), symbol: str = Query(...), depth: str = Query("L2")):
+    await _stream(ws, exchange, category, symbol, "book")
 
 @router.websocket("/ws/trades")
 async def ws_trades(ws: WebSocket, exchange: str = Query("mock"), category: str = Query("spot"), symbol: str = Query(...)):
-    await ws.accept()
-    adapter = get_adapter(exchange, category)
-    unsub = None
-    try:
-        async def push(msg: TradeMsg):
-            await ws.send_json({"type":"trade", "exchange": exchange, **msg.model_dump()})
-        unsub = await adapter.subscribe_trades(symbol, push)
-        while True:
-            await ws.receive_text()
-    except WebSocketDisconnect:
-        pass
-    finally:
-        if unsub:
-            if inspect.iscoroutinefunction(unsub):
-                await unsub()
-            else:
-                result = unsub()
-                if inspect.iscoroutine(result):
-                    await result
+    await _stream(ws, exchange, category, symbol, "trades")
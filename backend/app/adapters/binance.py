@@ -1,6 +1,13 @@
 from .base import ExchangeAdapter
 from typing import Dict, Any, Callable
-import httpx, asyncio, time
+import asyncio, time
+
+try:
+    from backend.core import http
+except ImportError:  # запуск из каталога backend/
+    from core import http
+
+REST = "https://api.binance.com"
 
 class BinanceAdapter(ExchangeAdapter):
     id = "binance"
@@ -22,16 +29,14 @@ class BinanceAdapter(ExchangeAdapter):
         # Simple public REST klines (placeholder)
         s = self.normalize_symbol(symbol)
         interval = tf
-        url = "https://api.binance.com/api/v3/klines"
         params = {"symbol": s, "interval": interval, "limit": limit}
-        async with httpx.AsyncClient(timeout=10) as client:
-            r = await client.get(url, params=params)
-            r.raise_for_status()
-            data = r.json()
-            out = []
-            for k in data:
-                out.append({"t": int(k[0]/1000), "o": float(k[1]), "h": float(k[2]), "l": float(k[3]), "c": float(k[4]), "v": float(k[5])})
-            return out
+        r = await http.client(REST).get("/api/v3/klines", params=params, timeout=10.0)
+        r.raise_for_status()
+        data = r.json()
+        out = []
+        for k in data:
+            out.append({"t": int(k[0]/1000), "o": float(k[1]), "h": float(k[2]), "l": float(k[3]), "c": float(k[4]), "v": float(k[5])})
+        return out
 
     async def place_order(self, req: dict) -> dict:
         # Live trading omitted in MVP
@@ -4,7 +4,7 @@ from binance import AsyncClient
 
 from ...deps import state_dep
 from ...models.schemas import ScanRequest, ScanResponse
-from ...services.pair_scanner import scan_best_symbol
+from ...services.scan_cache import paper_mode, scan_cache
 from ...core.config import settings
 
 router = APIRouter(prefix="/scanner", tags=["scanner"])
@@ -12,32 +12,46 @@ router = APIRouter(prefix="/scanner", tags=["scanner"])
 
 @router.post("/scan", response_model=ScanResponse)
 async def scan(req: ScanRequest, state = Depends(state_dep)):
-    cfg = req.config or state.cfg
-
-    client: AsyncClient
-    close_client = False
-
-    if state.binance and getattr(state.binance, "client", None):
-        client = state.binance.client
-    else:
-        api_cfg = cfg.get("api", {}) if isinstance(cfg, dict) else {}
-        paper = bool(api_cfg.get("paper", True))
-        client = await AsyncClient.create(
+    # непрерывный сканер запущен — отвечаем из его состояния без единого запроса к бирже
+    live = getattr(state, "pair_stream", None)
+    if req.config is None and live is not None and live.running:
+        try:
+            data = live.result()
+        except RuntimeError:
+            raise HTTPException(status_code=404, detail="no pairs found")
+        return ScanResponse(best=data["best"], top=data["top"])
+
+    cfg = req.config or getattr(state, "cfg", None) or {}
+
+    binance = getattr(state, "binance", None)
+    client = getattr(binance, "client", None) if binance else None
+
+    def make_client():
+        # без глобального клиента — один долгоживущий клиент на режим (testnet/live) внутри кэша
+        return AsyncClient.create(
             settings.binance_api_key,
             settings.binance_api_secret,
-            testnet=paper,
+            testnet=paper_mode(cfg),
         )
-        close_client = True
 
+    # опрос дашбордами: свежий результат — из кэша, одинаковые запросы делят один скан
     try:
-        data = await scan_best_symbol(cfg, client)
+        data = await scan_cache.get(cfg, client, make_client)
     except RuntimeError:
         raise HTTPException(status_code=404, detail="no pairs found")
-    finally:
-        if close_client:
-            try:
-                await client.close_connection()
-            except Exception:
-                pass
 
     return ScanResponse(best=data["best"], top=data["top"])
+
+
+@router.post("/stream/start")
+async def stream_start(req: ScanRequest, state = Depends(state_dep)):
+    cfg = req.config or getattr(state, "cfg", None) or {}
+    binance = getattr(state, "binance", None)
+    scanner = await state.start_pair_stream(cfg, getattr(binance, "client", None) if binance else None)
+    return {"running": scanner.running}
+
+
+@router.post("/stream/stop")
+async def stream_stop(state = Depends(state_dep)):
+    await state.stop_pair_stream()
+    return {"running": False}
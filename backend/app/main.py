@@ -1,8 +1,26 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .api.routers import bot, strategies, backtest, ws, config, history, risk
+from .services.scan_cache import scan_cache
+from .services.state import app_state
 
-app = FastAPI(title="Amadeus Multi-Exchange MVP", version="0.1.0")
+try:
+    from backend.core import http
+except ImportError:  # запуск из каталога backend/
+    from core import http
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # общие REST-клиенты и сканер живут весь процесс; соединения закрываем при остановке
+    await app_state.stop_pair_stream()
+    await scan_cache.close()
+    await http.aclose_all()
+
+
+app = FastAPI(title="Amadeus Multi-Exchange MVP", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
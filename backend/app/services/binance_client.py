@@ -2,13 +2,20 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-from typing import Any, Dict, Optional, Callable, List, Iterable
+from typing import Any, Dict, Optional, Callable, List, Iterable, Sequence, Tuple
 import time
 
 import httpx  # async HTTP client
 import websockets  # websockets client
 from websockets.legacy.client import WebSocketClientProtocol  # type hints
 from .shadow_executor import ShadowExecutor
+from .rest_weight import Priority, WeightScheduler, get_scheduler, request_weight
+from .symbols import SymbolRegistry, registry_for
+
+try:
+    from backend.core import json_codec
+except ImportError:  # запуск из каталога backend/
+    from core import json_codec
 
 logger = logging.getLogger(__name__)
 
@@ -20,45 +27,208 @@ class OrderBlockedByRisk(RuntimeError):
 
 # --------------------------- Simple WS manager ---------------------------
 
+# Binance: не более 1024 стримов на одно подключение /stream
+MAX_STREAMS_PER_CONNECTION = 1024
+# размер очереди одного читателя; при переполнении выбрасываем самые старые сообщения
+READER_QUEUE_SIZE = 1000
+# метка в очереди читателя: контекст закрыт, ждущий recv() должен проснуться
+_CLOSED = object()
+
+
+def _norm_stream(stream: str) -> str:
+    # символ — в нижнем регистре, имя стрима (bookTicker, aggTrade, ...) — как есть
+    sym, sep, rest = stream.partition("@")
+    return stream if sym.startswith("!") else f"{sym.lower()}{sep}{rest}"
+
+
 class _WSContext:
     """Простейший async context manager, совместимый с интерфейсом python-binance:
     async with bm.depth_socket('BTCUSDT') as stream: msg = await stream.recv()
+
+    Контекст не владеет сокетом: он подписывается на стримы общего
+    combined-подключения менеджера и читает уже декодированные сообщения
+    из своей очереди. Одно и то же сообщение раздаётся всем читателям стрима,
+    поэтому изменять его нельзя.
     """
-    def __init__(self, manager: "SimpleBinanceSocketManager", url: str):
+    def __init__(self, manager: "SimpleBinanceSocketManager", streams: Sequence[str], envelope: bool = False):
         self._manager = manager
-        self._url = url
-        self._ws: Optional[WebSocketClientProtocol] = None
+        self.streams: Tuple[str, ...] = tuple(streams)
+        # multiplex-читатели получают конверт {"stream": ..., "data": ...} как в /stream
+        self._envelope = envelope
+        self._queue: Optional[asyncio.Queue] = None
+        self.dropped = 0
 
     async def __aenter__(self) -> "_WSContext":
-        # ping_interval/timeout — умеренные дефолты
-        self._ws = await websockets.connect(self._url, ping_interval=20, ping_timeout=20, close_timeout=5)
-        self._manager._register(self)
+        self._queue = asyncio.Queue(maxsize=READER_QUEUE_SIZE)
+        self._manager._acquire(self)
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    def _feed(self, stream: str, data: Any) -> None:
+        q = self._queue
+        if q is None:
+            return
+        item = {"stream": stream, "data": data} if self._envelope else data
         try:
-            if self._ws is not None:
-                await self._ws.close()
-        finally:
-            self._manager._unregister(self)
-            self._ws = None
+            q.put_nowait(item)
+        except asyncio.QueueFull:
+            # медленный читатель не должен тормозить общее подключение
+            q.get_nowait()
+            q.put_nowait(item)
+            self.dropped += 1
 
     async def recv(self) -> Any:
-        if self._ws is None:
+        q = self._queue
+        if q is None:
             raise RuntimeError("WebSocket is not connected")
-        msg = await self._ws.recv()
+        item = await q.get()
+        if item is _CLOSED:
+            q.put_nowait(_CLOSED)  # разбудить остальных ждущих этой очереди
+            raise RuntimeError("WebSocket is not connected")
+        return item
+
+    async def aclose(self):
+        q = self._queue
+        if q is not None:
+            self._queue = None
+            if q.full():
+                q.get_nowait()
+            q.put_nowait(_CLOSED)
+            await self._manager._release(self)
+
+
+class _CombinedStream:
+    """Одно физическое подключение к /stream?streams=... с подпиской на лету.
+
+    Стримы добавляются/удаляются сообщениями SUBSCRIBE/UNSUBSCRIBE, каждое
+    входящее сообщение декодируется один раз и раздаётся всем читателям стрима.
+    При обрыве переподключается сам, с актуальным набором стримов в URL.
+    Если задан recorder (MarketRecorder), каждый кадр с данными пишется в него как есть.
+    """
+    def __init__(self, root: str, recorder: Any = None):
+        self._root = root
+        self.recorder = recorder
+        self._readers: Dict[str, set[_WSContext]] = {}
+        self._ws: Optional[WebSocketClientProtocol] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._pending_sub: set[str] = set()
+        self._pending_unsub: set[str] = set()
+        self._req_id = 0
+        self.connects = 0
+
+    def __len__(self) -> int:
+        return len(self._readers)
+
+    def __contains__(self, stream: str) -> bool:
+        return stream in self._readers
+
+    def add(self, stream: str, ctx: _WSContext) -> None:
+        readers = self._readers.get(stream)
+        if readers is None:
+            readers = self._readers[stream] = set()
+            self._pending_unsub.discard(stream)
+            self._pending_sub.add(stream)
+            self._schedule_flush()
+        readers.add(ctx)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def remove(self, stream: str, ctx: _WSContext) -> None:
+        readers = self._readers.get(stream)
+        if readers is None:
+            return
+        readers.discard(ctx)
+        if not readers:
+            del self._readers[stream]
+            self._pending_sub.discard(stream)
+            self._pending_unsub.add(stream)
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        # собираем пачку изменений за один проход цикла событий в одно сообщение
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        await asyncio.sleep(0)
+        ws = self._ws
+        if ws is None:
+            # подключения нет — актуальные стримы попадут в URL при (пере)подключении
+            return
         try:
-            return json.loads(msg)
+            for method, pending in (("SUBSCRIBE", self._pending_sub), ("UNSUBSCRIBE", self._pending_unsub)):
+                if not pending:
+                    continue
+                params = sorted(pending)
+                pending.clear()
+                self._req_id += 1
+                await ws.send(json.dumps({"method": method, "params": params, "id": self._req_id}))
         except Exception:
-            return msg
+            logger.warning("combined stream control send failed", exc_info=True)
 
-    async def aclose(self):
-        if self._ws is not None:
+    async def _run(self) -> None:
+        attempt = 0
+        while self._readers:
+            streams = list(self._readers)
+            url = f"{self._root}/stream?streams=" + "/".join(streams)
             try:
-                await self._ws.close()
+                async with websockets.connect(url, ping_interval=20, ping_timeout=20, close_timeout=5) as ws:
+                    self._ws = ws
+                    self.connects += 1
+                    attempt = 0
+                    self._pending_sub.difference_update(streams)
+                    self._pending_unsub.intersection_update(streams)
+                    if self._pending_sub or self._pending_unsub:
+                        self._schedule_flush()
+                    async for raw in ws:
+                        self._dispatch(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("combined stream error: %s", e)
             finally:
-                self._manager._unregister(self)
                 self._ws = None
+            if not self._readers:
+                break
+            attempt += 1
+            await asyncio.sleep(min(30.0, 0.5 * (2 ** min(attempt, 6))))
+
+    def _dispatch(self, raw: Any) -> None:
+        try:
+            msg = json_codec.loads(raw)
+        except Exception:
+            logger.debug("non-JSON frame skipped: %r", raw)
+            return
+        if not isinstance(msg, dict):
+            return
+        stream = msg.get("stream")
+        if stream is None:
+            # ответ на SUBSCRIBE/UNSUBSCRIBE: {"result": null, "id": N}
+            if msg.get("error"):
+                logger.warning("combined stream control error: %s", msg.get("error"))
+            return
+        if self.recorder is not None:
+            self.recorder.record(stream, raw)
+        readers = self._readers.get(stream)
+        if not readers:
+            return
+        data = msg.get("data")
+        for ctx in tuple(readers):
+            ctx._feed(stream, data)
+
+    async def close(self) -> None:
+        self._readers.clear()
+        for task in (self._task, self._flush_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._task = self._flush_task = None
 
 
 class SimpleBinanceSocketManager:
@@ -67,39 +237,87 @@ class SimpleBinanceSocketManager:
     .depth_socket(), .trade_socket(), .aggtrade_socket(), .kline_socket(), .symbol_ticker_socket(), .book_ticker_socket()
     и .multiplex_socket().
 
-    Spot testnet base: wss://stream.testnet.binance.vision/ws
-    Spot mainnet base: wss://stream.binance.com:9443/ws
+    Все сокеты обслуживаются общими combined-подключениями (/stream?streams=...):
+    стрим подписывается один раз при первом читателе и отписывается при уходе
+    последнего (reference counting), сообщения декодируются один раз и
+    раздаются всем читателям.
+
+    recorder (например, backend.core.recorder.MarketRecorder) получает все
+    сырые кадры со всех подключений — для отладки и офлайн-симуляции.
+
+    Spot testnet base: wss://stream.testnet.binance.vision
+    Spot mainnet base: wss://stream.binance.com:9443
     Ровно как в официальной документации по WebSocket Streams. :contentReference[oaicite:2]{index=2}
     """
     WEBSOCKET_DEPTH_5 = 5
     WEBSOCKET_DEPTH_10 = 10
     WEBSOCKET_DEPTH_20 = 20
 
-    def __init__(self, paper: bool = True, user_timeout: Optional[int] = None):
-        base = "wss://stream.testnet.binance.vision" if paper else "wss://stream.binance.com:9443"
-        self._base = f"{base}/ws"
+    def __init__(self, paper: bool = True, user_timeout: Optional[int] = None, recorder: Any = None):
+        self._root = "wss://stream.testnet.binance.vision" if paper else "wss://stream.binance.com:9443"
         self._active: set[_WSContext] = set()
+        self._conns: List[_CombinedStream] = []
+        self._route: Dict[str, _CombinedStream] = {}
         self._user_timeout = user_timeout
+        self._recorder = recorder
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._conns)
 
-    def _url(self, stream: str) -> str:
+    @property
+    def recorder(self) -> Any:
+        return self._recorder
+
+    @recorder.setter
+    def recorder(self, recorder: Any) -> None:
+        # подключаем/отключаем запись и на уже открытых подключениях
+        self._recorder = recorder
+        for conn in self._conns:
+            conn.recorder = recorder
+
+    def _socket(self, *streams: str, envelope: bool = False) -> _WSContext:
         # stream должен быть в нижнем регистре (требование Binance) :contentReference[oaicite:3]{index=3}
-        return f"{self._base}/{stream}"
+        return _WSContext(self, streams, envelope=envelope)
 
-    # регистрация активных контекстов для аккуратного закрытия при stop()
-    def _register(self, ctx: _WSContext):
+    # учёт читателей: подписка на общем подключении при первом, отписка при последнем
+    def _acquire(self, ctx: _WSContext):
         self._active.add(ctx)
-
-    def _unregister(self, ctx: _WSContext):
+        for stream in ctx.streams:
+            conn = self._route.get(stream)
+            if conn is None:
+                conn = next((c for c in self._conns if len(c) < MAX_STREAMS_PER_CONNECTION), None)
+                if conn is None:
+                    conn = _CombinedStream(self._root, recorder=self._recorder)
+                    self._conns.append(conn)
+                self._route[stream] = conn
+            conn.add(stream, ctx)
+
+    async def _release(self, ctx: _WSContext):
         self._active.discard(ctx)
+        for stream in ctx.streams:
+            conn = self._route.get(stream)
+            if conn is None:
+                continue
+            conn.remove(stream, ctx)
+            if stream not in conn:
+                del self._route[stream]
+            if not len(conn) and conn in self._conns:
+                self._conns.remove(conn)
+                await conn.close()
 
     async def close(self):
-        # Закрываем все открытые сокеты
+        # Закрываем все читатели и подключения
         for ctx in list(self._active):
             try:
                 await ctx.aclose()
             except Exception:
                 logger.warning("WS context close failed", exc_info=True)
         self._active.clear()
+        for conn in list(self._conns):
+            await conn.close()
+        self._conns.clear()
+        self._route.clear()
 
     # --------------- Sockets (совместимые имена) ---------------
     def depth_socket(self, symbol: str, depth: Optional[int] = None, interval: Optional[Any] = None) -> _WSContext:
@@ -115,41 +333,37 @@ class SimpleBinanceSocketManager:
         # некоторые реализации прокидывают interval='100ms' — поддержим
         if str(interval).lower() in {"100", "100ms"}:
             stream += "@100ms"
-        return _WSContext(self, self._url(stream))
+        return self._socket(stream)
 
     def trade_socket(self, symbol: str) -> _WSContext:
-        return _WSContext(self, self._url(f"{symbol.lower()}@trade"))
+        return self._socket(f"{symbol.lower()}@trade")
 
     def aggtrade_socket(self, symbol: str) -> _WSContext:
-        return _WSContext(self, self._url(f"{symbol.lower()}@aggTrade"))
+        return self._socket(f"{symbol.lower()}@aggTrade")
 
     def kline_socket(self, symbol: str, interval: str = "1m") -> _WSContext:
         # stream формат: <symbol>@kline_<interval>
-        return _WSContext(self, self._url(f"{symbol.lower()}@kline_{interval}"))
+        return self._socket(f"{symbol.lower()}@kline_{interval}")
 
     def symbol_ticker_socket(self, symbol: str) -> _WSContext:
         # 24hr ticker for a symbol
-        return _WSContext(self, self._url(f"{symbol.lower()}@ticker"))
+        return self._socket(f"{symbol.lower()}@ticker")
 
     def book_ticker_socket(self, symbol: Optional[str] = None) -> _WSContext:
         # best bid/ask — одиночный символ или все ('!bookTicker')
         stream = f"{symbol.lower()}@bookTicker" if symbol else "!bookTicker"
-        return _WSContext(self, self._url(stream))
+        return self._socket(stream)
 
     def miniticker_socket(self, update_interval_ms: Optional[int] = None) -> _WSContext:
         # общий мини-тикер по всем символам
         stream = "!miniTicker@arr"
         if update_interval_ms in (1000, 5000):
             stream = f"{stream}@{update_interval_ms}ms"
-        return _WSContext(self, self._url(stream))
+        return self._socket(stream)
 
     def multiplex_socket(self, streams: Iterable[str]) -> _WSContext:
-        # Combined streams: wss://.../stream?streams=<s1>/<s2>...
-        # Оставляем как совместимость — большинство стратегий используют depth_socket напрямую.
-        path = "/stream?streams=" + "/".join(s.lower() for s in streams)
-        base = self._base.rsplit("/ws", 1)[0]  # получаем корень без /ws
-        url = f"{base}{path}"
-        return _WSContext(self, url)
+        # Combined streams: читатель получает конверт {"stream": ..., "data": ...}
+        return self._socket(*(_norm_stream(s) for s in streams), envelope=True)
 
 
 # --------------------------- REST клиент ---------------------------
@@ -158,11 +372,20 @@ class BinanceRestClient:
     """
     Минимальный REST-клиент.
     /api/v3/exchangeInfo для получения торговых фильтров символа (PRICE_FILTER, LOT_SIZE, MIN_NOTIONAL и др.). :contentReference[oaicite:5]{index=5}
+    Все запросы проходят через WeightScheduler хоста: вес эндпоинта резервируется
+    заранее, приоритет берётся из rest_priority() вызывающего кода.
     """
-    def __init__(self, api_key: Optional[str], api_secret: Optional[str], paper: bool = True):
+    def __init__(
+            self,
+            api_key: Optional[str],
+            api_secret: Optional[str],
+            paper: bool = True,
+            scheduler: Optional[WeightScheduler] = None,
+    ):
         base = "https://testnet.binance.vision" if paper else "https://api.binance.com"
         self.base_url = f"{base}/api"
         self._client = httpx.AsyncClient(base_url=self.base_url, timeout=10.0)
+        self.scheduler = scheduler or get_scheduler(base)
         self.api_key = api_key
         self.api_secret = api_secret
 
@@ -172,30 +395,62 @@ class BinanceRestClient:
         except Exception:
             logger.exception("Failed to close httpx.AsyncClient")
 
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None,
+                   prio: Optional[Priority] = None) -> httpx.Response:
+        return await self.scheduler.request(
+            lambda: self._client.get(path, params=params),
+            request_weight(path, params),
+            prio,
+        )
+
     async def get_exchange_info(self) -> Dict[str, Any]:
-        r = await self._client.get("/v3/exchangeInfo")
+        r = await self._get("/v3/exchangeInfo")
         r.raise_for_status()
         return r.json()
 
     async def get_ticker(self, symbol: str) -> Dict[str, Any]:
-        r = await self._client.get("/v3/ticker/24hr", params={"symbol": symbol.upper()})
+        r = await self._get("/v3/ticker/24hr", params={"symbol": symbol.upper()})
         r.raise_for_status()
         return r.json()
 
     async def get_orderbook_ticker(self, symbol: str) -> Dict[str, Any]:
-        r = await self._client.get("/v3/ticker/bookTicker", params={"symbol": symbol.upper()})
+        r = await self._get("/v3/ticker/bookTicker", params={"symbol": symbol.upper()})
+        r.raise_for_status()
+        return r.json()
+
+    @staticmethod
+    def _symbols_param(symbols: Optional[Sequence[str]]) -> Optional[Dict[str, Any]]:
+        if not symbols:
+            return None
+        return {"symbols": json_codec.dumps([s.upper() for s in symbols])}
+
+    async def get_tickers(self, symbols: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """24hr-статистика одним запросом: по списку символов или по всем (вес 2/40/80)."""
+        r = await self._get("/v3/ticker/24hr", params=self._symbols_param(symbols))
+        r.raise_for_status()
+        return r.json()
+
+    async def get_orderbook_tickers(self, symbols: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Лучшие bid/ask одним запросом (вес 4)."""
+        r = await self._get("/v3/ticker/bookTicker", params=self._symbols_param(symbols))
+        r.raise_for_status()
+        return r.json()
+
+    async def get_depth(self, symbol: str, limit: int = 1000) -> Dict[str, Any]:
+        # снимок книги для синхронизации с diff-стримом <symbol>@depth
+        r = await self._get("/v3/depth", params={"symbol": symbol.upper(), "limit": limit})
         r.raise_for_status()
         return r.json()
 
     async def get_klines(self, symbol: str, interval: str, limit: int) -> List[Any]:
         params = {"symbol": symbol.upper(), "interval": interval, "limit": limit}
-        r = await self._client.get("/v3/klines", params=params)
+        r = await self._get("/v3/klines", params=params)
         r.raise_for_status()
         return r.json()
 
     async def get_symbol_info(self, symbol: str) -> Dict[str, Any]:
         # /api/v3/exchangeInfo?symbol=BTCUSDT — Spot/Testnet одинаковы по схеме. :contentReference[oaicite:6]{index=6}
-        r = await self._client.get("/v3/exchangeInfo", params={"symbol": symbol.upper()})
+        r = await self._get("/v3/exchangeInfo", params={"symbol": symbol.upper()}, prio=Priority.USER_DATA)
         r.raise_for_status()
         data = r.json()
         symbols: List[Dict[str, Any]] = data.get("symbols") or []
@@ -276,6 +531,8 @@ class BinanceAsync:
 
         # REST клиент
         self.client = BinanceRestClient(api_key=self.api_key, api_secret=self.api_secret, paper=self.paper)
+        # фильтры символов (tick/step/minNotional) из одного exchangeInfo, общий со сканером
+        self.symbols: SymbolRegistry = registry_for(self.client)
         # WS менеджер, ожидаемый стратегией как .bm
         self.bm = SimpleBinanceSocketManager(paper=self.paper)
 
@@ -286,6 +543,7 @@ class BinanceAsync:
         except Exception:
             logger.exception("bm close error")
         try:
+            await self.symbols.close()
             await self.client.aclose()
         except Exception:
             logger.exception("client close error")
@@ -398,4 +656,8 @@ class BinanceAsync:
 
     # совместимость: вдруг где-то вызывается client_wrap.get_symbol_info(...)
     async def get_symbol_info(self, symbol: str) -> Dict[str, Any]:
+        await self.symbols.ensure()
+        rec = self.symbols.get(symbol)
+        if rec is not None:
+            return rec.as_info()
         return await self.client.get_symbol_info(symbol)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def tf_seconds(tf: str) -> Optional[int]:
+    """'1s' / '1m' / '15m' / '4h' / '1d' -> длительность бара в секундах; None — неизвестный формат."""
+    try:
+        n, unit = int(tf[:-1]), tf[-1]
+    except (ValueError, IndexError):
+        return None
+    mult = _UNITS.get(unit)
+    return n * mult if mult and n > 0 else None
+
+
+class BarSeries:
+    """
+    Кольцевой буфер OHLCV-баров одного (symbol, timeframe) в формате адаптеров:
+    {"t": начало бара (сек), "o", "h", "l", "c", "v"}.
+    Последний бар — текущий, он обновляется каждой сделкой.
+    """
+
+    def __init__(self, tf: int, maxlen: int = 1000) -> None:
+        self.tf = tf
+        self.bars: Deque[Dict[str, Any]] = deque(maxlen=maxlen)
+
+    def seed(self, bars: List[Dict[str, Any]]) -> None:
+        """Добавить бары из REST: более новые дописываются, текущий бар заменяется.
+
+        Если первый из новых баров не стыкуется с хвостом серии, между ними
+        была бы дыра — тогда серия собирается заново из новых баров.
+        """
+        bars = sorted(bars, key=lambda x: x["t"])
+        if bars and self.bars and int(bars[0]["t"]) > self.bars[-1]["t"] + self.tf:
+            self.bars.clear()
+        for b in bars:
+            bar = {"t": int(b["t"]), "o": float(b["o"]), "h": float(b["h"]),
+                   "l": float(b["l"]), "c": float(b["c"]), "v": float(b["v"])}
+            if self.bars and bar["t"] < self.bars[-1]["t"]:
+                continue
+            if self.bars and bar["t"] == self.bars[-1]["t"]:
+                self.bars[-1] = bar
+            else:
+                self.bars.append(bar)
+
+    def add_trade(self, ts: float, price: float, qty: float) -> None:
+        tf = self.tf
+        t = int(ts // tf) * tf
+        bars = self.bars
+        if not bars:
+            bars.append({"t": t, "o": price, "h": price, "l": price, "c": price, "v": qty})
+            return
+        last = bars[-1]
+        if t == last["t"]:
+            if price > last["h"]:
+                last["h"] = price
+            elif price < last["l"]:
+                last["l"] = price
+            last["c"] = price
+            last["v"] += qty
+            return
+        if t > last["t"]:
+            # интервалы без сделок — плоские бары по последнему close, как в биржевых klines
+            prev = last["c"]
+            missing = min((t - last["t"]) // tf - 1, bars.maxlen or 0)
+            for k in range(missing, 0, -1):
+                ft = t - k * tf
+                bars.append({"t": ft, "o": prev, "h": prev, "l": prev, "c": prev, "v": 0.0})
+            bars.append({"t": t, "o": price, "h": price, "l": price, "c": price, "v": qty})
+            return
+        # запоздавшая сделка в уже закрытый бар: обновляем high/low/объём, close не трогаем
+        back = (last["t"] - t) // tf
+        if back < len(bars):
+            bar = bars[-1 - back]
+            if bar["t"] == t:
+                bar["h"] = max(bar["h"], price)
+                bar["l"] = min(bar["l"], price)
+                bar["v"] += qty
+
+    def last(self, limit: int, since: Optional[int] = None) -> List[Dict[str, Any]]:
+        bars = self.bars
+        n = len(bars)
+        start = max(0, n - limit) if limit else 0
+        out = [dict(bars[i]) for i in range(start, n)]
+        if since is not None:
+            out = [b for b in out if b["t"] >= since]
+        return out
+
+
+class CandleFeed:
+    """
+    Обёртка над адаптером с тем же get_ohlcv(), но из памяти.
+
+    Первый запрос по (symbol, tf) делает один REST-бэкфилл и подписывает символ
+    на сделки (одна подписка на символ для всех таймфреймов); дальше бары
+    собираются из сделок, и get_ohlcv — это чтение из кольцевого буфера.
+    Остальные методы проксируются в адаптер, так что объект можно отдать
+    стратегии как ctx.md.
+
+    Если по символу давно нет сделок (стрим не реализован или молчит), бары
+    освежаются REST-запросом не чаще раза в rest_fallback_s на (symbol, tf).
+    """
+
+    def __init__(self, adapter: Any, maxlen: int = 1000, rest_fallback_s: float = 5.0) -> None:
+        self._adapter = adapter
+        self.maxlen = maxlen
+        self.rest_fallback_s = rest_fallback_s
+        self._last_trade: Dict[str, float] = {}
+        self._refreshed: Dict[Tuple[str, int], float] = {}
+        self._series: Dict[Tuple[str, int], BarSeries] = {}
+        self._by_symbol: Dict[str, List[BarSeries]] = {}
+        self._unsubs: Dict[str, Any] = {}
+        self._pending: Dict[Tuple[str, int], asyncio.Future] = {}
+        self.backfills = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._adapter, name)
+
+    async def get_ohlcv(self, symbol: str, tf: str, since: Optional[int] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        secs = tf_seconds(tf)
+        if secs is None:
+            return await self._adapter.get_ohlcv(symbol, tf, since=since, limit=limit)
+        key = (symbol, secs)
+        series = self._series.get(key)
+        if series is None:
+            series = await self._open(symbol, tf, key)
+        else:
+            now = asyncio.get_running_loop().time()
+            if (now - self._last_trade.get(symbol, -1e18) > self.rest_fallback_s
+                    and now - self._refreshed.get(key, -1e18) > self.rest_fallback_s):
+                self._refreshed[key] = now
+                n = limit
+                if series.bars:
+                    # запросить весь простой с последнего бара, иначе после seed останется дыра
+                    n = max(n, int((time.time() - series.bars[-1]["t"]) // secs) + 2)
+                series.seed(await self._adapter.get_ohlcv(symbol, tf, limit=min(n, self.maxlen)))
+                self.backfills += 1
+        return series.last(limit, since)
+
+    async def _open(self, symbol: str, tf: str, key: Tuple[str, int]) -> BarSeries:
+        # single-flight: параллельные тики ждут один и тот же бэкфилл
+        fut = self._pending.get(key)
+        if fut is not None:
+            return await asyncio.shield(fut)
+        fut = self._pending[key] = asyncio.get_running_loop().create_future()
+        try:
+            series = BarSeries(key[1], self.maxlen)
+            if symbol not in self._unsubs:
+                self._unsubs[symbol] = await self._adapter.subscribe_trades(symbol, self._on_trade)
+            series.seed(await self._adapter.get_ohlcv(symbol, tf, limit=self.maxlen))
+            self.backfills += 1
+            self._refreshed[key] = asyncio.get_running_loop().time()
+            self._series[key] = series
+            self._by_symbol.setdefault(symbol, []).append(series)
+            fut.set_result(series)
+            return series
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # ожидающих может не быть — не логировать "never retrieved"
+            raise
+        finally:
+            del self._pending[key]
+
+    async def _on_trade(self, msg: Dict[str, Any]) -> None:
+        series = self._by_symbol.get(msg.get("symbol"))
+        if not series:
+            return
+        try:
+            price = float(msg["price"])
+            qty = float(msg.get("qty") or 0.0)
+            ts = float(msg.get("ts") or 0.0)
+        except (KeyError, TypeError, ValueError):
+            return
+        if ts > 1e11:  # миллисекунды
+            ts /= 1000.0
+        self._last_trade[msg["symbol"]] = asyncio.get_running_loop().time()
+        for s in series:
+            s.add_trade(ts, price, qty)
+
+    async def close(self) -> None:
+        for unsub in self._unsubs.values():
+            try:
+                res = unsub()
+                if inspect.isawaitable(res):
+                    await res
+            except Exception:
+                logger.warning("trade unsubscribe failed", exc_info=True)
+        self._unsubs.clear()
+        self._series.clear()
+        self._by_symbol.clear()
+        self._last_trade.clear()
+        self._refreshed.clear()
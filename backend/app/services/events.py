@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import asyncio
+import inspect
 import json
 import logging
 import time
+from collections import deque
 from dataclasses import asdict, is_dataclass
-from typing import Any, Mapping
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +44,14 @@ class EventDispatcher:
             if await handler(evt):
                 return
 
+    async def dispatch_many(self, evts: Iterable[Any]) -> None:
+        """Пачка событий по порядку; ошибка в одном не мешает остальным."""
+        for evt in evts:
+            try:
+                await self.dispatch(evt)
+            except Exception:
+                logger.exception("event dispatch failed")
+
     # --- handlers ----------------------------------------------------------
     async def _handle_risk(self, evt: dict) -> bool:
         try:
@@ -114,3 +125,208 @@ class EventDispatcher:
             return True
         self.state._broadcast_obj(evt)
         return True
+
+
+# --------------------------- конвейер событий ---------------------------
+
+class _Slot:
+    """Место конфлируемого события в очереди; evt is None — место освобождено более новым событием."""
+    __slots__ = ("key", "evt")
+
+    def __init__(self, key: Tuple[Any, Any], evt: Any) -> None:
+        self.key = key
+        self.evt = evt
+
+
+class EventProducer:
+    """
+    Очередь событий одного источника (стратегии, клиента биржи) в EventPipeline.
+
+    Вызывается как обычный events_cb, синхронно и без создания задач. Буфер
+    ограничен: при переполнении выбрасывается самое старое событие (счётчик
+    dropped). События типов из pipeline.conflate (по умолчанию "market")
+    конфлируются по (type, symbol): пока прошлое не доставлено, оно
+    снимается с очереди, а новое встаёт в конец — порядок относительно
+    остальных событий источника сохраняется.
+    """
+    __slots__ = ("name", "capacity", "_buf", "_pending", "_dead", "_pipeline", "emitted", "dropped", "conflated")
+
+    def __init__(self, pipeline: "EventPipeline", name: str, capacity: int) -> None:
+        self.name = name
+        self.capacity = max(1, capacity)
+        self._buf: Deque[Any] = deque()
+        self._pending: Dict[Tuple[Any, Any], _Slot] = {}
+        self._dead = 0                  # снятые конфляцией места, ещё лежащие в _buf
+        self._pipeline = pipeline
+        self.emitted = 0
+        self.dropped = 0
+        self.conflated = 0
+
+    def __len__(self) -> int:
+        return len(self._buf) - self._dead
+
+    def __call__(self, evt: Any) -> None:
+        self.emit(evt)
+
+    def emit(self, evt: Any) -> None:
+        self.emitted += 1
+        buf = self._buf
+        t = evt.get("type") if isinstance(evt, dict) else None
+        if t is not None and t in self._pipeline.conflate:
+            key = (t, evt.get("symbol"))
+            slot = self._pending.get(key)
+            if slot is not None:
+                self.conflated += 1
+                if buf[-1] is slot:
+                    # прошлое и так последнее — просто заменить
+                    slot.evt = evt
+                    return
+                slot.evt = None
+                self._dead += 1
+            evt = self._pending[key] = _Slot(key, evt)
+        if len(buf) - self._dead >= self.capacity:
+            self._drop_oldest()
+        buf.append(evt)
+        if self._dead > 64 and self._dead * 2 > len(buf):
+            self._buf = deque(x for x in buf if not (isinstance(x, _Slot) and x.evt is None))
+            self._dead = 0
+        self._pipeline._wake()
+
+    def _drop_oldest(self) -> None:
+        buf = self._buf
+        while buf:
+            old = buf.popleft()
+            if isinstance(old, _Slot):
+                if old.evt is None:
+                    self._dead -= 1
+                    continue
+                self._pending.pop(old.key, None)
+            self.dropped += 1
+            return
+
+    def _drain(self, out: List[Any], limit: int) -> None:
+        buf = self._buf
+        n = 0
+        while buf and n < limit:
+            item = buf.popleft()
+            if isinstance(item, _Slot):
+                if item.evt is None:
+                    self._dead -= 1
+                    continue
+                self._pending.pop(item.key, None)
+                item = item.evt
+            out.append(item)
+            n += 1
+
+
+class EventPipeline:
+    """
+    Доставка событий стратегий и клиентов биржи одной задачей.
+
+    Каждый источник пишет в свой EventProducer (ограниченный буфер), одна
+    задача-потребитель забирает накопившееся пачками до batch_size и отдаёт
+    sink — обычно EventDispatcher.dispatch_many. Порядок событий одного
+    источника сохраняется; между источниками — по очереди, пачками.
+
+        pipeline = EventPipeline(dispatcher.dispatch_many)
+        mm = MarketMakerStrategy(cfg, client, pipeline.producer("mm"))
+    """
+
+    def __init__(
+            self,
+            sink: Callable[[List[Any]], Optional[Awaitable[None]]],
+            capacity: int = 4096,
+            batch_size: int = 256,
+            conflate: Iterable[str] = ("market",),
+    ) -> None:
+        self._sink = sink
+        self.capacity = capacity
+        self.batch_size = max(1, batch_size)
+        self.conflate = frozenset(conflate)
+        self._producers: Dict[str, EventProducer] = {}
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._rr = 0
+        self.batches = 0
+        self.delivered = 0
+
+    def producer(self, name: str, capacity: Optional[int] = None) -> EventProducer:
+        p = self._producers.get(name)
+        if p is None:
+            p = self._producers[name] = EventProducer(self, name, capacity or self.capacity)
+        return p
+
+    def _wake(self) -> None:
+        if self._ready is not None:
+            self._ready.set()
+
+    # ----------------- жизненный цикл -----------------
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._ready = asyncio.Event()
+            self._ready.set()           # забрать то, что накопилось до старта
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить потребителя, доставив всё накопленное."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            self._closing = True
+            self._wake()
+            await task
+        self._ready = None
+        await self.flush()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self) -> None:
+        ready = self._ready
+        while not self._closing:
+            await ready.wait()
+            ready.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Доставить всё, что лежит в буферах; возвращает число событий."""
+        total = 0
+        while True:
+            batch: List[Any] = []
+            producers = list(self._producers.values())
+            if producers:
+                # начинаем каждый раз со следующего источника, чтобы шумный не вытеснял остальных
+                k = self._rr % len(producers)
+                self._rr += 1
+                for p in producers[k:] + producers[:k]:
+                    p._drain(batch, self.batch_size - len(batch))
+                    if len(batch) >= self.batch_size:
+                        break
+            if not batch:
+                return total
+            total += len(batch)
+            await self._deliver(batch)
+
+    async def _deliver(self, batch: List[Any]) -> None:
+        self.batches += 1
+        self.delivered += len(batch)
+        try:
+            res = self._sink(batch)
+            if inspect.isawaitable(res):
+                await res
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("event sink failed")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "delivered": self.delivered,
+            "producers": {
+                name: {"queued": len(p), "emitted": p.emitted, "dropped": p.dropped, "conflated": p.conflated}
+                for name, p in self._producers.items()
+            },
+        }
@@ -0,0 +1,199 @@
+from __future__ import annotations
+import asyncio
+import bisect
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Level = Tuple[float, float]
+
+
+class BookGap(RuntimeError):
+    """Пропуск в последовательности diff-обновлений — книгу нужно пересинхронизировать."""
+    pass
+
+
+class _Side:
+    """Одна сторона книги: отсортированный по возрастанию массив цен + цена -> объём."""
+    __slots__ = ("prices", "qty")
+
+    def __init__(self) -> None:
+        self.prices: List[float] = []
+        self.qty: Dict[float, float] = {}
+
+    def clear(self) -> None:
+        self.prices.clear()
+        self.qty.clear()
+
+    def set(self, px: float, q: float) -> None:
+        if q <= 0.0:
+            if self.qty.pop(px, None) is not None:
+                i = bisect.bisect_left(self.prices, px)
+                del self.prices[i]
+            return
+        if px not in self.qty:
+            bisect.insort(self.prices, px)
+        self.qty[px] = q
+
+
+class LocalOrderBook:
+    """
+    Локальная L2-книга одного символа, собранная из REST-снимка /api/v3/depth
+    и diff-стрима <symbol>@depth@100ms по правилам Binance:
+      - события с u <= lastUpdateId снимка отбрасываются,
+      - первое применяемое событие должно покрывать lastUpdateId + 1 (U <= lid+1 <= u),
+      - каждое следующее начинается ровно с предыдущего u + 1, иначе BookGap.
+    Лучшие цены читаются за O(1), top-N — за O(N).
+    """
+
+    def __init__(self, symbol: str) -> None:
+        self.symbol = symbol.upper()
+        self.last_update_id = 0
+        self.synced = False
+        self.ts = 0
+        self.resyncs = 0
+        self._bids = _Side()
+        self._asks = _Side()
+
+    # ----------------- загрузка / применение -----------------
+    def load_snapshot(self, last_update_id: int, bids: Iterable[Any], asks: Iterable[Any]) -> None:
+        self._bids.clear()
+        self._asks.clear()
+        for px, q, *_ in bids:
+            self._bids.set(float(px), float(q))
+        for px, q, *_ in asks:
+            self._asks.set(float(px), float(q))
+        self.last_update_id = int(last_update_id)
+        self.synced = False
+
+    def apply_diff(self, evt: Dict[str, Any]) -> bool:
+        """Применить depthUpdate. False — событие устарело, BookGap — разрыв."""
+        first = int(evt["U"])
+        last = int(evt["u"])
+        if last <= self.last_update_id:
+            return False
+        expected = self.last_update_id + 1
+        if self.synced:
+            if first != expected:
+                # уровни уже неверны: до нового снимка книга не считается синхронной
+                self.synced = False
+                raise BookGap(f"{self.symbol}: expected U={expected}, got U={first}")
+        elif first > expected:
+            raise BookGap(f"{self.symbol}: snapshot {self.last_update_id} is older than diff U={first}")
+
+        for px, q, *_ in evt.get("b") or ():
+            self._bids.set(float(px), float(q))
+        for px, q, *_ in evt.get("a") or ():
+            self._asks.set(float(px), float(q))
+        self.last_update_id = last
+        self.ts = int(evt.get("E") or 0)
+        self.synced = True
+        return True
+
+    # ----------------- чтение -----------------
+    def best_bid(self) -> Optional[Level]:
+        prices = self._bids.prices
+        if not prices:
+            return None
+        px = prices[-1]
+        return px, self._bids.qty[px]
+
+    def best_ask(self) -> Optional[Level]:
+        prices = self._asks.prices
+        if not prices:
+            return None
+        px = prices[0]
+        return px, self._asks.qty[px]
+
+    def top(self, n: int = 10) -> Tuple[List[Level], List[Level]]:
+        bq = self._bids.qty
+        aq = self._asks.qty
+        bids = [(px, bq[px]) for px in reversed(self._bids.prices[-n:])] if n > 0 else []
+        asks = [(px, aq[px]) for px in self._asks.prices[:n]]
+        return bids, asks
+
+    def __len__(self) -> int:
+        return len(self._bids.prices) + len(self._asks.prices)
+
+
+class LocalBookManager:
+    """
+    Держит локальные книги для набора символов поверх SimpleBinanceSocketManager
+    и REST-клиента с методом get_depth(symbol, limit). Каждый символ
+    синхронизируется своей задачей, поэтому разрыв последовательности
+    пересинхронизирует только затронутый символ.
+    """
+
+    def __init__(
+            self,
+            bm: Any,
+            rest: Any,
+            depth_limit: int = 1000,
+            on_update: Optional[Callable[[LocalOrderBook], Any]] = None,
+    ) -> None:
+        self._bm = bm
+        self._rest = rest
+        self.depth_limit = depth_limit
+        self._on_update = on_update
+        self._books: Dict[str, LocalOrderBook] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def book(self, symbol: str) -> Optional[LocalOrderBook]:
+        return self._books.get(symbol.upper())
+
+    def track(self, symbol: str) -> LocalOrderBook:
+        sym = symbol.upper()
+        book = self._books.get(sym)
+        if book is None:
+            book = self._books[sym] = LocalOrderBook(sym)
+            self._tasks[sym] = asyncio.create_task(self._run(book))
+        return book
+
+    async def untrack(self, symbol: str) -> None:
+        sym = symbol.upper()
+        task = self._tasks.pop(sym, None)
+        self._books.pop(sym, None)
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def close(self) -> None:
+        for sym in list(self._tasks):
+            await self.untrack(sym)
+
+    async def _resync(self, book: LocalOrderBook) -> None:
+        attempt = 0
+        while True:
+            try:
+                snap = await self._rest.get_depth(book.symbol, limit=self.depth_limit)
+                book.load_snapshot(snap["lastUpdateId"], snap.get("bids") or [], snap.get("asks") or [])
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                attempt += 1
+                logger.warning("depth snapshot %s failed: %s", book.symbol, e)
+                await asyncio.sleep(min(30.0, 0.5 * (2 ** min(attempt, 6))))
+
+    async def _run(self, book: LocalOrderBook) -> None:
+        # стрим открываем до снимка: diff-события копятся в очереди читателя
+        async with self._bm.depth_socket(book.symbol, interval="100ms") as stream:
+            while True:
+                await self._resync(book)
+                try:
+                    while True:
+                        evt = await stream.recv()
+                        if not isinstance(evt, dict) or "u" not in evt:
+                            continue
+                        if book.apply_diff(evt) and self._on_update is not None:
+                            try:
+                                self._on_update(book)
+                            except Exception:
+                                logger.exception("local book on_update failed")
+                except BookGap as e:
+                    book.resyncs += 1
+                    logger.info("depth gap, resync: %s", e)
@@ -4,15 +4,17 @@ import time
 import math
 import random
 import logging
-from dataclasses import dataclass
-from typing import Any, Dict, Optional, List
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, List
 
 from .base_strategy import BaseStrategy
+from .timers import TimerHandle, TimerScheduler
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class PaperOrder:
     id: str
     side: str           # 'BUY' | 'SELL'
@@ -22,6 +24,7 @@ class PaperOrder:
     expires_at: float   # отмена по таймауту
     status: str = "NEW" # NEW | FILLED | CANCELED
     filled_qty: float = 0.0
+    timer: Optional[TimerHandle] = field(default=None, repr=False, compare=False)
 
 
 class MarketMakerStrategy(BaseStrategy):
@@ -46,6 +49,9 @@ class MarketMakerStrategy(BaseStrategy):
         strat = ((self.cfg.get("strategy") or {}).get("market_maker") or {})
         self.symbol: str = str(strat.get("symbol") or "BNBUSDT").upper()
         self.loop_sleep: float = float(strat.get("loop_sleep", 0.2))
+        # event_driven: шаг на каждое обновление bookTicker, step() остаётся только для таймеров
+        self.event_driven: bool = bool(strat.get("event_driven", False))
+        self.min_step_interval: float = max(0.0, float(strat.get("min_step_interval", 0.0)))
 
         # Параметры стратегии
         self.quote_size: float     = float(strat.get("quote_size", 10.0))   # USDT на сделку
@@ -65,9 +71,15 @@ class MarketMakerStrategy(BaseStrategy):
         self.best_bid: Optional[float] = None
         self.best_ask: Optional[float] = None
         self._last_reorder_ts: float = 0.0
+        self._quoted_book: tuple = (None, None)
 
-        # бумажные ордера в shadow
+        # бумажные ордера в shadow: в orders только живые (NEW), по сторонам — в порядке
+        # постановки; исполненные и отменённые уходят в ограниченный архив
         self.orders: Dict[str, PaperOrder] = {}
+        self._open: Dict[str, Dict[str, PaperOrder]] = {"BUY": {}, "SELL": {}}
+        self.order_archive: Deque[PaperOrder] = deque(maxlen=max(0, int(strat.get("order_archive", 1000))))
+        # таймауты ордеров; с настоящими часами срабатывают сами, в реплее — из шагов
+        self.timers = TimerScheduler(clock=self._now, autorun=getattr(client_wrapper, "clock", None) is None)
         self._id_seq = 1
 
         # метрики
@@ -77,11 +89,18 @@ class MarketMakerStrategy(BaseStrategy):
         self.orders_filled = 0
         self.orders_expired = 0
 
-        # границы точности (на глаз, чтобы без обмена exchangeInfo)
+        # границы точности: по умолчанию на глаз, в start() — из exchangeInfo, если клиент его даёт
         self._qty_step = 1e-6
         self._price_step = 1e-2  # 0.01$ для USDT-пар по умолчанию
+        self._symbol_info = None
 
         self._book_task: Optional[asyncio.Task] = None
+        self._step_task: Optional[asyncio.Task] = None
+        self._book_event: Optional[asyncio.Event] = None
+        self._last_step_ts: float = float("-inf")
+        self._step_deferred = False
+        self.event_steps = 0
+        self.coalesced = 0
 
         # позиция
         self.position: float = 0.0
@@ -94,50 +113,86 @@ class MarketMakerStrategy(BaseStrategy):
         self._log(
             f"MM start for {self.symbol} (shadow={getattr(self.client_wrap, 'shadow', False)})"
         )
+        await self._load_symbol_filters()
+        if self.event_driven:
+            self._book_event = asyncio.Event()
+            self._step_task = asyncio.create_task(self._event_step_loop())
         self._book_task = asyncio.create_task(self._book_ticker_loop())
 
+    async def _load_symbol_filters(self) -> None:
+        registry = getattr(self.client_wrap, "symbols", None)
+        if registry is None:
+            return
+        try:
+            await registry.ensure()
+        except Exception as e:
+            self._log(f"exchangeInfo unavailable, default steps kept: {e}")
+            return
+        rec = registry.get(self.symbol)
+        if rec is None:
+            self._log(f"{self.symbol} not in exchangeInfo, default steps kept")
+            return
+        self._symbol_info = rec
+        if rec.tick_size > 0:
+            self._price_step = rec.tick_size
+        if rec.step_size > 0:
+            self._qty_step = rec.step_size
+
     async def stop(self) -> None:
-        if self._book_task:
-            self._book_task.cancel()
-            try:
-                await self._book_task
-            except asyncio.CancelledError:
-                pass
-            self._book_task = None
+        for name in ("_book_task", "_step_task"):
+            task = getattr(self, name)
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                setattr(self, name, None)
+        self._book_event = None
+        await self.timers.stop()
 
     async def step(self) -> None:
+        if self._book_event is not None:
+            if self._step_deferred and self._now() - self._last_step_ts >= self.min_step_interval:
+                # отложенный в реплее шаг по рынку — время до него дошло
+                await self._event_step()
+                return
+            # рынок уже обработан по событиям — здесь только таймеры
+            if self.best_bid is not None and self.best_ask is not None:
+                self._run_timers()
+            return
         await self._step_once()
 
     # ----------------- утилиты -----------------
     def _now(self) -> float:
-        return time.time()
+        # в реплее время задаёт виртуальный clock клиента
+        clock = getattr(self.client_wrap, "clock", None)
+        return clock() if clock is not None else time.time()
 
     def _log(self, msg: str):
         # человекочитаемые логи в UI
         self._emit({"type": "diag", "text": f"MM: {msg}"})
 
     def _emit(self, evt: Dict[str, Any]):
-        # единая точка публикации
+        # единая точка публикации; EventProducer конвейера принимает событие
+        # синхронно, задача создаётся только под корутину старого async-колбэка
         try:
-            cb = self.events_cb
-            if asyncio.iscoroutinefunction(cb):
-                asyncio.create_task(cb(evt))
-            else:
-                # on_event в state умеет и sync dict
-                asyncio.create_task(self.events_cb(evt))  # type: ignore
+            res = self.events_cb(evt)
+            if asyncio.iscoroutine(res):
+                asyncio.create_task(res)
         except Exception:
-            # бэкап: не падать, хотя бы синхронно
-            try:
-                self.events_cb(evt)
-            except Exception:
-                logger.exception("Fallback events_cb execution failed")
+            logger.exception("events_cb failed")
 
     # округление под шаги
     def _round_price(self, p: float) -> float:
+        if self._symbol_info is not None:
+            return self._symbol_info.round_price(p)
         step = self._price_step
         return math.floor(p / step) * step
 
     def _round_qty(self, q: float) -> float:
+        if self._symbol_info is not None:
+            return self._symbol_info.round_qty(q)
         step = self._qty_step
         return math.floor(q / step) * step
 
@@ -175,6 +230,11 @@ class MarketMakerStrategy(BaseStrategy):
                         except Exception:
                             logger.exception("Failed to parse best ask")
                     self.ticks_total += 1
+                    if self._book_event is not None:
+                        # шаг ещё не успел забрать прошлое обновление — склеиваем
+                        if self._book_event.is_set():
+                            self.coalesced += 1
+                        self._book_event.set()
                     # ретранслируем в UI (не обязательно, но полезно)
                     self._emit({"type": "market", "symbol": sym, "bestBid": self.best_bid, "bestAsk": self.best_ask, "ts": msg.get("E") or int(self._now()*1000)})
         except asyncio.CancelledError:
@@ -185,6 +245,36 @@ class MarketMakerStrategy(BaseStrategy):
             await asyncio.sleep(1.0)
             asyncio.create_task(self._book_ticker_loop())
 
+    async def _event_step_loop(self):
+        """
+        Шаг стратегии по обновлениям bookTicker. Обновления, пришедшие, пока шаг
+        выполняется или выдерживается min_step_interval, сливаются в один шаг
+        по последним ценам.
+        """
+        ev = self._book_event
+        while True:
+            await ev.wait()
+            wait = self._last_step_ts + self.min_step_interval - self._now()
+            if wait > 0:
+                if getattr(self.client_wrap, "clock", None) is not None:
+                    # время виртуальное (реплей): ждать его в реальном времени нельзя —
+                    # шаг сделает следующее обновление или step(), когда время дойдёт
+                    ev.clear()
+                    self._step_deferred = True
+                    continue
+                await asyncio.sleep(wait)
+            ev.clear()
+            await self._event_step()
+
+    async def _event_step(self):
+        self._step_deferred = False
+        try:
+            await self._step_once()
+        except Exception:
+            logger.exception("MM event step failed")
+        self._last_step_ts = self._now()
+        self.event_steps += 1
+
     async def _step_once(self):
         # нет котировок — нечего делать
         if self.best_bid is None or self.best_ask is None:
@@ -198,17 +288,23 @@ class MarketMakerStrategy(BaseStrategy):
         # симулируем исполнение открытых ордеров по лучшим ценам
         self._try_fill_by_touch()
 
+        # в событийном режиме котировки следуют за рынком сразу, а не по таймеру
+        book = (self.best_bid, self.best_ask)
+        self._run_timers(reseed=self._book_event is not None and book != self._quoted_book)
+
+    def _run_timers(self, reseed: bool = False):
         # отменить протухшие
         self._cancel_expired()
 
-        # переустановить ордера периодически или если сдвинулся мид
+        # переустановить ордера периодически или если сдвинулся рынок
         now = self._now()
-        if now - self._last_reorder_ts >= max(0.3, self.reorder_interval):
+        if reseed or now - self._last_reorder_ts >= max(0.3, self.reorder_interval):
             self._reseed_quotes()
             self._last_reorder_ts = now
+            self._quoted_book = (self.best_bid, self.best_ask)
 
         # обновить метрики
-        self.orders_active = sum(1 for o in self.orders.values() if o.status == "NEW")
+        self.orders_active = len(self.orders)
 
     # ----------------- логика котирования -----------------
     def _reseed_quotes(self):
@@ -221,8 +317,7 @@ class MarketMakerStrategy(BaseStrategy):
         threshold = max(0.001, self.min_spread_pct)
         if self.aggressive_take and spread_pct < threshold:
             for o in list(self.orders.values()):
-                if o.status == "NEW":
-                    self._cancel(o, reason="aggressive")
+                self._cancel(o, reason="aggressive")
             agg_quote = self.quote_size * max(self.aggressive_bps, 0.0) / 10000.0
             if agg_quote > 0:
                 qty_buy = self._round_qty(agg_quote / max(ask, 1e-9))
@@ -272,12 +367,20 @@ class MarketMakerStrategy(BaseStrategy):
         }})
 
     def _find_open(self, side: str) -> Optional[PaperOrder]:
-        # выбираем «самый свежий» активный ордер нужной стороны
-        cand = [o for o in self.orders.values() if o.status == "NEW" and o.side == side]
-        if not cand:
+        # «самый свежий» активный ордер нужной стороны — последний поставленный
+        book = self._open.get(side)
+        if not book:
             return None
-        cand.sort(key=lambda o: o.ts_new, reverse=True)
-        return cand[0]
+        return next(reversed(book.values()))
+
+    def _retire(self, po: PaperOrder) -> None:
+        # ордер перешёл в FILLED/CANCELED: из живых — в архив
+        self.orders.pop(po.id, None)
+        self._open.get(po.side, {}).pop(po.id, None)
+        if po.timer is not None:
+            po.timer.cancel()
+            po.timer = None
+        self.order_archive.append(po)
 
     def _upsert_one(self, side: str, price: float, qty: float):
         if qty <= 0: return
@@ -310,6 +413,8 @@ class MarketMakerStrategy(BaseStrategy):
             ts_new=now, expires_at=now + float(self.cancel_timeout)
         )
         self.orders[oid] = po
+        self._open.setdefault(side, {})[oid] = po
+        po.timer = self.timers.call_at(po.expires_at, self._expire, po)
         self.orders_total += 1
 
         self._emit({
@@ -324,6 +429,7 @@ class MarketMakerStrategy(BaseStrategy):
         if po.status != "NEW":
             return
         po.status = "CANCELED"
+        self._retire(po)
         now = self._now()
         self._emit({
             "type": "order_event", "evt": "CANCELED",
@@ -334,10 +440,14 @@ class MarketMakerStrategy(BaseStrategy):
         self._log(f"cancel {po.side} {po.qty} @ {po.price} ({reason})")
 
     def _cancel_expired(self):
-        now = self._now()
-        for po in list(self.orders.values()):
-            if po.status == "NEW" and now >= po.expires_at:
-                self._cancel(po, reason="timeout")
+        # только наступившие сроки, без обхода всех ордеров
+        self.timers.run_due(self._now())
+
+    def _expire(self, po: PaperOrder):
+        po.timer = None
+        if po.status == "NEW":
+            self.orders_expired += 1
+            self._cancel(po, reason="timeout")
 
     def _try_fill_by_touch(self):
         """
@@ -351,17 +461,15 @@ class MarketMakerStrategy(BaseStrategy):
             return
         now = self._now()
 
-        for po in list(self.orders.values()):
-            if po.status != "NEW":
-                continue
-            if po.side == "BUY" and a <= po.price:
-                self._fill(po, px=po.price, ts=now)
-            elif po.side == "SELL" and b >= po.price:
-                self._fill(po, px=po.price, ts=now)
+        for po in [o for o in self._open["BUY"].values() if a <= o.price]:
+            self._fill(po, px=po.price, ts=now)
+        for po in [o for o in self._open["SELL"].values() if b >= o.price]:
+            self._fill(po, px=po.price, ts=now)
 
     def _fill(self, po: PaperOrder, px: float, ts: float):
         po.status = "FILLED"
         po.filled_qty = po.qty
+        self._retire(po)
         self.orders_filled += 1
 
         # ордер-событие
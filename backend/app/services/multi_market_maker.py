@@ -0,0 +1,414 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .base_strategy import BaseStrategy
+
+logger = logging.getLogger(__name__)
+
+BUY, SELL = 0, 1
+_SIDES = ("BUY", "SELL")
+
+
+class MultiSymbolMarketMaker(BaseStrategy):
+    """
+    Тот же бумажный маркет-мейкер, что MarketMakerStrategy, но на N символов
+    в одном экземпляре:
+      - один multiplex-сокет <sym>@bookTicker на все символы вместо сокета и
+        задачи на каждый;
+      - состояние котирования — массивы numpy по символам (лучшие цены,
+        позиция, кэш, по одной лимитке на сторону);
+      - step() одним проходом исполняет касания, снимает протухшие ордера и
+        пересчитывает котировки только у символов, где сдвинулся рынок или
+        подошёл reorder_interval.
+
+    Позиция и капитал ведутся по каждому символу отдельно: paper_cash делится
+    поровну между символами. Риск-менеджеру после исполнений уходит сводная
+    позиция (см. _report_risk), покупки проверяются через state.check_risk. Параметры — из strategy.market_maker, список
+    символов — strategy.market_maker.symbols.
+    """
+
+    def __init__(self, cfg: Dict[str, Any], client_wrapper: Any, events_cb):
+        super().__init__(cfg or {}, client_wrapper, events_cb)
+
+        strat = ((self.cfg.get("strategy") or {}).get("market_maker") or {})
+        syms = strat.get("symbols") or [strat.get("symbol") or "BNBUSDT"]
+        self.symbols: List[str] = list(dict.fromkeys(str(s).upper() for s in syms))
+        self.index: Dict[str, int] = {s: i for i, s in enumerate(self.symbols)}
+        n = len(self.symbols)
+
+        self.loop_sleep: float = float(strat.get("loop_sleep", 0.2))
+        self.event_driven: bool = bool(strat.get("event_driven", False))
+        self.min_step_interval: float = max(0.0, float(strat.get("min_step_interval", 0.0)))
+        self.quote_size: float = float(strat.get("quote_size", 10.0))
+        self.capital_usage: float = max(0.0, min(1.0, float(strat.get("capital_usage", 1.0))))
+        self.min_spread_pct: float = float(strat.get("min_spread_pct", 0.0))
+        self.cancel_timeout: float = float(strat.get("cancel_timeout", 10.0))
+        self.reorder_interval: float = float(strat.get("reorder_interval", 1.0))
+        self.inventory_target: float = float(strat.get("inventory_target", 0.5))
+        self.inventory_tolerance: float = float(strat.get("inventory_tolerance", 0.5))
+
+        # рынок
+        self.bid = np.full(n, np.nan)
+        self.ask = np.full(n, np.nan)
+        self.dirty = np.zeros(n, dtype=bool)
+        # точность: по умолчанию как у MarketMakerStrategy, в start() — из exchangeInfo
+        self.price_step = np.full(n, 1e-2)
+        self.qty_step = np.full(n, 1e-6)
+        # позиция и капитал по символам
+        self.cash = np.full(n, float(strat.get("paper_cash", 0.0)) / max(n, 1))
+        self.position = np.zeros(n)
+        self.avg_entry = np.zeros(n)
+        self.inventory_ratio = np.zeros(n)
+        self.funds_in_use = np.zeros(n)
+        # одна лимитка на сторону: [символ, BUY|SELL]; id == 0 — ордера нет
+        self.order_id = np.zeros((n, 2), dtype=np.int64)
+        self.order_px = np.zeros((n, 2))
+        self.order_qty = np.zeros((n, 2))
+        self.order_ts = np.zeros((n, 2))
+        self.order_expires = np.full((n, 2), np.inf)
+        self.last_reorder = np.full(n, -np.inf)
+
+        self._id_seq = 1
+        self._book_task: Optional[asyncio.Task] = None
+        self._step_task: Optional[asyncio.Task] = None
+        self._book_event: Optional[asyncio.Event] = None
+        self._last_step_ts: float = float("-inf")
+        self._step_deferred = False
+
+        # метрики
+        self.ticks_total = 0
+        self.orders_total = 0
+        self.orders_filled = 0
+        self.orders_expired = 0
+        self.event_steps = 0
+
+    # ----------------- жизненный цикл -----------------
+    async def start(self) -> None:
+        self._log(f"MM start for {len(self.symbols)} symbols (shadow={getattr(self.client_wrap, 'shadow', False)})")
+        await self._load_symbol_filters()
+        if self.event_driven:
+            self._book_event = asyncio.Event()
+            self._step_task = asyncio.create_task(self._event_step_loop())
+        self._book_task = asyncio.create_task(self._book_ticker_loop())
+
+    async def _load_symbol_filters(self) -> None:
+        registry = getattr(self.client_wrap, "symbols", None)
+        if registry is None:
+            return
+        try:
+            await registry.ensure()
+        except Exception as e:
+            self._log(f"exchangeInfo unavailable, default steps kept: {e}")
+            return
+        for sym, i in self.index.items():
+            rec = registry.get(sym)
+            if rec is None:
+                self._log(f"{sym} not in exchangeInfo, default steps kept")
+                continue
+            if rec.tick_size > 0:
+                self.price_step[i] = rec.tick_size
+            if rec.step_size > 0:
+                self.qty_step[i] = rec.step_size
+
+    async def stop(self) -> None:
+        for name in ("_book_task", "_step_task"):
+            task = getattr(self, name)
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                setattr(self, name, None)
+        self._book_event = None
+
+    async def step(self) -> None:
+        # шаг и так обходит все изменившиеся символы — отложенный событийный шаг в нём же
+        self._step_deferred = False
+        self._step_once()
+
+    # ----------------- утилиты -----------------
+    def _now(self) -> float:
+        clock = getattr(self.client_wrap, "clock", None)
+        return clock() if clock is not None else time.time()
+
+    def _log(self, msg: str):
+        self._emit({"type": "diag", "text": f"MM: {msg}"})
+
+    def _emit(self, evt: Dict[str, Any]):
+        try:
+            res = self.events_cb(evt)
+            if asyncio.iscoroutine(res):
+                asyncio.create_task(res)
+        except Exception:
+            logger.exception("events_cb failed")
+
+    def _oid(self, seq: int) -> str:
+        return f"P{seq:08d}"
+
+    @staticmethod
+    def _floor_to(x: np.ndarray, step: np.ndarray) -> np.ndarray:
+        # вниз к шагу; round(…, 10) убирает хвосты вида 0.30000000000000004
+        return np.round(np.floor(x / step + 1e-9) * step, 10)
+
+    # ----------------- источник рынка -----------------
+    async def _book_ticker_loop(self):
+        while not getattr(self.client_wrap, "bm", None):
+            await asyncio.sleep(0.2)
+
+        streams = [f"{s.lower()}@bookTicker" for s in self.symbols]
+        self._log(f"subscribe bookTicker x{len(streams)}")
+        try:
+            async with self.client_wrap.bm.multiplex_socket(streams) as stream:
+                while True:
+                    msg = await stream.recv()
+                    data = msg.get("data") if isinstance(msg, dict) else None
+                    if isinstance(data, dict):
+                        self.on_book_ticker(data)
+        except asyncio.CancelledError:
+            self._log("bookTicker cancelled")
+            raise
+        except Exception as e:
+            self._log(f"bookTicker error: {e!s}")
+            await asyncio.sleep(1.0)
+            self._book_task = asyncio.create_task(self._book_ticker_loop())
+
+    def on_book_ticker(self, msg: Dict[str, Any]) -> None:
+        i = self.index.get(str(msg.get("s") or "").upper())
+        if i is None:
+            return
+        try:
+            bid = float(msg["b"])
+            ask = float(msg["a"])
+        except (KeyError, TypeError, ValueError):
+            logger.debug("malformed bookTicker %r", msg)
+            return
+        self.ticks_total += 1
+        if bid != self.bid[i] or ask != self.ask[i]:
+            self.bid[i] = bid
+            self.ask[i] = ask
+            self.dirty[i] = True
+            if self._book_event is not None:
+                self._book_event.set()
+
+    async def _event_step_loop(self):
+        # как у MarketMakerStrategy: обновления, пришедшие во время шага, сливаются в один
+        ev = self._book_event
+        while True:
+            await ev.wait()
+            wait = self._last_step_ts + self.min_step_interval - self._now()
+            if wait > 0:
+                if getattr(self.client_wrap, "clock", None) is not None:
+                    # время виртуальное (реплей): ждать его в реальном времени нельзя —
+                    # шаг сделает следующее обновление или step(), когда время дойдёт
+                    ev.clear()
+                    self._step_deferred = True
+                    continue
+                await asyncio.sleep(wait)
+            ev.clear()
+            await self._event_step()
+
+    async def _event_step(self):
+        self._step_deferred = False
+        try:
+            self._step_once()
+        except Exception:
+            logger.exception("MM event step failed")
+        self._last_step_ts = self._now()
+        self.event_steps += 1
+
+    # ----------------- шаг -----------------
+    def _step_once(self):
+        quoted = ~(np.isnan(self.bid) | np.isnan(self.ask))
+        if not quoted.any():
+            return
+        now = self._now()
+        self._fill_by_touch(now)
+        self._cancel_expired(now)
+
+        interval = max(0.3, self.reorder_interval)
+        due = quoted & (self.dirty | (now - self.last_reorder >= interval))
+        idx = np.flatnonzero(due)
+        self.dirty[:] = False
+        if idx.size:
+            self._reseed(idx, now)
+            self.last_reorder[idx] = now
+
+    @property
+    def orders_active(self) -> int:
+        return int(np.count_nonzero(self.order_id))
+
+    def _fill_by_touch(self, now: float):
+        live = self.order_id != 0
+        buy = np.flatnonzero(live[:, BUY] & (self.ask <= self.order_px[:, BUY]))
+        sell = np.flatnonzero(live[:, SELL] & (self.bid >= self.order_px[:, SELL]))
+        if not (buy.size or sell.size):
+            return
+
+        # учёт позиции и кэша — сразу по всем исполненным
+        px, qty = self.order_px[buy, BUY], self.order_qty[buy, BUY]
+        cost = self.avg_entry[buy] * self.position[buy] + px * qty
+        self.position[buy] += qty
+        self.cash[buy] -= px * qty
+        self.avg_entry[buy] = np.where(self.position[buy] > 0, cost / np.maximum(self.position[buy], 1e-18),
+                                       self.avg_entry[buy])
+
+        px_s, qty_s = self.order_px[sell, SELL], self.order_qty[sell, SELL]
+        self.position[sell] -= qty_s
+        self.cash[sell] += px_s * qty_s
+        flat = sell[self.position[sell] <= 0]
+        self.position[flat] = 0.0
+        self.avg_entry[flat] = 0.0
+
+        ts = int(now * 1000)
+        for side, rows in ((BUY, buy), (SELL, sell)):
+            for i in rows.tolist():
+                self._emit_fill(i, side, ts)
+        self.order_id[buy, BUY] = 0
+        self.order_id[sell, SELL] = 0
+        self.order_expires[buy, BUY] = np.inf
+        self.order_expires[sell, SELL] = np.inf
+        self.orders_filled += int(buy.size + sell.size)
+        self._report_risk()
+
+    def _report_risk(self):
+        """
+        RiskManager ведёт одну позицию, поэтому ему уходит сводная по всем
+        символам: стоимость — сумма |позиция| * mid, а цена входа подобрана так,
+        чтобы нереализованный убыток был суммой убытков по символам (прибыль
+        одного символа не гасит убыток другого).
+        """
+        state = getattr(self.client_wrap, "state", None)
+        rm = getattr(state, "risk_manager", None) if state is not None else None
+        if rm is None:
+            return
+        mark = 0.5 * (self.bid + self.ask)
+        mark = np.where(np.isnan(mark), self.avg_entry, mark)
+        qty = np.abs(self.position)
+        value = float(np.sum(qty * mark))
+        loss = float(np.sum(np.maximum(qty * self.avg_entry - qty * mark, 0.0)))
+        if value <= 0 and loss <= 0:
+            rm.on_position(0.0, 0.0, entry_price=0.0)
+        else:
+            rm.on_position(1.0, value, entry_price=value + loss)
+
+    def _emit_fill(self, i: int, side: int, ts: int):
+        oid = self._oid(int(self.order_id[i, side]))
+        sym, s = self.symbols[i], _SIDES[side]
+        px, qty = float(self.order_px[i, side]), float(self.order_qty[i, side])
+        self._emit({"type": "order_event", "evt": "FILLED", "id": oid, "symbol": sym,
+                    "side": s, "price": px, "qty": qty, "ts": ts})
+        self._emit({"type": "trade", "id": f"T{oid}", "symbol": sym, "side": s,
+                    "price": px, "qty": qty, "pnl": 0.0, "ts": ts})
+
+    def _cancel_expired(self, now: float):
+        rows, sides = np.nonzero(self.order_expires <= now)
+        for i, side in zip(rows.tolist(), sides.tolist()):
+            self.orders_expired += 1
+            self._cancel(i, side, now, reason="timeout")
+
+    def _reseed(self, idx: np.ndarray, now: float):
+        bid, ask = self.bid[idx], self.ask[idx]
+        pstep, qstep = self.price_step[idx], self.qty_step[idx]
+        mid = 0.5 * (bid + ask)
+        spread_pct = np.where(mid > 0, 100.0 * (ask - bid) / mid, 0.0)
+        threshold = max(0.001, self.min_spread_pct)
+        wide = spread_pct >= threshold
+
+        offset = np.where(
+            wide,
+            np.maximum(1, (spread_pct / 2.0) // 0.01) * pstep,
+            np.maximum(pstep, 0.5 * (ask - bid)),
+        )
+        base_val = np.maximum(self.position[idx], 0.0) * mid
+        total = base_val + np.maximum(self.cash[idx], 0.0)
+        ratio = np.where(total > 0, base_val / np.where(total > 0, total, 1.0), 0.0)
+        self.inventory_ratio[idx] = ratio
+        # перекос по инвентарю: лишняя база — дальше покупка, ближе продажа, и наоборот
+        k_buy = np.ones_like(mid)
+        k_sell = np.ones_like(mid)
+        long_ = ratio > self.inventory_target + self.inventory_tolerance
+        short_ = ratio < self.inventory_target - self.inventory_tolerance
+        k_buy[long_], k_sell[long_] = 1.5, 0.5
+        k_buy[short_], k_sell[short_] = 0.5, 1.5
+        skewed = long_ | short_
+
+        px_buy = self._floor_to(np.where(wide | skewed, mid - offset * k_buy, bid), pstep)
+        px_sell = self._floor_to(np.where(wide | skewed, mid + offset * k_sell, ask), pstep)
+
+        buy_quote = np.minimum(self.quote_size, np.maximum(self.cash[idx], 0.0) * self.capital_usage)
+        qty_buy = self._floor_to(buy_quote / np.maximum(px_buy, 1e-9), qstep)
+        avail_base = np.maximum(self.position[idx], 0.0) * self.capital_usage
+        qty_sell = self._floor_to(np.minimum(self.quote_size / np.maximum(px_sell, 1e-9), avail_base), qstep)
+
+        self.funds_in_use[idx] = qty_buy * px_buy + qty_sell * px_sell
+        for side, px, qty in ((BUY, px_buy, qty_buy), (SELL, px_sell, qty_sell)):
+            cur_id = self.order_id[idx, side]
+            same = (cur_id != 0) & (np.abs(self.order_px[idx, side] - px) < 1e-9)
+            change = np.flatnonzero((qty > 0) & ~same)
+            for j in change.tolist():
+                i = int(idx[j])
+                if self.order_id[i, side]:
+                    self._cancel(i, side, now, reason="reseed")
+                self._place(i, side, float(px[j]), float(qty[j]), now)
+
+        self._emit({"type": "status", "metrics": {
+            "funds_in_use": float(self.funds_in_use.sum()),
+            "funds_reserve": float(max(self.equity() - self.funds_in_use.sum(), 0.0)),
+        }})
+
+    # ----------------- бумажный брокер -----------------
+    def _place(self, i: int, side: int, price: float, qty: float, now: float):
+        sym = self.symbols[i]
+        if side == BUY:
+            state = getattr(self.client_wrap, "state", None)
+            if state is not None:
+                allowed, reason = state.check_risk(sym)
+                if not allowed:
+                    self._log(f"{sym} buy blocked: {reason}")
+                    return
+        self._id_seq += 1
+        self.order_id[i, side] = self._id_seq
+        self.order_px[i, side] = price
+        self.order_qty[i, side] = qty
+        self.order_ts[i, side] = now
+        self.order_expires[i, side] = now + self.cancel_timeout
+        self.orders_total += 1
+        self._emit({"type": "order_event", "evt": "NEW", "id": self._oid(self._id_seq), "symbol": sym,
+                    "side": _SIDES[side], "price": price, "qty": qty, "ts": int(now * 1000)})
+
+    def _cancel(self, i: int, side: int, now: float, reason: str = "cancel"):
+        seq = int(self.order_id[i, side])
+        if not seq:
+            return
+        self.order_id[i, side] = 0
+        self.order_expires[i, side] = np.inf
+        self._emit({"type": "order_event", "evt": "CANCELED", "id": self._oid(seq), "symbol": self.symbols[i],
+                    "side": _SIDES[side], "price": float(self.order_px[i, side]),
+                    "qty": float(self.order_qty[i, side]), "reason": reason, "ts": int(now * 1000)})
+
+    # ----------------- отчёты -----------------
+    def equity(self) -> float:
+        mid = np.nan_to_num(0.5 * (self.bid + self.ask))
+        return float(np.sum(self.cash + self.position * mid))
+
+    def positions(self) -> List[Dict[str, Any]]:
+        return [
+            {"symbol": sym, "position": float(self.position[i]), "cash": float(self.cash[i]),
+             "avg_entry_price": float(self.avg_entry[i]), "inventory_ratio": float(self.inventory_ratio[i])}
+            for i, sym in enumerate(self.symbols)
+        ]
+
+    def open_orders(self) -> List[Dict[str, Any]]:
+        rows, sides = np.nonzero(self.order_id)
+        return [
+            {"id": self._oid(int(self.order_id[i, s])), "symbol": self.symbols[i], "side": _SIDES[s],
+             "price": float(self.order_px[i, s]), "qty": float(self.order_qty[i, s]),
+             "ts_new": float(self.order_ts[i, s]), "expires_at": float(self.order_expires[i, s])}
+            for i, s in zip(rows.tolist(), sides.tolist())
+        ]
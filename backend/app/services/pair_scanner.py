@@ -1,8 +1,20 @@
 from __future__ import annotations
 import asyncio
 import logging
+import time
+import weakref
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional, Protocol
+from typing import List, Dict, Any, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+from .rest_weight import Priority, rest_priority
+from .symbols import registry_for
+
+try:
+    from backend.core.indicators import mean_abs_return_rows
+except ImportError:  # запуск из каталога backend/
+    from core.indicators import mean_abs_return_rows
 
 
 class BinanceClientProtocol(Protocol):
@@ -18,6 +30,10 @@ class BinanceClientProtocol(Protocol):
     async def get_klines(self, symbol: str, interval: str, limit: int) -> List[Any]:
         ...
 
+    # необязательно: bulk-варианты (BinanceRestClient); без них сканер ходит по символам
+    # async def get_tickers(self, symbols: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]
+    # async def get_orderbook_tickers(self, symbols: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]
+
 log = logging.getLogger(__name__)
 
 @dataclass
@@ -47,26 +63,115 @@ async def _get_book(client: BinanceClientProtocol, symbol: str) -> Optional[Dict
         log.debug("bookTicker fail %s: %s", symbol, e)
         return None
 
-async def _get_klines_vol_bps(client: BinanceClientProtocol, symbol: str, bars: int) -> float:
-    if bars <= 1:
-        return 0.0
+# bulk-запросы по всем символам: по весу дешевле пачки одиночных уже с пары десятков символов
+BULK_SYMBOLS_MAX = 100
+
+
+async def _get_bulk(client: BinanceClientProtocol, method: str, symbols: Sequence[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """{symbol: row} одним запросом; None — клиент не умеет или запрос не удался (будет фолбэк по символам)."""
+    fn = getattr(client, method, None)
+    if fn is None:
+        return None
     try:
-        ks = await client.get_klines(symbol=symbol, interval="1m", limit=bars)
-        mids: List[float] = []
-        for ohlc in ks:
-            h, l, c = float(ohlc[2]), float(ohlc[3]), float(ohlc[4])
-            mids.append(0.5 * (h + l) if h > 0 and l > 0 else c)
-        if len(mids) < 2:
-            return 0.0
-        acc = 0.0
-        for i in range(1, len(mids)):
-            prev, cur = mids[i - 1], mids[i]
-            if prev > 0:
-                acc += abs(cur - prev) / prev
-        return _bps(acc / max(1, len(mids) - 1))
+        rows = await fn(symbols if len(symbols) <= BULK_SYMBOLS_MAX else None)
+    except Exception as e:
+        log.debug("%s bulk fail, falling back to per-symbol: %s", method, e)
+        return None
+    if not isinstance(rows, list):
+        return None
+    return {r["symbol"]: r for r in rows if isinstance(r, dict) and "symbol" in r}
+
+
+class KlineCache:
+    """
+    Кэш klines между сканами: (symbol, interval, limit) -> строки на ttl секунд.
+    Параллельные запросы одного ключа ждут один REST-запрос.
+    """
+
+    def __init__(self, ttl: float = 30.0, clock=time.monotonic) -> None:
+        self.ttl = ttl
+        self._clock = clock
+        self._rows: Dict[Tuple[str, str, int], Tuple[float, List[Any]]] = {}
+        self._inflight: Dict[Tuple[str, str, int], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, client: BinanceClientProtocol, symbol: str, interval: str, limit: int) -> List[Any]:
+        key = (symbol, interval, limit)
+        hit = self._rows.get(key)
+        if hit is not None and self._clock() - hit[0] < self.ttl:
+            self.hits += 1
+            return hit[1]
+        fut = self._inflight.get(key)
+        if fut is not None:
+            return await asyncio.shield(fut)
+        self.misses += 1
+        fut = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            rows = await client.get_klines(symbol=symbol, interval=interval, limit=limit)
+            self._rows[key] = (self._clock(), rows)
+            fut.set_result(rows)
+            return rows
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                fut.cancel()
+            else:
+                fut.set_exception(e)
+                fut.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+
+_kline_caches: "weakref.WeakKeyDictionary[Any, KlineCache]" = weakref.WeakKeyDictionary()
+
+
+def kline_cache_for(client: BinanceClientProtocol, ttl: float = 30.0) -> KlineCache:
+    try:
+        cache = _kline_caches.get(client)
+    except TypeError:
+        return KlineCache(ttl)
+    if cache is None:
+        cache = _kline_caches[client] = KlineCache(ttl)
+    cache.ttl = ttl
+    return cache
+
+
+async def _get_klines(client: BinanceClientProtocol, symbol: str, bars: int,
+                      cache: Optional[KlineCache] = None) -> Optional[List[Any]]:
+    try:
+        if cache is not None:
+            return await cache.get(client, symbol, "1m", bars)
+        return await client.get_klines(symbol=symbol, interval="1m", limit=bars)
     except Exception as e:
         log.debug("klines fail %s: %s", symbol, e)
-        return 0.0
+        return None
+
+
+def _klines_hlc(rows: Sequence[Any], bars: int) -> np.ndarray:
+    """(3, bars) массив high/low/close, выровненный по правому краю; нет данных — NaN."""
+    out = np.full((3, bars), np.nan)
+    if not rows:
+        return out
+    try:
+        a = np.array([r[2:5] for r in rows[-bars:]], dtype=np.float64).T
+    except (TypeError, ValueError, IndexError):
+        return out
+    out[:, bars - a.shape[1]:] = a
+    return out
+
+
+def _vol_bps_rows(klines: Sequence[Optional[Sequence[Any]]], bars: int) -> np.ndarray:
+    """Средний |Δmid|/mid по минутам, в bps, для всех символов сразу.
+
+    mid = (high + low) / 2, а если high/low не положительны — close.
+    """
+    if not klines:
+        return np.zeros(0)
+    hlc = np.stack([_klines_hlc(k, bars) for k in klines])       # (n, 3, bars)
+    h, l, c = hlc[:, 0], hlc[:, 1], hlc[:, 2]
+    mids = np.where((h > 0) & (l > 0), 0.5 * (h + l), c)
+    return _bps(mean_abs_return_rows(mids))
 
 async def _gather_limited(coros, limit: int = 20):
     sem = asyncio.Semaphore(limit)
@@ -87,94 +192,103 @@ async def _scan_impl(cfg: Dict[str, Any], client: BinanceClientProtocol) -> Dict
     vol_bars = int(sc.get("vol_bars", 0))
     w_spread = float(sc.get("score", {}).get("w_spread", 1.0))
     w_vol = float(sc.get("score", {}).get("w_vol", 0.3))
+    # bulk: 24hr и bookTicker одним запросом на этап; klines — по символам через общий кэш
+    bulk = bool(sc.get("bulk", True))
+    kline_ttl = float(sc.get("kline_ttl", 30.0))
     whitelist = sc.get("whitelist") or []
     blacklist = set(sc.get("blacklist") or [])
 
-    ex = await client.get_exchange_info()
+    # exchangeInfo — из реестра (одна загрузка на TTL), а не на каждый скан
+    registry = await registry_for(client).ensure()
     symbols = []
-    for s in ex["symbols"]:
-        try:
-            if s["status"] != "TRADING":
-                continue
-            if s.get("quoteAsset") != quote:
-                continue
-            sym = s["symbol"]
-            if whitelist and sym not in whitelist:
-                continue
-            if sym in blacklist:
-                continue
-            if s.get("isSpotTradingAllowed") is False:
-                continue
-            symbols.append(sym)
-        except Exception:
+    for rec in registry.records(quote=quote):
+        sym = rec.symbol
+        if whitelist and sym not in whitelist:
+            continue
+        if sym in blacklist:
+            continue
+        if not rec.spot_allowed:
             continue
+        symbols.append(sym)
 
     if not symbols:
         raise RuntimeError("Scanner: no candidates (filters too strict?)")
 
     symbols = symbols[: max_pairs * 2]
-    t24s = await _gather_limited([_get_24h(client, s) for s in symbols], limit=20)
-    vols = {}
-    for s, t in zip(symbols, t24s):
+    t24_map = await _get_bulk(client, "get_tickers", symbols) if bulk else None
+    if t24_map is None:
+        t24s = await _gather_limited([_get_24h(client, s) for s in symbols], limit=20)
+        t24_map = dict(zip(symbols, t24s))
+    syms: List[str] = []
+    qv_list: List[float] = []
+    lp_list: List[float] = []
+    for s in symbols:
+        t = t24_map.get(s)
         if not isinstance(t, dict):
             continue
         try:
-            qv = float(t.get("quoteVolume") or 0.0)
-            lp = float(t.get("lastPrice") or 0.0)
-            if lp >= min_price and qv >= min_vol_usdt:
-                vols[s] = qv
-        except Exception:
+            qv, lp = float(t.get("quoteVolume") or 0.0), float(t.get("lastPrice") or 0.0)
+        except (TypeError, ValueError):
             log.exception("Failed to process volume info for %s", s)
-
-    top_syms = [kv[0] for kv in sorted(vols.items(), key=lambda kv: kv[1], reverse=True)[:top_by_volume]]
+            continue
+        syms.append(s); qv_list.append(qv); lp_list.append(lp)
+    qv_arr = np.array(qv_list)
+    keep = np.flatnonzero((np.array(lp_list) >= min_price) & (qv_arr >= min_vol_usdt))
+    # по убыванию объёма; при равенстве — в исходном порядке
+    keep = keep[np.argsort(-qv_arr[keep], kind="stable")][:top_by_volume]
+    top_syms = [syms[i] for i in keep]
+    top_qv = qv_arr[keep]
     if not top_syms:
         raise RuntimeError("Scanner: no pairs with lastPrice/volume thresholds")
 
-    books = await _gather_limited([_get_book(client, s) for s in top_syms], limit=30)
-    candidates = []
-    for s, b in zip(top_syms, books):
+    book_map = await _get_bulk(client, "get_orderbook_tickers", top_syms) if bulk else None
+    if book_map is None:
+        books = await _gather_limited([_get_book(client, s) for s in top_syms], limit=30)
+        book_map = dict(zip(top_syms, books))
+    bid = np.full(len(top_syms), np.nan)
+    ask = np.full(len(top_syms), np.nan)
+    for i, s in enumerate(top_syms):
+        b = book_map.get(s)
         if not isinstance(b, dict):
             continue
         try:
-            bid = float(b["bidPrice"]); ask = float(b["askPrice"])
-            if bid <= 0 or ask <= 0 or ask <= bid:
-                continue
-            spread_bps = _bps((ask - bid) / bid)
-            if spread_bps < min_spread_bps:
-                continue
-            candidates.append((s, bid, ask, spread_bps, vols.get(s, 0.0)))
-        except Exception:
+            bid[i] = float(b["bidPrice"]); ask[i] = float(b["askPrice"])
+        except (KeyError, TypeError, ValueError):
             continue
-
-    if not candidates:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spread_bps = _bps((ask - bid) / bid)
+        ok = (bid > 0) & (ask > 0) & (ask > bid) & (spread_bps >= min_spread_bps)
+    idx = np.flatnonzero(ok)
+    if not len(idx):
         raise RuntimeError("Scanner: no pairs with spread >= min_spread_bps")
+    cand = [top_syms[i] for i in idx]
+    bid, ask, spread_bps, qv_c = bid[idx], ask[idx], spread_bps[idx], top_qv[idx]
 
-    vol_bps_map = {s: 0.0 for s, *_ in candidates}
+    vol_bps = np.zeros(len(cand))
     if vol_bars > 1:
-        vols2 = await _gather_limited([_get_klines_vol_bps(client, s, vol_bars) for s, *_ in candidates], limit=10)
-        for (s, *_), vb in zip(candidates, vols2):
-            try:
-                vol_bps_map[s] = float(vb) if vb and vb == vb else 0.0
-            except Exception:
-                vol_bps_map[s] = 0.0
-
-    scored: List[PairScore] = []
-    for (s, bid, ask, spr_bps, qv) in candidates:
-        vb = vol_bps_map.get(s, 0.0)
-        score = w_spread * spr_bps + w_vol * vb
-        scored.append(PairScore(symbol=s, bid=bid, ask=ask, spread_bps=spr_bps,
-                                vol_usdt_24h=qv, vol_bps_1m=vb, score=score))
-    scored.sort(key=lambda x: x.score, reverse=True)
-    best = scored[0]
-    top_list = [x.__dict__ for x in scored[:10]]
-    return {"best": best.__dict__, "top": top_list}
+        kcache = kline_cache_for(client, kline_ttl)
+        klines = await _gather_limited([_get_klines(client, s, vol_bars, kcache) for s in cand], limit=10)
+        vol_bps = _vol_bps_rows([k if isinstance(k, list) else None for k in klines], vol_bars)
+
+    score = w_spread * spread_bps + w_vol * vol_bps
+    k = min(10, len(cand))
+    top_idx = np.argpartition(-score, k - 1)[:k] if k < len(cand) else np.arange(len(cand))
+    top_idx = top_idx[np.argsort(-score[top_idx], kind="stable")]
+    top_list = [
+        PairScore(symbol=cand[i], bid=float(bid[i]), ask=float(ask[i]), spread_bps=float(spread_bps[i]),
+                  vol_usdt_24h=float(qv_c[i]), vol_bps_1m=float(vol_bps[i]), score=float(score[i])).__dict__
+        for i in top_idx
+    ]
+    return {"best": top_list[0], "top": top_list}
 
 async def scan_best_symbol(cfg: Dict[str, Any], client: BinanceClientProtocol) -> Dict[str, Any]:
-    return await _scan_impl(cfg, client)
+    # сканер — самый низкий приоритет по весу REST: уступает ордерам и рыночным данным
+    with rest_priority(Priority.SCANNER):
+        return await _scan_impl(cfg, client)
 
 class PairScanner:
     def __init__(self, cfg: Dict[str, Any], client: BinanceClientProtocol):
         self.cfg = cfg; self.client = client
 
     async def pick_best(self) -> Dict[str, Any]:
-        return await _scan_impl(self.cfg, self.client)
+        return await scan_best_symbol(self.cfg, self.client)
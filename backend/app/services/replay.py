@@ -0,0 +1,264 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from .binance_client import SimpleBinanceSocketManager, _WSContext
+from .shadow_executor import ShadowExecutor
+
+try:
+    from backend.core import json_codec
+    from backend.core.recorder import CaptureReader, CapturedFrame
+except ImportError:  # запуск из каталога backend/
+    from core import json_codec
+    from core.recorder import CaptureReader, CapturedFrame
+
+logger = logging.getLogger(__name__)
+
+Tap = Callable[[str, Any], Any]
+
+
+class VirtualClock:
+    """Виртуальные часы реплея: секунды epoch, как time.time(), но двигает их реплей."""
+    __slots__ = ("_t",)
+
+    def __init__(self, start: float = 0.0) -> None:
+        self._t = float(start)
+
+    def __call__(self) -> float:
+        return self._t
+
+    def time(self) -> float:
+        return self._t
+
+    def set(self, t: float) -> None:
+        # время не идёт назад, даже если кадры в записи чуть перемешаны
+        if t > self._t:
+            self._t = t
+
+
+def _decode(raw: bytes) -> Any:
+    msg = json_codec.loads(raw)
+    # кадры combined-подключения записаны в конверте {"stream": ..., "data": ...}
+    if isinstance(msg, dict) and "stream" in msg and "data" in msg:
+        return msg["data"]
+    return msg
+
+
+class ReplaySocketManager(SimpleBinanceSocketManager):
+    """
+    Источник рынка из записанных кадров (backend.core.recorder) с тем же
+    интерфейсом, что у SimpleBinanceSocketManager: book_ticker_socket(),
+    trade_socket(), depth_socket(), multiplex_socket() и т.д.
+
+    Сокеты ничего не открывают — читатели регистрируются в менеджере, а
+    run() проигрывает кадры по порядку, двигая виртуальные часы:
+      speed=0   — как можно быстрее,
+      speed=1   — в реальном времени,
+      speed=N   — в N раз быстрее реального.
+    После каждого кадра run() ждёт, пока читатели его заберут, поэтому
+    медленный потребитель ничего не теряет и прогон детерминирован.
+    """
+
+    def __init__(
+            self,
+            frames: Iterable[CapturedFrame],
+            speed: float = 0.0,
+            clock: Optional[VirtualClock] = None,
+    ) -> None:
+        super().__init__(paper=True)
+        self._frames = frames
+        self.speed = max(0.0, float(speed))
+        self.clock = clock or VirtualClock()
+        self._readers: Dict[str, set[_WSContext]] = {}
+        self._taps: List[Tap] = []
+        self.frames_total = 0
+        self.frames_delivered = 0
+
+    @classmethod
+    def from_capture(
+            cls,
+            directory: str,
+            prefix: str = "capture",
+            start_ns: Optional[int] = None,
+            end_ns: Optional[int] = None,
+            **kw: Any,
+    ) -> "ReplaySocketManager":
+        reader = CaptureReader(directory, prefix)
+        return cls(reader.read(start_ns=start_ns, end_ns=end_ns), **kw)
+
+    # ----------------- учёт читателей -----------------
+    def _acquire(self, ctx: _WSContext):
+        self._active.add(ctx)
+        for stream in ctx.streams:
+            self._readers.setdefault(stream, set()).add(ctx)
+
+    async def _release(self, ctx: _WSContext):
+        self._active.discard(ctx)
+        for stream in ctx.streams:
+            readers = self._readers.get(stream)
+            if readers is not None:
+                readers.discard(ctx)
+                if not readers:
+                    del self._readers[stream]
+
+    def streams(self) -> set[str]:
+        return set(self._readers)
+
+    def add_tap(self, tap: Tap) -> None:
+        """tap(stream, data) получает каждый кадр до читателей; может быть корутиной."""
+        self._taps.append(tap)
+
+    async def close(self):
+        await super().close()
+        self._readers.clear()
+
+    # ----------------- проигрывание -----------------
+    async def run(self, on_time: Optional[Callable[[float], Awaitable[None]]] = None) -> None:
+        """
+        Проиграть все кадры. on_time(t) вызывается перед каждым кадром с его
+        виртуальным временем — туда встраиваются шаги стратегии и таймеры.
+        """
+        wall0: Optional[float] = None
+        t0 = 0.0
+        for frame in self._frames:
+            t = frame.ts_ns / 1e9
+            self.frames_total += 1
+            if wall0 is None:
+                wall0, t0 = time.monotonic(), t
+                self.clock.set(t)
+            if self.speed > 0:
+                delay = wall0 + (t - t0) / self.speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if on_time is not None:
+                await on_time(t)
+            self.clock.set(t)
+
+            readers = self._readers.get(frame.stream)
+            if not readers and not self._taps:
+                continue
+            try:
+                data = _decode(frame.raw)
+            except Exception:
+                logger.debug("replay: undecodable frame on %s skipped", frame.stream)
+                continue
+            for tap in tuple(self._taps):
+                res = tap(frame.stream, data)
+                if asyncio.iscoroutine(res):
+                    await res
+            if not readers:
+                continue
+            self.frames_delivered += 1
+            for ctx in tuple(readers):
+                ctx._feed(frame.stream, data)
+            await self._drain(readers)
+
+    @staticmethod
+    async def _drain(readers: Iterable[_WSContext]) -> None:
+        # даём читателям обработать кадр до следующего: без потерь и в порядке времени
+        for _ in range(1000):
+            if not any(ctx._queue is not None and ctx._queue.qsize() for ctx in readers):
+                return
+            await asyncio.sleep(0)
+
+
+class ReplayClient:
+    """Минимальная замена BinanceAsync для стратегий в реплее: .bm, .clock, .shadow_exec."""
+
+    def __init__(self, bm: ReplaySocketManager, shadow_exec: Optional[ShadowExecutor] = None) -> None:
+        self.bm = bm
+        self.clock = bm.clock
+        self.shadow = True
+        self.shadow_exec = shadow_exec
+        self.state = None
+
+
+@dataclass
+class ReplayStats:
+    frames: int
+    delivered: int
+    steps: int
+    virtual_seconds: float
+    wall_seconds: float
+
+
+class ReplayRunner:
+    """
+    Гоняет стратегию (например, MarketMakerStrategy) и ShadowExecutor поверх
+    ReplaySocketManager без изменений в их коде:
+      - стратегия получает рынок через client_wrap.bm и время через client_wrap.clock,
+      - step() вызывается каждые step_interval секунд виртуального времени,
+      - ShadowExecutor получает on_book_update/on_trade из тех же кадров.
+    """
+
+    def __init__(
+            self,
+            bm: ReplaySocketManager,
+            make_strategy: Callable[[ReplayClient], Any],
+            shadow_exec: Optional[ShadowExecutor] = None,
+            step_interval: Optional[float] = None,
+    ) -> None:
+        self.bm = bm
+        self.client = ReplayClient(bm, shadow_exec)
+        if shadow_exec is not None:
+            shadow_exec.clock = bm.clock
+            bm.add_tap(self._to_shadow)
+        self.strategy = make_strategy(self.client)
+        self.step_interval = float(step_interval or getattr(self.strategy, "loop_sleep", 0.2) or 0.2)
+        self.steps = 0
+        self._t0: Optional[float] = None
+        self._next_step: Optional[float] = None
+
+    async def _to_shadow(self, stream: str, data: Any) -> None:
+        shadow = self.client.shadow_exec
+        if shadow is None or not isinstance(data, dict):
+            return
+        sym, _, kind = stream.partition("@")
+        symbol = str(data.get("s") or sym).upper()
+        try:
+            if kind == "bookTicker":
+                await shadow.on_book_update(symbol, [[data["b"], data.get("B", 0)]], [[data["a"], data.get("A", 0)]])
+            elif kind in ("trade", "aggTrade"):
+                await shadow.on_trade(symbol, float(data["p"]), float(data["q"]), bool(data.get("m")))
+            elif kind.startswith("depth"):
+                bids = data.get("bids", data.get("b")) or []
+                asks = data.get("asks", data.get("a")) or []
+                await shadow.on_book_update(symbol, bids, asks)
+        except (KeyError, TypeError, ValueError):
+            logger.debug("replay: malformed %s frame for shadow executor", stream)
+
+    async def _on_time(self, t: float) -> None:
+        if self._next_step is None:
+            self._t0 = self._next_step = t
+        while self._next_step <= t:
+            self.bm.clock.set(self._next_step)
+            await self.strategy.step()
+            self.steps += 1
+            self._next_step += self.step_interval
+
+    async def run(self) -> ReplayStats:
+        wall0 = time.monotonic()
+        await self.strategy.start()
+        try:
+            # даём стратегии подписаться до первого кадра
+            for _ in range(100):
+                if self.bm.streams():
+                    break
+                await asyncio.sleep(0)
+            await self.bm.run(on_time=self._on_time)
+            # последний шаг по финальному состоянию рынка
+            await self.strategy.step()
+            self.steps += 1
+        finally:
+            await self.strategy.stop()
+            await self.bm.close()
+        return ReplayStats(
+            frames=self.bm.frames_total,
+            delivered=self.bm.frames_delivered,
+            steps=self.steps,
+            virtual_seconds=0.0 if self._t0 is None else self.bm.clock() - self._t0,
+            wall_seconds=time.monotonic() - wall0,
+        )
@@ -0,0 +1,262 @@
+from __future__ import annotations
+import asyncio
+import heapq
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Очерёдность REST-запросов при нехватке веса: меньше — важнее."""
+    ORDERS = 0
+    USER_DATA = 1
+    MARKET_DATA = 2
+    SCANNER = 3
+
+
+# Доля минутного лимита, до которой может дойти каждый приоритет: сканер не
+# съедает вес, который нужен ордерам и рыночным данным.
+PRIORITY_SHARE = {
+    Priority.ORDERS: 1.0,
+    Priority.USER_DATA: 0.95,
+    Priority.MARKET_DATA: 0.9,
+    Priority.SCANNER: 0.6,
+}
+
+_priority: ContextVar[Priority] = ContextVar("rest_priority", default=Priority.MARKET_DATA)
+
+
+@contextmanager
+def rest_priority(p: Priority) -> Iterator[None]:
+    """Все REST-запросы внутри блока (и в порождённых из него задачах) идут с приоритетом p."""
+    token = _priority.set(p)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+# --------------------------- веса эндпоинтов ---------------------------
+
+def _symbols_weight(params: Mapping[str, Any], one: int, many: Tuple[Tuple[int, int], ...], all_: int) -> int:
+    if params.get("symbol"):
+        return one
+    symbols = params.get("symbols")
+    if symbols:
+        n = len(symbols) if isinstance(symbols, (list, tuple)) else str(symbols).count(",") + 1
+        for upto, w in many:
+            if n <= upto:
+                return w
+    return all_
+
+
+def _depth_weight(params: Mapping[str, Any]) -> int:
+    limit = int(params.get("limit") or 100)
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 25
+    if limit <= 1000:
+        return 50
+    return 250
+
+
+# Вес запросов Binance Spot (/api/v3), см. документацию REST API.
+ENDPOINT_WEIGHTS: Dict[str, Callable[[Mapping[str, Any]], int]] = {
+    "/v3/exchangeInfo": lambda p: 20,
+    "/v3/ticker/24hr": lambda p: _symbols_weight(p, 2, ((20, 2), (100, 40)), 80),
+    "/v3/ticker/bookTicker": lambda p: _symbols_weight(p, 2, ((10**6, 4),), 4),
+    "/v3/ticker/price": lambda p: _symbols_weight(p, 2, ((10**6, 4),), 4),
+    "/v3/depth": _depth_weight,
+    "/v3/klines": lambda p: 2,
+    "/v3/order": lambda p: 1,
+    "/v3/openOrders": lambda p: 6 if p.get("symbol") else 80,
+    "/v3/account": lambda p: 20,
+    "/v3/userDataStream": lambda p: 2,
+}
+
+
+def request_weight(path: str, params: Optional[Mapping[str, Any]] = None) -> int:
+    fn = ENDPOINT_WEIGHTS.get(path)
+    return fn(params or {}) if fn else 1
+
+
+# --------------------------- планировщик ---------------------------
+
+class WeightScheduler:
+    """
+    Планировщик REST-запросов с учётом минутного веса Binance (REQUEST_WEIGHT, по IP).
+
+    Перед запросом его вес резервируется в бюджете текущей минуты; если места
+    нет, запрос ждёт в очереди по приоритету (ORDERS > USER_DATA > MARKET_DATA >
+    SCANNER) до начала следующей минуты. Фактический расход берётся из
+    заголовка X-MBX-USED-WEIGHT-1M (учитывает и другие процессы с того же IP).
+    На 429/418 все запросы приостанавливаются на Retry-After, а сам запрос
+    повторяется до max_retries раз.
+    """
+
+    def __init__(
+            self,
+            limit: int = 6000,
+            window: float = 60.0,
+            max_retries: int = 3,
+            clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.limit = limit
+        self.window = window
+        self.max_retries = max_retries
+        self._clock = clock
+        self.used = 0
+        self._window_id = self._current_window()
+        self.blocked_until = 0.0
+        self._heap: List[Tuple[int, int, int, asyncio.Future]] = []
+        self._seq = 0
+        self._pump: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.throttled = 0
+        self.rejected = 0
+
+    def _current_window(self) -> int:
+        return int(self._clock() // self.window)
+
+    def _roll(self) -> None:
+        w = self._current_window()
+        if w != self._window_id:
+            self._window_id = w
+            self.used = 0
+
+    def _fits(self, weight: int, prio: int) -> bool:
+        if self._clock() < self.blocked_until:
+            return False
+        cap = self.limit * PRIORITY_SHARE.get(Priority(prio), 1.0)
+        # одиночный запрос тяжелее доли приоритета пропускаем на пустом бюджете
+        return self.used + weight <= cap or self.used == 0
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # новый event loop (например, в тестах): ожидания из старого уже никому не нужны
+            self._loop = loop
+            self._heap.clear()
+            self._pump = None
+            self._wakeup = asyncio.Event()
+
+    async def acquire(self, weight: int, prio: Optional[Priority] = None) -> int:
+        """Зарезервировать weight в текущей минуте; возвращает id окна, в котором выдан вес."""
+        self._bind_loop()
+        p = int(current_priority() if prio is None else prio)
+        self._roll()
+        if (not self._heap or self._heap[0][0] > p) and self._fits(weight, p):
+            self.used += weight
+            return self._window_id
+        self.throttled += 1
+        fut = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(self._heap, (p, self._seq, weight, fut))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run())
+        else:
+            self._wakeup.set()
+        return await fut
+
+    async def _run(self) -> None:
+        heap = self._heap
+        while heap:
+            self._roll()
+            while heap:
+                p, _, weight, fut = heap[0]
+                if fut.done():
+                    heapq.heappop(heap)
+                    continue
+                if not self._fits(weight, p):
+                    break
+                heapq.heappop(heap)
+                self.used += weight
+                fut.set_result(self._window_id)
+            if not heap:
+                return
+            now = self._clock()
+            until = self.blocked_until if now < self.blocked_until else (self._window_id + 1) * self.window
+            delay = until - now
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.01, delay))
+            except asyncio.TimeoutError:
+                pass
+
+    def observe(self, response: httpx.Response, window_id: int) -> None:
+        """Учесть заголовки/статус ответа на запрос, выданный в окне window_id."""
+        used = response.headers.get("X-MBX-USED-WEIGHT-1M")
+        self._roll()
+        if used is not None and window_id == self._window_id:
+            try:
+                self.used = max(self.used, int(used))
+            except ValueError:
+                pass
+        if response.status_code in (418, 429):
+            self.rejected += 1
+            retry_after = response.headers.get("Retry-After")
+            try:
+                pause = float(retry_after) if retry_after is not None else None
+            except ValueError:
+                pause = None
+            now = self._clock()
+            if pause is None:
+                # без Retry-After ждём до следующей минуты
+                pause = (self._window_id + 1) * self.window - now
+            self.blocked_until = max(self.blocked_until, now + pause)
+            logger.warning("Binance REST %s: weight limit hit, pausing requests for %.1fs",
+                           response.status_code, pause)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    async def request(
+            self,
+            send: Callable[[], Awaitable[httpx.Response]],
+            weight: int = 1,
+            prio: Optional[Priority] = None,
+    ) -> httpx.Response:
+        """Выполнить send() в рамках бюджета; на 429/418 — пауза и повтор."""
+        attempt = 0
+        while True:
+            window_id = await self.acquire(weight, prio)
+            response = await send()
+            self.observe(response, window_id)
+            if response.status_code not in (418, 429) or attempt >= self.max_retries:
+                return response
+            # следующий acquire дождётся конца паузы
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        self._roll()
+        return {
+            "used": self.used,
+            "limit": self.limit,
+            "queued": sum(1 for *_, f in self._heap if not f.done()),
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "blocked_for": max(0.0, self.blocked_until - self._clock()),
+        }
+
+
+_schedulers: Dict[str, WeightScheduler] = {}
+
+
+def get_scheduler(host: str) -> WeightScheduler:
+    """Общий планировщик на хост: лимит веса у Binance считается по IP, а не по клиенту."""
+    s = _schedulers.get(host)
+    if s is None:
+        s = _schedulers[host] = WeightScheduler()
+    return s
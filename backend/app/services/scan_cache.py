@@ -0,0 +1,153 @@
+from __future__ import annotations
+import asyncio
+import inspect
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .pair_scanner import scan_best_symbol
+
+logger = logging.getLogger(__name__)
+
+ScanFn = Callable[[Dict[str, Any], Any], Awaitable[Dict[str, Any]]]
+
+
+def paper_mode(cfg: Dict[str, Any]) -> bool:
+    """testnet или live; без api.paper — testnet, как и у клиента, который создаёт роутер."""
+    api = (cfg or {}).get("api") if isinstance(cfg, dict) else None
+    return bool((api or {}).get("paper", True))
+
+
+def scan_key(cfg: Dict[str, Any]) -> str:
+    """Ключ кэша: только то, что влияет на результат скана (секция scanner и paper/live)."""
+    cfg = cfg or {}
+    return json.dumps({"paper": paper_mode(cfg), "scanner": cfg.get("scanner") or {}}, sort_keys=True, default=str)
+
+
+class ScanCache:
+    """
+    Кэш результатов scan_best_symbol по эффективному конфигу сканера.
+
+      - результат моложе ttl отдаётся сразу;
+      - моложе max_stale — тоже сразу, но в фоне запускается пересчёт;
+      - старше (или нет вовсе) — запрос ждёт скан.
+    Одновременные запросы с одним ключом ждут один и тот же скан. Ошибка
+    фонового пересчёта не стирает старый результат.
+
+    Если вызывающему нечем сканировать, make_client() создаёт клиент один раз
+    на режим (testnet/live — не больше двух), и он живёт до close(), а не
+    создаётся на каждый запрос. Результатов хранится не больше max_entries,
+    и не дольше max_stale.
+    """
+
+    def __init__(
+            self,
+            scan: ScanFn = scan_best_symbol,
+            ttl: float = 5.0,
+            max_stale: float = 60.0,
+            clock: Callable[[], float] = time.monotonic,
+            max_entries: int = 32,
+    ) -> None:
+        self._scan = scan
+        self.ttl = ttl
+        self.max_stale = max(ttl, max_stale)
+        self._clock = clock
+        self.max_entries = max(1, max_entries)
+        self._results: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._clients: Dict[bool, Any] = {}
+        self.scans = 0
+        self.hits = 0
+
+    def age(self, cfg: Dict[str, Any]) -> Optional[float]:
+        hit = self._results.get(scan_key(cfg))
+        return None if hit is None else self._clock() - hit[0]
+
+    async def get(
+            self,
+            cfg: Dict[str, Any],
+            client: Any = None,
+            make_client: Optional[Callable[[], Any]] = None,
+    ) -> Dict[str, Any]:
+        key = scan_key(cfg)
+        hit = self._results.get(key)
+        if hit is not None:
+            self._results.move_to_end(key)
+            age = self._clock() - hit[0]
+            if age < self.ttl:
+                self.hits += 1
+                return hit[1]
+            if age < self.max_stale:
+                self.hits += 1
+                self._start(key, cfg, client, make_client)
+                return hit[1]
+        return await asyncio.shield(self._start(key, cfg, client, make_client))
+
+    def _start(self, key: str, cfg: Dict[str, Any], client: Any,
+               make_client: Optional[Callable[[], Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            task = self._inflight[key] = asyncio.create_task(self._run(key, cfg, client, make_client))
+            task.add_done_callback(self._done)
+        return task
+
+    @staticmethod
+    def _done(task: asyncio.Task) -> None:
+        # исключение уже получили ожидающие; для фонового пересчёта — только лог
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("scan failed: %s", task.exception())
+
+    async def _run(self, key: str, cfg: Dict[str, Any], client: Any,
+                   make_client: Optional[Callable[[], Any]]) -> Dict[str, Any]:
+        try:
+            if client is None:
+                paper = paper_mode(cfg)
+                client = self._clients.get(paper)
+                if client is None:
+                    if make_client is None:
+                        raise RuntimeError("Scanner: no client to scan with")
+                    client = make_client()
+                    if inspect.isawaitable(client):
+                        client = await client
+                    self._clients[paper] = client
+            self.scans += 1
+            result = await self._scan(cfg, client)
+            self._store(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: str, result: Dict[str, Any]) -> None:
+        now = self._clock()
+        results = self._results
+        results[key] = (now, result)
+        results.move_to_end(key)
+        # старше max_stale результат уже не отдаётся — незачем и хранить
+        for k in [k for k, (t, _) in results.items() if now - t >= self.max_stale]:
+            del results[k]
+        while len(results) > self.max_entries:
+            results.popitem(last=False)
+
+    def invalidate(self) -> None:
+        self._results.clear()
+
+    async def close(self) -> None:
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            closer = getattr(client, "close_connection", None) or getattr(client, "aclose", None)
+            if closer is None:
+                continue
+            try:
+                res = closer()
+                if inspect.isawaitable(res):
+                    await res
+            except Exception:
+                logger.warning("scanner client close failed", exc_info=True)
+
+
+scan_cache = ScanCache()
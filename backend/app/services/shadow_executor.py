@@ -7,6 +7,8 @@ from decimal import Decimal
 from typing import Dict, Any, Optional, Tuple
 import logging
 
+from .timers import TimerHandle, TimerScheduler
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -28,6 +30,11 @@ class ShadowExecutor:
         a = float(opts.get("maker_queue_alpha", cfg.alpha))
         cfg.alpha = max(0.0, min(1.0, float(opts.get("alpha", a))))
         self.cfg = cfg
+        # GTD-сроки лимиток (goodTillDate, мс)
+        self.timers = TimerScheduler(clock=self._now)
+        self._expiry: Dict[int, TimerHandle] = {}
+        # источник времени (например, виртуальные часы реплея); по умолчанию time.time
+        self.clock = opts.get("clock")
 
         self._oid = itertools.count(start=1)
         self._orders: Dict[int, Dict[str, Any]] = {}
@@ -35,13 +42,33 @@ class ShadowExecutor:
         self._best: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
         self._lock = asyncio.Lock()
 
+    @property
+    def clock(self):
+        return self._clock
+
+    @clock.setter
+    def clock(self, value) -> None:
+        self._clock = value
+        # с виртуальными часами сроки двигают рыночные события, а не фоновая задача
+        self.timers.autorun = value is None
+
     @staticmethod
     def _dec(x) -> Decimal:
         return Decimal(str(x))
 
-    @staticmethod
-    def _now() -> float:
-        return time.time()
+    def _now(self) -> float:
+        return self._clock() if self._clock is not None else time.time()
+
+    def _expire(self, oid: int) -> None:
+        self._expiry.pop(oid, None)
+        o = self._orders.get(oid)
+        if o and o["status"] in {"NEW", "PARTIALLY_FILLED"}:
+            o["status"] = "EXPIRED"; o["updateTime"] = self._now()
+
+    def _settle(self, oid: int) -> None:
+        h = self._expiry.pop(oid, None)
+        if h is not None:
+            h.cancel()
 
     def _best_of(self, symbol: str) -> Tuple[Optional[float], Optional[float]]:
         return self._best.get(symbol, (None, None))
@@ -59,10 +86,12 @@ class ShadowExecutor:
             self._best[symbol] = (best_bid, best_ask)
         except Exception:
             logger.exception("Failed to update best book for %s", symbol)
+        self.timers.run_due()
 
     async def on_trade(self, symbol: str, price: float, qty: float, is_buyer_maker: bool):
         if qty <= 0:
             return
+        self.timers.run_due()
         async with self._lock:
             for oid in list(self._by_symbol.get(symbol, [])):
                 o = self._orders.get(oid)
@@ -91,6 +120,7 @@ class ShadowExecutor:
                 o["updateTime"] = self._now()
                 if abs(Decimal(str(o["executedQty"])) - Decimal(str(o["origQty"]))) <= Decimal("1e-12"):
                     o["status"] = "FILLED"
+                    self._settle(oid)
                 else:
                     o["status"] = "PARTIALLY_FILLED"
 
@@ -145,10 +175,15 @@ class ShadowExecutor:
                  "cummulativeQuoteQty": 0.0, "liquidity": None, "transactTime": int(self._now() * 1000)}
             self._orders[oid] = o
             self._by_symbol.setdefault(symbol, set()).add(oid)
+            gtd = params.get("goodTillDate")
+            if tif == "GTD" and gtd:
+                o["goodTillDate"] = int(gtd)
+                self._expiry[oid] = self.timers.call_at(int(gtd) / 1000.0, self._expire, oid)
             return o
 
     async def get_order(self, *, symbol, orderId):
         await asyncio.sleep(self.cfg.latency_ms / 1000.0)
+        self.timers.run_due()
         oid = int(orderId); o = self._orders.get(oid)
         if not o:
             return {"symbol": symbol, "orderId": oid, "status": "EXPIRED",
@@ -165,4 +200,5 @@ class ShadowExecutor:
         if o["status"] in {"FILLED", "CANCELED", "REJECTED", "EXPIRED"}:
             return dict(o)
         o["status"] = "CANCELED"; o["updateTime"] = self._now()
+        self._settle(oid)
         return dict(o)
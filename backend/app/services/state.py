@@ -3,6 +3,10 @@ from typing import Optional, Dict, Any, Callable
 from ..core.config import settings
 from .ws import ws_broadcast
 from .history import history
+from .candles import CandleFeed
+from .binance_client import SimpleBinanceSocketManager
+from .stream_scanner import StreamingPairScanner
+from .symbols import registry_for
 from ..adapters.base import ExchangeAdapter
 from ..adapters.mock import MockAdapter
 from ..adapters.binance import BinanceAdapter
@@ -17,6 +21,8 @@ class AppState:
         self.started = False
         self.adapter: Optional[ExchangeAdapter] = None
         self.strategy: Optional[StrategyPlugin] = None
+        self.md: Optional[CandleFeed] = None
+        self.pair_stream: Optional[StreamingPairScanner] = None
         self._task: Optional[asyncio.Task] = None
         self.mode = settings.mode
         self._registry: Dict[str, Callable[[], StrategyPlugin]] = {
@@ -40,7 +46,9 @@ class AppState:
         paper = PaperExecutor()
         oms = OMS(self.adapter, paper, risk)
         ctx: StrategyContext = type("Ctx", (), {})()
-        ctx.md = self.adapter
+        # свечи собираются из сделок: тики стратегии читают их из памяти, а не из REST
+        self.md = CandleFeed(self.adapter)
+        ctx.md = self.md
         ctx.trader = oms
         ctx.risk = risk
         ctx.storage = {}
@@ -85,8 +93,40 @@ class AppState:
             await self.strategy.on_stop()
         await ws_broadcast.broadcast({"type": "diag", "text": "Strategy stopped"})
         self.strategy = None
+        if self.md:
+            await self.md.close()
+            self.md = None
         self.adapter = None
 
+    async def start_pair_stream(self, cfg: Dict[str, Any], client: Any = None) -> StreamingPairScanner:
+        """
+        Запустить непрерывный сканер пар (общие стримы !miniTicker@arr и !bookTicker).
+        С REST-клиентом статус символа и спот-торговля берутся из его exchangeInfo.
+        """
+        if self.pair_stream is not None:
+            if self.pair_stream.running:
+                return self.pair_stream
+            # прежний сканер умер — закрыть его подключения перед заменой
+            await self.stop_pair_stream()
+        paper = bool((cfg or {}).get("api", {}).get("paper", True))
+        registry = None
+        if client is not None:
+            registry = registry_for(client)
+            try:
+                await registry.ensure()
+            except Exception as e:
+                await ws_broadcast.broadcast({"type": "diag", "text": f"Scanner: exchangeInfo unavailable: {e}"})
+        scanner = StreamingPairScanner(SimpleBinanceSocketManager(paper=paper), cfg, symbols=registry)
+        await scanner.start()
+        self.pair_stream = scanner
+        return scanner
+
+    async def stop_pair_stream(self) -> None:
+        scanner, self.pair_stream = self.pair_stream, None
+        if scanner is not None:
+            await scanner.stop()
+            await scanner.bm.close()
+
     def status(self) -> Dict[str, Any]:
         return {
             "started": self.started,
@@ -0,0 +1,229 @@
+from __future__ import annotations
+import asyncio
+import heapq
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .pair_scanner import PairScore, _bps
+
+try:
+    from backend.core.indicators import EMA, RealizedVol
+except ImportError:  # запуск из каталога backend/
+    from core.indicators import EMA, RealizedVol
+
+logger = logging.getLogger(__name__)
+
+
+class _SymState:
+    __slots__ = ("symbol", "bid", "ask", "last", "quote_vol", "spread", "vol",
+                 "sample_t", "score", "version", "eligible")
+
+    def __init__(self, symbol: str, spread_period: int, vol_bars: int) -> None:
+        self.symbol = symbol
+        self.bid = 0.0
+        self.ask = 0.0
+        self.last = 0.0
+        self.quote_vol = 0.0
+        self.spread = EMA(spread_period)
+        self.vol = RealizedVol(max(1, vol_bars))
+        self.sample_t = -1            # номер минуты последнего сэмпла волатильности
+        self.score = 0.0
+        self.version = 0
+        self.eligible = False
+
+    def to_score(self) -> PairScore:
+        return PairScore(
+            symbol=self.symbol, bid=self.bid, ask=self.ask,
+            spread_bps=self.spread.value or 0.0,
+            vol_usdt_24h=self.quote_vol,
+            vol_bps_1m=_bps(self.vol.mean_abs),
+            score=self.score,
+        )
+
+
+class StreamingPairScanner:
+    """
+    Непрерывный сканер пар поверх общих стримов Binance:
+      - !miniTicker@arr — последняя цена и 24h-объём в котируемой валюте,
+        раз в минуту из неё же берётся сэмпл для волатильности (как 1m klines);
+      - !bookTicker — лучшие bid/ask, спред сглаживается EMA.
+
+    Оценка та же, что у scan_best_symbol: w_spread * spread_bps + w_vol * vol_bps_1m,
+    фильтры — из того же cfg["scanner"], включая top_by_volume. max_pairs не
+    применяется: он ограничивает число REST-запросов, а стрим видит все пары
+    сразу. Сообщения только обновляют состояние
+    символа и помечают его изменившимся; рейтинг — ленивая куча (score, версия),
+    в которую при чтении попадают только изменившиеся символы, а устаревшие
+    записи выбрасываются, когда всплывают наверх.
+    """
+
+    def __init__(self, bm: Any, cfg: Dict[str, Any], symbols: Any = None) -> None:
+        sc = (cfg or {}).get("scanner", {})
+        paper = bool((cfg or {}).get("api", {}).get("paper", False))
+        self.bm = bm
+        self.symbols = symbols          # SymbolRegistry (необязательно): статус и спот-торговля
+        self.quote = sc.get("quote", "USDT")
+        self.min_price = float(sc.get("min_price", 0.0001))
+        self.min_vol_usdt = float(sc.get("min_vol_usdt_24h", 0 if paper else 3_000_000))
+        self.min_spread_bps = float(sc.get("min_spread_bps", 0.0 if paper else 5.0))
+        self.top_by_volume = int(sc.get("top_by_volume", 120))
+        self.vol_bars = int(sc.get("vol_bars", 0))
+        self.w_spread = float(sc.get("score", {}).get("w_spread", 1.0))
+        self.w_vol = float(sc.get("score", {}).get("w_vol", 0.3))
+        self.whitelist = set(sc.get("whitelist") or [])
+        self.blacklist = set(sc.get("blacklist") or [])
+        self.spread_period = int(sc.get("spread_ema", 20))
+
+        self._state: Dict[str, _SymState] = {}
+        self._dirty: Set[str] = set()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._tasks: List[asyncio.Task] = []
+        self.messages = 0
+
+    # ----------------- жизненный цикл -----------------
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._read(self.bm.miniticker_socket(), self.on_miniticker)),
+            asyncio.create_task(self._read(self.bm.book_ticker_socket(None), self.on_book_ticker)),
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for t in tasks:
+            t.cancel()
+        for t in tasks:
+            try:
+                await t
+            except asyncio.CancelledError:
+                pass
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    async def _read(self, socket: Any, handler) -> None:
+        async with socket as stream:
+            while True:
+                msg = await stream.recv()
+                try:
+                    handler(msg)
+                except Exception:
+                    logger.exception("stream scanner: bad message")
+
+    # ----------------- обновление состояния -----------------
+    def _get(self, symbol: str) -> Optional[_SymState]:
+        st = self._state.get(symbol)
+        if st is not None:
+            return st
+        if not symbol.endswith(self.quote) or symbol in self.blacklist:
+            return None
+        if self.whitelist and symbol not in self.whitelist:
+            return None
+        if self.symbols is not None and self.symbols.loaded:
+            rec = self.symbols.get(symbol)
+            if rec is None or not rec.trading or not rec.spot_allowed:
+                return None
+        st = self._state[symbol] = _SymState(symbol, self.spread_period, self.vol_bars)
+        return st
+
+    def on_miniticker(self, msg: Any) -> None:
+        rows = msg if isinstance(msg, list) else [msg]
+        for t in rows:
+            st = self._get(t.get("s", ""))
+            if st is None:
+                continue
+            self.messages += 1
+            st.last = float(t.get("c") or 0.0)
+            st.quote_vol = float(t.get("q") or 0.0)
+            if self.vol_bars > 1:
+                minute = int(t.get("E") or 0) // 60_000
+                if minute > st.sample_t:
+                    st.sample_t = minute
+                    st.vol.update(st.last)
+            self._dirty.add(st.symbol)
+
+    def on_book_ticker(self, msg: Any) -> None:
+        st = self._get(msg.get("s", ""))
+        if st is None:
+            return
+        self.messages += 1
+        bid = float(msg.get("b") or 0.0)
+        ask = float(msg.get("a") or 0.0)
+        st.bid, st.ask = bid, ask
+        if bid > 0 and ask > bid:
+            st.spread.update(_bps((ask - bid) / bid))
+        self._dirty.add(st.symbol)
+
+    # ----------------- рейтинг -----------------
+    def _rescore(self, st: _SymState) -> None:
+        spread = st.spread.value
+        eligible = (
+            spread is not None
+            and st.bid > 0 and st.ask > st.bid
+            and st.last >= self.min_price
+            and st.quote_vol >= self.min_vol_usdt
+            and spread >= self.min_spread_bps
+        )
+        vol = _bps(st.vol.mean_abs) if self.vol_bars > 1 else 0.0
+        score = self.w_spread * (spread or 0.0) + self.w_vol * vol
+        if eligible == st.eligible and score == st.score:
+            return
+        st.version += 1
+        st.eligible, st.score = eligible, score
+        if eligible:
+            heapq.heappush(self._heap, (-score, st.version, st.symbol))
+
+    def _flush(self) -> None:
+        state = self._state
+        for sym in self._dirty:
+            self._rescore(state[sym])
+        self._dirty.clear()
+        # устаревших записей стало слишком много — пересобрать кучу
+        if len(self._heap) > 4 * max(16, len(state)):
+            self._heap = [(-s.score, s.version, s.symbol) for s in state.values() if s.eligible]
+            heapq.heapify(self._heap)
+
+    def _valid(self, entry: Tuple[float, int, str]) -> bool:
+        st = self._state.get(entry[2])
+        return st is not None and st.eligible and st.version == entry[1]
+
+    def _volume_cutoff(self) -> float:
+        # как в scan_best_symbol: в рейтинг попадают только top_by_volume пар
+        # по объёму среди прошедших фильтры цены и объёма
+        vols = np.fromiter(
+            (s.quote_vol for s in self._state.values()
+             if s.last >= self.min_price and s.quote_vol >= self.min_vol_usdt),
+            dtype=float,
+        )
+        k = self.top_by_volume
+        if k <= 0 or vols.size <= k:
+            return -np.inf
+        return float(np.partition(vols, vols.size - k)[vols.size - k])
+
+    def top(self, n: int = 10) -> List[PairScore]:
+        """Лучшие n символов по текущему score (O(изменившиеся · log N + n · log N))."""
+        self._flush()
+        heap = self._heap
+        cutoff = self._volume_cutoff()
+        taken: List[Tuple[float, int, str]] = []
+        skipped: List[Tuple[float, int, str]] = []
+        while heap and len(taken) < n:
+            entry = heapq.heappop(heap)
+            if not self._valid(entry):
+                continue
+            # вне top_by_volume сейчас, но может вернуться — запись остаётся в куче
+            (taken if self._state[entry[2]].quote_vol >= cutoff else skipped).append(entry)
+        for entry in taken + skipped:
+            heapq.heappush(heap, entry)
+        return [self._state[sym].to_score() for _, _, sym in taken]
+
+    def result(self, n: int = 10) -> Dict[str, Any]:
+        """Тот же ответ, что у scan_best_symbol; RuntimeError, если подходящих пар пока нет."""
+        top = self.top(n)
+        if not top:
+            raise RuntimeError("Scanner: no pairs with spread >= min_spread_bps")
+        return {"best": top[0].__dict__, "top": [x.__dict__ for x in top]}
@@ -0,0 +1,200 @@
+from __future__ import annotations
+import asyncio
+import logging
+import math
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 900.0
+
+
+def _f(d: Dict[str, Any], key: str) -> float:
+    try:
+        return float(d.get(key) or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _digits(step: float) -> int:
+    # 0.001 -> 3, 1.0 -> 0: до стольких знаков округляем, чтобы не тащить 0.30000000000000004
+    if step <= 0:
+        return 8
+    return max(0, -math.floor(math.log10(step) + 1e-9))
+
+
+@dataclass(frozen=True, slots=True)
+class SymbolRecord:
+    """Торговые фильтры одного символа из exchangeInfo (только то, что нужно для ордеров)."""
+    symbol: str
+    base: str
+    quote: str
+    status: str
+    spot_allowed: bool
+    tick_size: float
+    step_size: float
+    min_price: float
+    min_qty: float
+    min_notional: float
+    price_digits: int
+    qty_digits: int
+
+    @classmethod
+    def from_exchange(cls, s: Dict[str, Any]) -> "SymbolRecord":
+        by_type = {f.get("filterType"): f for f in s.get("filters") or () if isinstance(f, dict)}
+        price_f = by_type.get("PRICE_FILTER", {})
+        lot_f = by_type.get("LOT_SIZE", {})
+        # на споте MIN_NOTIONAL заменён на NOTIONAL; поддерживаем оба
+        notional_f = by_type.get("NOTIONAL") or by_type.get("MIN_NOTIONAL") or {}
+        tick = _f(price_f, "tickSize")
+        step = _f(lot_f, "stepSize")
+        return cls(
+            symbol=str(s.get("symbol") or ""),
+            base=str(s.get("baseAsset") or ""),
+            quote=str(s.get("quoteAsset") or ""),
+            status=str(s.get("status") or ""),
+            spot_allowed=s.get("isSpotTradingAllowed") is not False,
+            tick_size=tick,
+            step_size=step,
+            min_price=_f(price_f, "minPrice"),
+            min_qty=_f(lot_f, "minQty"),
+            min_notional=_f(notional_f, "minNotional"),
+            price_digits=_digits(tick),
+            qty_digits=_digits(step),
+        )
+
+    @property
+    def trading(self) -> bool:
+        return self.status == "TRADING"
+
+    def round_price(self, p: float) -> float:
+        """Вниз к шагу цены."""
+        if self.tick_size <= 0:
+            return p
+        return round(math.floor(p / self.tick_size + 1e-9) * self.tick_size, self.price_digits)
+
+    def round_qty(self, q: float) -> float:
+        """Вниз к шагу количества."""
+        if self.step_size <= 0:
+            return q
+        return round(math.floor(q / self.step_size + 1e-9) * self.step_size, self.qty_digits)
+
+    def as_info(self) -> Dict[str, Any]:
+        """В формате BinanceRestClient.get_symbol_info (без сырых фильтров)."""
+        return {
+            "symbol": self.symbol,
+            "baseAsset": self.base,
+            "quoteAsset": self.quote,
+            "tick_size": self.tick_size,
+            "step_size": self.step_size,
+            "min_price": self.min_price,
+            "min_qty": self.min_qty,
+            "min_notional": self.min_notional,
+        }
+
+
+class SymbolRegistry:
+    """
+    Реестр символов по одному exchangeInfo.
+
+    Первый ensure() загружает exchangeInfo целиком (параллельные вызовы ждут
+    одну и ту же загрузку), дальше get() отвечает синхронно из памяти. Когда
+    данные старше ttl, ensure() сразу возвращается со старыми данными и
+    обновляет их фоновой задачей.
+    """
+
+    def __init__(self, client: Any, ttl: float = DEFAULT_TTL, clock: Callable[[], float] = time.monotonic) -> None:
+        self._client = client
+        self.ttl = ttl
+        self._clock = clock
+        self._records: Dict[str, SymbolRecord] = {}
+        self.loaded_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self.refreshes = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._records
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def stale(self) -> bool:
+        return self.loaded_at is None or self._clock() - self.loaded_at >= self.ttl
+
+    def get(self, symbol: str) -> Optional[SymbolRecord]:
+        return self._records.get(symbol.upper())
+
+    def records(self, quote: Optional[str] = None, trading_only: bool = True) -> List[SymbolRecord]:
+        """Записи в порядке exchangeInfo, с фильтром по котируемой валюте и статусу."""
+        return [
+            r for r in self._records.values()
+            if (quote is None or r.quote == quote) and (not trading_only or r.trading)
+        ]
+
+    def load(self, symbols: Iterable[Dict[str, Any]]) -> None:
+        records: Dict[str, SymbolRecord] = {}
+        for s in symbols:
+            try:
+                rec = SymbolRecord.from_exchange(s)
+            except Exception:
+                logger.debug("exchangeInfo: bad symbol entry %r", s)
+                continue
+            if rec.symbol:
+                records[rec.symbol] = rec
+        self._records = records
+        self.loaded_at = self._clock()
+
+    async def refresh(self) -> None:
+        """Загрузить exchangeInfo заново; параллельные вызовы делят один запрос."""
+        task = self._inflight
+        if task is None or task.done():
+            task = self._inflight = asyncio.create_task(self._fetch())
+        await asyncio.shield(task)
+
+    async def _fetch(self) -> None:
+        info = await self._client.get_exchange_info()
+        self.load(info.get("symbols") or [])
+        self.refreshes += 1
+
+    async def ensure(self) -> "SymbolRegistry":
+        if not self.loaded:
+            await self.refresh()
+        elif self.stale() and (self._inflight is None or self._inflight.done()):
+            self._inflight = asyncio.create_task(self._fetch())
+            self._inflight.add_done_callback(self._log_failure)
+        return self
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("exchangeInfo background refresh failed: %s", task.exception())
+
+    async def close(self) -> None:
+        task, self._inflight = self._inflight, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+_registries: "weakref.WeakKeyDictionary[Any, SymbolRegistry]" = weakref.WeakKeyDictionary()
+
+
+def registry_for(client: Any, ttl: float = DEFAULT_TTL) -> SymbolRegistry:
+    """Общий реестр для REST-клиента: стратегия и сканер одного клиента делят один exchangeInfo."""
+    try:
+        reg = _registries.get(client)
+    except TypeError:  # клиент без weakref — реестр без кэширования
+        return SymbolRegistry(client, ttl)
+    if reg is None:
+        reg = _registries[client] = SymbolRegistry(client, ttl)
+    return reg
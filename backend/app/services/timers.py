@@ -0,0 +1,148 @@
+from __future__ import annotations
+import asyncio
+import heapq
+import logging
+import time
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    """Отложенный вызов в TimerScheduler; cancel() снимает его без поиска в куче."""
+    __slots__ = ("when", "seq", "callback", "args", "cancelled", "_owner")
+
+    def __init__(self, when: float, seq: int, callback: Callable[..., Any], args: tuple,
+                 owner: "TimerScheduler") -> None:
+        self.when = when
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self._owner = owner
+
+    def __lt__(self, other: "TimerHandle") -> bool:
+        return (self.when, self.seq) < (other.when, other.seq)
+
+    def cancel(self) -> None:
+        if not self.cancelled:
+            self.cancelled = True
+            self._owner._on_cancel()
+
+
+class TimerScheduler:
+    """
+    Таймеры на min-куче по сроку: таймауты бумажных ордеров, GTD и т.п.
+
+    run_due(now) вызывает только наступившие таймеры — O(k log n) на k сработавших,
+    сколько бы таймеров ни ждало. Отмена ленивая: запись остаётся в куче до
+    всплытия, а когда отменённых больше половины, куча пересобирается.
+
+    С autorun (время — настоящие часы) при первом таймере в работающем event
+    loop запускается задача, которая спит до ближайшего срока и вызывает его
+    вовремя, не дожидаясь следующего шага; когда таймеры кончаются, задача
+    завершается. С виртуальными часами реплея autorun выключают и двигают
+    таймеры из шагов через run_due().
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time, autorun: bool = True) -> None:
+        self._clock = clock
+        self.autorun = autorun
+        self._heap: List[TimerHandle] = []
+        self._seq = 0
+        self._cancelled = 0
+        self._pump: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.fired = 0
+
+    def __len__(self) -> int:
+        return len(self._heap) - self._cancelled
+
+    def call_at(self, when: float, callback: Callable[..., Any], *args: Any) -> TimerHandle:
+        self._seq += 1
+        h = TimerHandle(float(when), self._seq, callback, args, self)
+        earliest = not self._heap or h < self._heap[0]
+        heapq.heappush(self._heap, h)
+        if self.autorun:
+            self._ensure_pump(earliest)
+        return h
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> TimerHandle:
+        return self.call_at(self._clock() + delay, callback, *args)
+
+    def next_deadline(self) -> Optional[float]:
+        heap = self._heap
+        while heap and heap[0].cancelled:
+            heapq.heappop(heap)
+            self._cancelled -= 1
+        return heap[0].when if heap else None
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """Вызвать все таймеры со сроком <= now (по умолчанию — текущее время часов)."""
+        if now is None:
+            now = self._clock()
+        n = 0
+        # self._heap перечитывается: колбэк может отменить таймеры и пересобрать кучу
+        while self._heap and self._heap[0].when <= now:
+            h = heapq.heappop(self._heap)
+            if h.cancelled:
+                self._cancelled -= 1
+                continue
+            h.cancelled = True          # повторный cancel() из колбэка — no-op
+            n += 1
+            try:
+                h.callback(*h.args)
+            except Exception:
+                logger.exception("timer callback failed")
+        self.fired += n
+        return n
+
+    def clear(self) -> None:
+        for h in self._heap:
+            h.cancelled = True
+        self._heap.clear()
+        self._cancelled = 0
+
+    def _on_cancel(self) -> None:
+        self._cancelled += 1
+        if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+            self._heap = [h for h in self._heap if not h.cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    # ----------------- фоновый запуск -----------------
+    def _ensure_pump(self, earliest: bool) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # вне event loop — сработают на ближайшем run_due()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pump = None
+            self._wakeup = asyncio.Event()
+        if self._pump is None or self._pump.done():
+            self._pump = loop.create_task(self._run())
+        elif earliest:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            self.run_due()
+            when = self.next_deadline()
+            if when is None:
+                return
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, when - self._clock()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self) -> None:
+        pump, self._pump = self._pump, None
+        if pump is not None and not pump.done():
+            pump.cancel()
+            try:
+                await pump
+            except asyncio.CancelledError:
+                pass
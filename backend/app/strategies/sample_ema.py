@@ -1,6 +1,11 @@
 from .base import StrategyPlugin, StrategyContext
 import math
 
+try:
+    from backend.core.indicators import EMA
+except ImportError:  # запуск из каталога backend/
+    from core.indicators import EMA
+
 class SampleEMAStrategy(StrategyPlugin):
     id = "sample_ema"
     schema = {
@@ -21,12 +26,14 @@ class SampleEMAStrategy(StrategyPlugin):
         self.last_fast = None
         self.last_slow = None
         self.position = 0.0
+        self._fast = EMA(self.cfg["fast"])
+        self._slow = EMA(self.cfg["slow"])
+        self._last_t = None
+        self._forming = None
 
     async def on_start(self) -> None:
-        candles = await self.ctx.md.get_ohlcv(self.cfg["symbol"], self.cfg["tf"], limit=max(self.cfg["slow"]*3, 200))
-        closes = [c["c"] for c in candles]
-        self.last_fast = self._ema(closes, self.cfg["fast"])
-        self.last_slow = self._ema(closes, self.cfg["slow"])
+        await self._warm_up()
+        self.last_fast, self.last_slow = self._live()
 
     async def on_stop(self) -> None:
         cancel_all = getattr(self.ctx.trader, "cancel_all_orders", None)
@@ -49,11 +56,23 @@ class SampleEMAStrategy(StrategyPlugin):
                     pass
 
     async def on_tick(self) -> None:
-        # Pull last few candles to update EMAs quickly
-        candles = await self.ctx.md.get_ohlcv(self.cfg["symbol"], self.cfg["tf"], limit=max(self.cfg["slow"], 50))
-        closes = [c["c"] for c in candles]
-        fast = self._ema(closes, self.cfg["fast"])
-        slow = self._ema(closes, self.cfg["slow"])
+        # EMAs are kept over closed bars; each tick only folds in bars closed since the last one
+        candles = await self.ctx.md.get_ohlcv(self.cfg["symbol"], self.cfg["tf"], limit=5)
+        if not candles:
+            return
+        if self._last_t is None or candles[0]["t"] > self._last_t:
+            # missed more bars than we fetched (or never warmed up): rebuild from history
+            candles = await self._warm_up()
+        else:
+            for c in candles[:-1]:
+                if c["t"] > self._last_t:
+                    self._fast.update(c["c"])
+                    self._slow.update(c["c"])
+                    self._last_t = c["t"]
+            self._forming = candles[-1]["c"]
+        fast, slow = self._live()
+        if fast is None or slow is None:
+            return
         if self.last_fast is None or self.last_slow is None:
             self.last_fast, self.last_slow = fast, slow
             return
@@ -71,9 +90,23 @@ class SampleEMAStrategy(StrategyPlugin):
     async def on_book(self, msg: dict) -> None: ...
     async def on_trade(self, msg: dict) -> None: ...
 
-    def _ema(self, values, period):
-        k = 2/(period+1)
-        ema = values[0]
-        for v in values[1:]:
-            ema = v*k + ema*(1-k)
-        return ema
+    async def _warm_up(self):
+        candles = await self.ctx.md.get_ohlcv(self.cfg["symbol"], self.cfg["tf"], limit=max(self.cfg["slow"]*3, 200))
+        self._fast = EMA(self.cfg["fast"])
+        self._slow = EMA(self.cfg["slow"])
+        self._last_t = None
+        self._forming = None
+        if not candles:
+            return candles
+        for c in candles[:-1]:
+            self._fast.update(c["c"])
+            self._slow.update(c["c"])
+            self._last_t = c["t"]
+        self._forming = candles[-1]["c"]
+        return candles
+
+    def _live(self):
+        # the last candle is still forming: include it without committing it to the EMAs
+        if self._forming is None:
+            return self._fast.value, self._slow.value
+        return self._fast.peek(self._forming), self._slow.peek(self._forming)
@@ -0,0 +1,79 @@
+"""Messages/sec for the depth/trade hot path: pydantic models vs. slotted fast types.
+
+    python -m backend.bench.bench_contracts [--n 20000]
+
+Each variant does what an adapter + the market WS router do per message:
+json.loads of a raw Binance frame, build the message, model_dump() for the push.
+"""
+import argparse
+import json
+import random
+import time
+
+from backend.core.contracts import BookMsg, OrderBookMsg, TradeMsg, TradeTick, levels
+
+
+def _depth_frames(n: int, depth: int = 20):
+    rnd = random.Random(1)
+    out = []
+    for i in range(n):
+        mid = 60000 + rnd.uniform(-50, 50)
+        bids = [[f"{mid - 0.5 * k:.2f}", f"{rnd.uniform(0.01, 2):.5f}"] for k in range(depth)]
+        asks = [[f"{mid + 0.5 * k:.2f}", f"{rnd.uniform(0.01, 2):.5f}"] for k in range(depth)]
+        out.append(json.dumps({"lastUpdateId": i, "bids": bids, "asks": asks}))
+    return out
+
+
+def _trade_frames(n: int):
+    rnd = random.Random(2)
+    return [json.dumps({"e": "trade", "E": 1_700_000_000_000 + i, "s": "BTCUSDT",
+                        "p": f"{60000 + rnd.uniform(-50, 50):.2f}", "q": f"{rnd.uniform(0.001, 1):.5f}",
+                        "m": bool(i % 2)}) for i in range(n)]
+
+
+def book_pydantic(raw: str):
+    msg = json.loads(raw)
+    bids = [{"price": float(p), "size": float(q)} for p, q in msg.get("bids", [])]
+    asks = [{"price": float(p), "size": float(q)} for p, q in msg.get("asks", [])]
+    return OrderBookMsg(ts=0, symbol="BTCUSDT", bids=bids, asks=asks, snapshot=False).model_dump()
+
+
+def book_fast(raw: str):
+    msg = json.loads(raw)
+    return BookMsg(0, "BTCUSDT", levels(msg.get("bids", [])), levels(msg.get("asks", [])), False).model_dump()
+
+
+def trade_pydantic(raw: str):
+    msg = json.loads(raw)
+    return TradeMsg(ts=int(msg["E"]), symbol="BTCUSDT", price=float(msg["p"]), size=float(msg["q"]),
+                    side="buy" if msg.get("m") is False else "sell").model_dump()
+
+
+def trade_fast(raw: str):
+    msg = json.loads(raw)
+    return TradeTick(int(msg["E"]), "BTCUSDT", float(msg["p"]), float(msg["q"]),
+                     "buy" if msg.get("m") is False else "sell").model_dump()
+
+
+def _rate(fn, frames) -> float:
+    t = time.perf_counter()
+    for raw in frames:
+        fn(raw)
+    return len(frames) / (time.perf_counter() - t)
+
+
+def main(n: int = 20000) -> None:
+    depth = _depth_frames(n)
+    trades = _trade_frames(n)
+    for name, slow, fast, frames in (("depth20", book_pydantic, book_fast, depth),
+                                      ("trade", trade_pydantic, trade_fast, trades)):
+        assert slow(frames[0]) == fast(frames[0])
+        before = _rate(slow, frames)
+        after = _rate(fast, frames)
+        print(f"{name:8s} pydantic {before:12,.0f} msg/s   fast {after:12,.0f} msg/s   x{after / before:.2f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    main(ap.parse_args().n)
@@ -0,0 +1,32 @@
+"""bookTicker frames/sec per JSON backend available in backend.core.json_codec.
+
+    python -m backend.bench.bench_json [--n 200000]
+"""
+import argparse
+import json
+import time
+
+from backend.core import json_codec
+
+
+def main(n: int = 200000) -> None:
+    frames = [json.dumps({"stream": "btcusdt@bookTicker", "data": {
+        "u": i, "s": "BTCUSDT", "b": f"{60000 + i % 100:.2f}", "B": "1.25000", "a": f"{60000.01 + i % 100:.2f}", "A": "0.50000",
+    }}, separators=(",", ":")).encode() for i in range(n)]
+    current = json_codec.backend
+    try:
+        for name in json_codec.available():
+            json_codec.set_backend(name)
+            loads = json_codec.loads
+            t = time.perf_counter()
+            for raw in frames:
+                loads(raw)
+            print(f"{name:8s} {n / (time.perf_counter() - t):12,.0f} msg/s")
+    finally:
+        json_codec.set_backend(current)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200000)
+    main(ap.parse_args().n)
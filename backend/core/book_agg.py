@@ -1,9 +1,14 @@
 from __future__ import annotations
-from collections import defaultdict, deque
+from array import array
+from bisect import bisect_left
+from collections import deque
 from dataclasses import dataclass
+from decimal import Decimal
 from typing import Dict, List, Tuple, Iterable, Optional
 import time
 
+import numpy as np
+
 @dataclass
 class BookLevel:
     px: float
@@ -15,30 +20,151 @@ class BookSnapshot:
     bids: List[BookLevel]
     asks: List[BookLevel]
 
+@dataclass
+class BookDelta:
+    """Changed top-of-book levels since the previous emit; qty == 0 removes a level."""
+    ts: int
+    bids: List[BookLevel]
+    asks: List[BookLevel]
+
+@dataclass
+class ColumnarSnapshot:
+    """Top-of-book as float64 columns, best level first."""
+    ts: int
+    symbol: str
+    bid_px: np.ndarray
+    bid_qty: np.ndarray
+    ask_px: np.ndarray
+    ask_qty: np.ndarray
+
+    def packed(self, depth: int) -> np.ndarray:
+        """``(4, depth)`` array of bid_px, bid_qty, ask_px, ask_qty rows, NaN-padded."""
+        out = np.full((4, depth), np.nan)
+        for row, col in enumerate((self.bid_px, self.bid_qty, self.ask_px, self.ask_qty)):
+            n = min(depth, len(col))
+            out[row, :n] = col[:n]
+        return out
+
+class PriceLadder:
+    """One book side as parallel sorted arrays of integer tick keys and quantities.
+
+    Keys are tick offsets (``round(px / tick_size)``), negated on the ask side so
+    that for both sides the best level sits at the end of the arrays: lookups are
+    a bisect, updates near the touch move almost nothing, and top-k is a slice.
+    """
+    __slots__ = ("tick_size", "_sign", "_ndigits", "_keys", "_qtys", "_dirty", "_edge")
+
+    def __init__(self, tick_size: float, side: str):
+        self.tick_size = tick_size
+        self._sign = 1 if side == 'bid' else -1
+        self._ndigits = max(0, -Decimal(str(tick_size)).normalize().as_tuple().exponent)
+        self._keys = array('q')
+        self._qtys = array('d')
+        self._dirty: set = set()
+        self._edge: Optional[int] = None  # worst key inside the window at last emit
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _px(self, key: int) -> float:
+        return round(key * self._sign * self.tick_size, self._ndigits)
+
+    def set(self, px: float, qty: float) -> None:
+        key = self._sign * round(px / self.tick_size)
+        keys = self._keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if qty > 0:
+                if self._qtys[i] == qty:
+                    return
+                self._qtys[i] = qty
+            else:
+                del keys[i]
+                del self._qtys[i]
+        elif qty > 0:
+            keys.insert(i, key)
+            self._qtys.insert(i, qty)
+        else:
+            return
+        self._dirty.add(key)
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        if not self._keys:
+            return None
+        return self._px(self._keys[-1]), self._qtys[-1]
+
+    def top(self, k: int) -> List[Tuple[float, float]]:
+        """Best ``k`` levels, best first, in O(k)."""
+        if k <= 0:
+            return []
+        keys = self._keys[-k:]
+        qtys = self._qtys[-k:]
+        px = self._px
+        return [(px(keys[i]), qtys[i]) for i in range(len(keys) - 1, -1, -1)]
+
+    def top_arrays(self, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Best ``k`` levels as ``(px, qty)`` float64 arrays without per-level objects."""
+        if k <= 0 or not self._keys:
+            return np.empty(0), np.empty(0)
+        keys = np.frombuffer(self._keys[-k:], dtype=np.int64)[::-1]
+        px = np.round(keys * (self._sign * self.tick_size), self._ndigits)
+        qty = np.frombuffer(self._qtys[-k:], dtype=np.float64)[::-1].copy()
+        return px, qty
+
+    def _window_edge(self, k: int) -> Optional[int]:
+        # None -> fewer than k levels, the window covers the whole side
+        return self._keys[-k] if len(self._keys) >= k else None
+
+    def mark_emitted(self, k: int) -> None:
+        self._dirty.clear()
+        self._edge = self._window_edge(k)
+
+    def take_delta(self, k: int) -> List[Tuple[float, float]]:
+        """Levels a top-``k`` consumer must apply since the last emit.
+
+        Removals inside the previously emitted window, plus current-window levels
+        that changed or just entered the window (because better levels went away).
+        Cost is O(k + changed levels) regardless of the side's total depth.
+        """
+        keys = self._keys
+        old_edge = self._edge
+        new_edge = self._window_edge(k)
+        out: List[Tuple[float, float]] = []
+        dirty = self._dirty
+        for key in dirty:
+            if old_edge is not None and key < old_edge:
+                continue
+            i = bisect_left(keys, key)
+            if i == len(keys) or keys[i] != key:
+                out.append((self._px(key), 0.0))
+        start = max(0, len(keys) - k)
+        for i in range(len(keys) - 1, start - 1, -1):
+            key = keys[i]
+            if key in dirty or (old_edge is not None and key < old_edge):
+                out.append((self._px(key), self._qtys[i]))
+        self._dirty = set()
+        self._edge = new_edge
+        return out
+
 class OrderBookAgg:
     """Incremental L2 aggregator with coalescing + throttle window (e.g., 50–200ms)."""
-    def __init__(self, depth: int = 50, window_ms: int = 100):
+    def __init__(self, depth: int = 50, window_ms: int = 100, tick_size: float = 1e-8):
         self.depth = depth
         self.window_ms = window_ms
-        self._bids: Dict[float, float] = defaultdict(float)
-        self._asks: Dict[float, float] = defaultdict(float)
+        self._bids = PriceLadder(tick_size, 'bid')
+        self._asks = PriceLadder(tick_size, 'ask')
         self._last_emit_ms: int = 0
         self._pending = False
 
     def apply_delta(self, side: str, px: float, qty: float):
         book = self._bids if side == 'bid' else self._asks
-        if qty <= 0:
-            if px in book: del book[px]
-        else:
-            book[px] = qty
+        book.set(px, qty)
         self._pending = True
 
-    def _levels(self, book: Dict[float, float], reverse: bool) -> List[BookLevel]:
-        items = [(px, q) for px, q in book.items() if q > 0]
-        items.sort(key=lambda x: x[0], reverse=reverse)
-        return [BookLevel(px, qty) for px, qty in items[:self.depth]]
+    def _levels(self, book: PriceLadder) -> List[BookLevel]:
+        return [BookLevel(px, qty) for px, qty in book.top(self.depth)]
 
-    def maybe_emit(self, ts_ms: Optional[int] = None) -> Optional[BookSnapshot]:
+    def _due(self, ts_ms: Optional[int]) -> Optional[int]:
         now = int(time.time() * 1000) if ts_ms is None else ts_ms
         if not self._pending and now - self._last_emit_ms < self.window_ms:
             return None
@@ -46,8 +172,98 @@ class OrderBookAgg:
             return None
         self._last_emit_ms = now
         self._pending = False
+        return now
+
+    def maybe_emit(self, ts_ms: Optional[int] = None) -> Optional[BookSnapshot]:
+        now = self._due(ts_ms)
+        if now is None:
+            return None
+        self._bids.mark_emitted(self.depth)
+        self._asks.mark_emitted(self.depth)
         return BookSnapshot(
             ts=now,
-            bids=self._levels(self._bids, reverse=True),
-            asks=self._levels(self._asks, reverse=False),
+            bids=self._levels(self._bids),
+            asks=self._levels(self._asks),
+        )
+
+    def maybe_emit_columnar(self, symbol: str = "", ts_ms: Optional[int] = None) -> Optional[ColumnarSnapshot]:
+        """Like :meth:`maybe_emit`, but as NumPy columns instead of ``BookLevel`` lists."""
+        now = self._due(ts_ms)
+        if now is None:
+            return None
+        self._bids.mark_emitted(self.depth)
+        self._asks.mark_emitted(self.depth)
+        bid_px, bid_qty = self._bids.top_arrays(self.depth)
+        ask_px, ask_qty = self._asks.top_arrays(self.depth)
+        return ColumnarSnapshot(now, symbol, bid_px, bid_qty, ask_px, ask_qty)
+
+    def maybe_emit_delta(self, ts_ms: Optional[int] = None) -> Optional[BookDelta]:
+        """Like :meth:`maybe_emit`, but only the top-``depth`` levels that changed."""
+        now = self._due(ts_ms)
+        if now is None:
+            return None
+        return BookDelta(
+            ts=now,
+            bids=[BookLevel(px, qty) for px, qty in self._bids.take_delta(self.depth)],
+            asks=[BookLevel(px, qty) for px, qty in self._asks.take_delta(self.depth)],
         )
+
+class BookAggManager:
+    """Owns one :class:`OrderBookAgg` per symbol.
+
+    Deltas are coalesced into each symbol's ladder between emits; an emit only
+    visits symbols that changed since their last snapshot and whose ``window_ms``
+    throttle has elapsed, and returns NumPy columns per symbol (or one packed
+    array for all of them) instead of per-level Python objects.
+    """
+    def __init__(self, depth: int = 50, window_ms: int = 100, tick_size: float = 1e-8,
+                 tick_sizes: Optional[Dict[str, float]] = None):
+        self.depth = depth
+        self.window_ms = window_ms
+        self.tick_size = tick_size
+        self.tick_sizes = dict(tick_sizes or {})
+        self._books: Dict[str, OrderBookAgg] = {}
+        self._dirty: set = set()
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def book(self, symbol: str) -> OrderBookAgg:
+        agg = self._books.get(symbol)
+        if agg is None:
+            tick = self.tick_sizes.get(symbol, self.tick_size)
+            agg = self._books[symbol] = OrderBookAgg(self.depth, self.window_ms, tick)
+        return agg
+
+    def drop(self, symbol: str) -> None:
+        self._books.pop(symbol, None)
+        self._dirty.discard(symbol)
+
+    def apply_delta(self, symbol: str, side: str, px: float, qty: float) -> None:
+        self.book(symbol).apply_delta(side, px, qty)
+        self._dirty.add(symbol)
+
+    def apply_levels(self, symbol: str, side: str, levels: Iterable[Tuple[float, float]]) -> None:
+        agg = self.book(symbol)
+        for px, qty in levels:
+            agg.apply_delta(side, px, qty)
+        self._dirty.add(symbol)
+
+    def maybe_emit(self, ts_ms: Optional[int] = None) -> Dict[str, ColumnarSnapshot]:
+        now = int(time.time() * 1000) if ts_ms is None else ts_ms
+        out: Dict[str, ColumnarSnapshot] = {}
+        for symbol in list(self._dirty):
+            snap = self._books[symbol].maybe_emit_columnar(symbol, now)
+            if snap is not None:
+                out[symbol] = snap
+                self._dirty.discard(symbol)
+        return out
+
+    def maybe_emit_packed(self, ts_ms: Optional[int] = None) -> Tuple[List[str], np.ndarray]:
+        """Emitted symbols and one ``(n_symbols, 4, depth)`` float64 buffer."""
+        snaps = self.maybe_emit(ts_ms)
+        symbols = list(snaps)
+        buf = np.full((len(symbols), 4, self.depth), np.nan)
+        for i, symbol in enumerate(symbols):
+            buf[i] = snaps[symbol].packed(self.depth)
+        return symbols, buf
@@ -1,4 +1,4 @@
-from typing import Literal, Callable, Awaitable, Optional, List, Dict, Protocol
+from typing import Literal, Callable, Awaitable, Optional, List, Dict, Protocol, NamedTuple, Iterable, Any, Union
 from pydantic import BaseModel, Field
 
 DepthLevel = Literal["L2", "L3"]
@@ -21,6 +21,75 @@ class TradeMsg(BaseModel):
     size: float
     side: Literal["buy", "sell"]
 
+# --- Hot-path market data -------------------------------------------------
+# Adapters emit these instead of the pydantic models above: no validation and
+# no nested model per level. They keep the same attribute names (msg.bids[0].price)
+# and model_dump() output, and convert to pydantic only via to_model().
+
+class Level(NamedTuple):
+    price: float
+    size: float
+
+def levels(raw: Iterable[Any]) -> List[Level]:
+    """[[price, size, ...], ...] with str or float values -> list of Level."""
+    return [Level(float(row[0]), float(row[1])) for row in raw]
+
+class BookMsg:
+    __slots__ = ("ts", "symbol", "bids", "asks", "snapshot")
+
+    def __init__(self, ts: int, symbol: str, bids: List[Level], asks: List[Level], snapshot: bool = False):
+        self.ts = ts
+        self.symbol = symbol
+        self.bids = bids
+        self.asks = asks
+        self.snapshot = snapshot
+
+    def model_dump(self) -> Dict[str, Any]:
+        return {
+            "ts": self.ts, "symbol": self.symbol,
+            "bids": [{"price": p, "size": s} for p, s in self.bids],
+            "asks": [{"price": p, "size": s} for p, s in self.asks],
+            "snapshot": self.snapshot,
+        }
+
+    def to_model(self) -> OrderBookMsg:
+        return OrderBookMsg.model_validate(self.model_dump())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BookMsg):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"BookMsg(ts={self.ts}, symbol={self.symbol!r}, bids={len(self.bids)}, asks={len(self.asks)}, snapshot={self.snapshot})"
+
+class TradeTick:
+    __slots__ = ("ts", "symbol", "price", "size", "side")
+
+    def __init__(self, ts: int, symbol: str, price: float, size: float, side: str):
+        self.ts = ts
+        self.symbol = symbol
+        self.price = price
+        self.size = size
+        self.side = side
+
+    def model_dump(self) -> Dict[str, Any]:
+        return {"ts": self.ts, "symbol": self.symbol, "price": self.price, "size": self.size, "side": self.side}
+
+    def to_model(self) -> TradeMsg:
+        return TradeMsg.model_validate(self.model_dump())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TradeTick):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"TradeTick(ts={self.ts}, symbol={self.symbol!r}, price={self.price}, size={self.size}, side={self.side!r})"
+
+AnyBookMsg = Union[OrderBookMsg, BookMsg]
+AnyTradeMsg = Union[TradeMsg, TradeTick]
+
 class Candle(BaseModel):
     ts: int
     o: float; h: float; l: float; c: float; v: float
@@ -77,9 +146,9 @@ class ExchangeAdapter(Protocol):
     capabilities: Dict[str,bool]
 
     async def subscribe_book(self, symbol: str, depth: DepthLevel,
-                             cb: Callable[[OrderBookMsg], Awaitable[None]]) -> Unsub: ...
+                             cb: Callable[[AnyBookMsg], Awaitable[None]]) -> Unsub: ...
     async def subscribe_trades(self, symbol: str,
-                               cb: Callable[[TradeMsg], Awaitable[None]]) -> Unsub: ...
+                               cb: Callable[[AnyTradeMsg], Awaitable[None]]) -> Unsub: ...
     async def get_ohlcv(self, symbol: str, tf: str, since: Optional[int]=None,
                         limit: Optional[int]=None) -> List[Candle]: ...
 
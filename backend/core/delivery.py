@@ -0,0 +1,155 @@
+"""Per-subscriber delivery of market data from an adapter's socket reader.
+
+The reader calls ``push()``, which never awaits: each subscriber has its own
+task that runs the (possibly slow) callback, so a slow consumer can only fall
+behind on its own data and never stalls the exchange socket.
+
+* :class:`ConflatingDelivery` keeps only the latest undelivered value (books).
+  An optional ``merge`` folds a new value into the pending one instead, for
+  feeds where each message is a delta.
+* :class:`QueueDelivery` keeps a bounded FIFO and drops the oldest item when
+  full (trades).
+
+Conflations, drops and deliveries are counted per instance and exported as
+Prometheus counters labelled by exchange and channel.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from prometheus_client import Counter
+
+from .contracts import BookMsg
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[Any], Awaitable[None]]
+
+MD_DELIVERED = Counter("amadeus_md_delivered_total", "Market-data messages handed to subscriber callbacks", ["exchange", "channel"])
+MD_CONFLATED = Counter("amadeus_md_conflated_total", "Market-data messages replaced by a newer one before delivery", ["exchange", "channel"])
+MD_DROPPED = Counter("amadeus_md_dropped_total", "Market-data messages dropped from a full subscriber queue", ["exchange", "channel"])
+
+
+class _Delivery:
+    def __init__(self, cb: Callback, exchange: str = "", channel: str = ""):
+        self._cb = cb
+        self.exchange = exchange
+        self.channel = channel
+        self.delivered = 0
+        self.conflated = 0
+        self.dropped = 0
+        self._wake = asyncio.Event()
+        self._closed = False
+        self._m_delivered = MD_DELIVERED.labels(exchange, channel)
+        self._m_conflated = MD_CONFLATED.labels(exchange, channel)
+        self._m_dropped = MD_DROPPED.labels(exchange, channel)
+        self._task = asyncio.create_task(self._run())
+
+    def push(self, msg: Any) -> None:
+        raise NotImplementedError
+
+    def _take(self) -> Any:
+        raise NotImplementedError
+
+    def _has_pending(self) -> bool:
+        raise NotImplementedError
+
+    async def _run(self) -> None:
+        while not self._closed:
+            await self._wake.wait()
+            self._wake.clear()
+            while self._has_pending() and not self._closed:
+                msg = self._take()
+                try:
+                    await self._cb(msg)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("market-data callback failed (%s %s)", self.exchange, self.channel)
+                self.delivered += 1
+                self._m_delivered.inc()
+
+    def stats(self) -> Dict[str, int]:
+        return {"delivered": self.delivered, "conflated": self.conflated, "dropped": self.dropped}
+
+    def close(self) -> None:
+        self._closed = True
+        self._task.cancel()
+
+
+class ConflatingDelivery(_Delivery):
+    """Latest-value delivery: while the callback is busy, newer values replace the pending one."""
+
+    _EMPTY = object()
+
+    def __init__(self, cb: Callback, exchange: str = "", channel: str = "book",
+                 merge: Optional[Callable[[Any, Any], Any]] = None):
+        self._pending: Any = self._EMPTY
+        self._merge = merge
+        super().__init__(cb, exchange, channel)
+
+    def push(self, msg: Any) -> None:
+        if self._closed:
+            return
+        if self._pending is not self._EMPTY:
+            self.conflated += 1
+            self._m_conflated.inc()
+            if self._merge is not None:
+                msg = self._merge(self._pending, msg)
+        self._pending = msg
+        self._wake.set()
+
+    def _has_pending(self) -> bool:
+        return self._pending is not self._EMPTY
+
+    def _take(self) -> Any:
+        msg, self._pending = self._pending, self._EMPTY
+        return msg
+
+
+class QueueDelivery(_Delivery):
+    """Bounded FIFO delivery; when full the oldest message is dropped."""
+
+    def __init__(self, cb: Callback, exchange: str = "", channel: str = "trades", maxsize: int = 1000):
+        self._queue: Deque[Any] = deque()
+        self.maxsize = maxsize
+        super().__init__(cb, exchange, channel)
+
+    def push(self, msg: Any) -> None:
+        if self._closed:
+            return
+        if len(self._queue) >= self.maxsize:
+            self._queue.popleft()
+            self.dropped += 1
+            self._m_dropped.inc()
+        self._queue.append(msg)
+        self._wake.set()
+
+    def _has_pending(self) -> bool:
+        return bool(self._queue)
+
+    def _take(self) -> Any:
+        return self._queue.popleft()
+
+
+def merge_book(old: BookMsg, new: BookMsg) -> BookMsg:
+    """Fold book message ``new`` into the not-yet-delivered ``old``.
+
+    A snapshot replaces everything. A delta is applied level by level; on top
+    of a snapshot zero-size levels are removed, on top of another delta they
+    are kept so the consumer still sees the deletion.
+    """
+    if new.snapshot:
+        return new
+    sides = []
+    for old_levels, new_levels, best_first in ((old.bids, new.bids, True), (old.asks, new.asks, False)):
+        book = {lvl.price: lvl for lvl in old_levels}
+        for lvl in new_levels:
+            if old.snapshot and lvl.size <= 0:
+                book.pop(lvl.price, None)
+            else:
+                book[lvl.price] = lvl
+        sides.append(sorted(book.values(), key=lambda lvl: lvl.price, reverse=best_first))
+    return BookMsg(new.ts, new.symbol, sides[0], sides[1], old.snapshot)
@@ -0,0 +1,60 @@
+"""Shared, long-lived HTTP clients for exchange REST calls.
+
+Building an ``httpx.AsyncClient`` per request pays a TCP + TLS handshake every
+time. :func:`client` instead hands out one pooled client per base URL (keep-
+alive, bounded connections, HTTP/2 when the ``h2`` package is installed), so
+repeated candle or listenKey requests reuse a warm connection.
+
+Clients are bound to the event loop they were created on; a caller on a
+different loop gets a fresh one. :func:`aclose_all` is wired to application
+shutdown. Per-request credentials go in ``headers=`` on the request, never on
+the shared client.
+"""
+from __future__ import annotations
+import asyncio
+import importlib.util
+import logging
+from typing import Dict, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP2 = importlib.util.find_spec("h2") is not None
+LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+DEFAULT_TIMEOUT = 20.0
+
+_clients: Dict[str, Tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]] = {}
+
+
+def client(base_url: str) -> httpx.AsyncClient:
+    """Pooled client for ``base_url``, created on first use. Do not close it yourself.
+
+    Pass a different ``timeout=`` on the request if the default does not fit.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(base_url)
+    if entry is not None:
+        c, owner = entry
+        if owner is loop and not c.is_closed:
+            return c
+    c = httpx.AsyncClient(base_url=base_url, timeout=DEFAULT_TIMEOUT, limits=LIMITS, http2=HTTP2)
+    _clients[base_url] = (c, loop)
+    return c
+
+
+def open_clients() -> int:
+    return sum(1 for c, _ in _clients.values() if not c.is_closed)
+
+
+async def aclose_all() -> None:
+    """Close every client owned by the running loop (application shutdown)."""
+    loop = asyncio.get_running_loop()
+    for base_url, (c, owner) in list(_clients.items()):
+        if owner is not loop:
+            continue
+        del _clients[base_url]
+        try:
+            await c.aclose()
+        except Exception:
+            logger.warning("failed to close HTTP client for %s", base_url, exc_info=True)
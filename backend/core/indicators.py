@@ -0,0 +1,461 @@
+"""Streaming technical indicators with O(1) updates.
+
+Every indicator keeps its own fixed-size state (a ring buffer of the last
+``period`` inputs where a window is needed), so ``update(x)`` costs the same
+whether it has seen ten values or ten million. Rolling min/max use a
+monotonic deque and are amortised O(1).
+
+``peek(x)`` returns the value ``update(x)`` would produce without committing
+it, which is what a strategy needs for a still-forming bar.
+
+The ``*_batch`` functions compute the same series over whole NumPy arrays for
+warm-up and backtests; their last element matches the streaming value after
+feeding the same inputs.
+"""
+from __future__ import annotations
+import math
+from array import array
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+import numpy as np
+
+_NAN = float("nan")
+
+
+class RingBuffer:
+    """Fixed-capacity float buffer; ``push`` returns the evicted value, or None while filling."""
+    __slots__ = ("capacity", "_buf", "_i", "_n")
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._buf = array('d', bytes(8 * capacity))
+        self._i = 0
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def full(self) -> bool:
+        return self._n == self.capacity
+
+    def push(self, x: float) -> Optional[float]:
+        i = self._i
+        old = self._buf[i] if self._n == self.capacity else None
+        self._buf[i] = x
+        self._i = i + 1 if i + 1 < self.capacity else 0
+        if old is None:
+            self._n += 1
+        return old
+
+    def oldest(self) -> float:
+        if not self._n:
+            raise IndexError("empty ring buffer")
+        return self._buf[self._i if self._n == self.capacity else 0]
+
+    def values(self) -> np.ndarray:
+        """Contents oldest first (a copy)."""
+        buf = np.frombuffer(self._buf, dtype=np.float64)
+        if self._n < self.capacity:
+            return buf[:self._n].copy()
+        return np.concatenate((buf[self._i:], buf[:self._i]))
+
+
+class EMA:
+    """Exponential moving average, ``alpha = 2 / (period + 1)``, seeded with the first input."""
+    __slots__ = ("period", "alpha", "value", "count")
+
+    def __init__(self, period: int, alpha: Optional[float] = None):
+        if period <= 0:
+            raise ValueError("period must be positive")
+        self.period = period
+        self.alpha = 2.0 / (period + 1) if alpha is None else alpha
+        self.value: Optional[float] = None
+        self.count = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.period
+
+    def update(self, x: float) -> float:
+        self.count += 1
+        v = self.value
+        self.value = x if v is None else v + self.alpha * (x - v)
+        return self.value
+
+    def peek(self, x: float) -> float:
+        v = self.value
+        return x if v is None else v + self.alpha * (x - v)
+
+
+class SMA:
+    """Simple moving average over the last ``period`` inputs; the mean of what it has until then."""
+    __slots__ = ("period", "_ring", "_sum")
+
+    def __init__(self, period: int):
+        self.period = period
+        self._ring = RingBuffer(period)
+        self._sum = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._ring.full
+
+    @property
+    def value(self) -> Optional[float]:
+        n = len(self._ring)
+        return self._sum / n if n else None
+
+    def update(self, x: float) -> float:
+        old = self._ring.push(x)
+        self._sum += x if old is None else x - old
+        return self._sum / len(self._ring)
+
+    def peek(self, x: float) -> float:
+        ring = self._ring
+        if ring.full:
+            return (self._sum + x - ring.oldest()) / ring.capacity
+        return (self._sum + x) / (len(ring) + 1)
+
+
+class RollingStats:
+    """Rolling mean / population variance / stdev over ``period`` inputs (windowed Welford)."""
+    __slots__ = ("period", "_ring", "mean", "_m2")
+
+    def __init__(self, period: int):
+        self.period = period
+        self._ring = RingBuffer(period)
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._ring.full
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def update(self, x: float) -> float:
+        """Add ``x``; returns the stdev."""
+        old = self._ring.push(x)
+        mean = self.mean
+        if old is None:
+            n = len(self._ring)
+            delta = x - mean
+            mean += delta / n
+            self._m2 += delta * (x - mean)
+        else:
+            new_mean = mean + (x - old) / self.period
+            self._m2 += (x - old) * (x - new_mean + old - mean)
+            mean = new_mean
+        self.mean = mean
+        return self.std
+
+    @property
+    def var(self) -> float:
+        n = len(self._ring)
+        return max(self._m2, 0.0) / n if n else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+
+class ATR:
+    """Average true range with Wilder smoothing; the first ``period`` ranges are averaged."""
+    __slots__ = ("period", "value", "_prev_close", "_count", "_sum")
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.value: Optional[float] = None
+        self._prev_close: Optional[float] = None
+        self._count = 0
+        self._sum = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._count >= self.period
+
+    def update(self, high: float, low: float, close: float) -> float:
+        pc = self._prev_close
+        tr = high - low if pc is None else max(high - low, abs(high - pc), abs(low - pc))
+        self._prev_close = close
+        self._count += 1
+        if self._count <= self.period:
+            self._sum += tr
+            self.value = self._sum / self._count
+        else:
+            self.value += (tr - self.value) / self.period
+        return self.value
+
+
+class VWAP:
+    """Volume-weighted average price; cumulative, or over the last ``window`` prints."""
+    __slots__ = ("window", "_pv", "_v", "_pv_ring", "_v_ring")
+
+    def __init__(self, window: Optional[int] = None):
+        self.window = window
+        self._pv = 0.0
+        self._v = 0.0
+        self._pv_ring = RingBuffer(window) if window else None
+        self._v_ring = RingBuffer(window) if window else None
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._pv / self._v if self._v > 0 else None
+
+    def update(self, price: float, qty: float) -> Optional[float]:
+        pv = price * qty
+        self._pv += pv
+        self._v += qty
+        if self._pv_ring is not None:
+            old_pv = self._pv_ring.push(pv)
+            old_v = self._v_ring.push(qty)
+            if old_pv is not None:
+                self._pv -= old_pv
+                self._v -= old_v
+        return self.value
+
+    def reset(self) -> None:
+        """Start a new session (e.g. at the daily boundary)."""
+        self._pv = self._v = 0.0
+        if self._pv_ring is not None:
+            self._pv_ring = RingBuffer(self.window)
+            self._v_ring = RingBuffer(self.window)
+
+
+class _RollingExtreme:
+    __slots__ = ("period", "_q", "_t")
+    _better = staticmethod(lambda a, b: a >= b)
+
+    def __init__(self, period: int):
+        self.period = period
+        self._q: Deque[Tuple[int, float]] = deque()
+        self._t = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._t >= self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._q[0][1] if self._q else None
+
+    def update(self, x: float) -> float:
+        q = self._q
+        better = self._better
+        while q and better(x, q[-1][1]):
+            q.pop()
+        q.append((self._t, x))
+        self._t += 1
+        if q[0][0] <= self._t - 1 - self.period:
+            q.popleft()
+        return q[0][1]
+
+
+class RollingMax(_RollingExtreme):
+    """Maximum of the last ``period`` inputs (monotonic deque)."""
+    __slots__ = ()
+
+
+class RollingMin(_RollingExtreme):
+    """Minimum of the last ``period`` inputs (monotonic deque)."""
+    __slots__ = ()
+    _better = staticmethod(lambda a, b: a <= b)
+
+
+class RealizedVol:
+    """Rolling volatility of simple returns between consecutive prices.
+
+    ``value`` is the stdev of the last ``period`` returns, ``mean_abs`` their
+    mean absolute size; both are per-step fractions (multiply by 1e4 for bps).
+    Non-positive previous prices produce a zero return.
+    """
+    __slots__ = ("period", "_prev", "_stats", "_abs")
+
+    def __init__(self, period: int):
+        self.period = period
+        self._prev: Optional[float] = None
+        self._stats = RollingStats(period)
+        self._abs = SMA(period)
+
+    @property
+    def ready(self) -> bool:
+        return self._stats.ready
+
+    @property
+    def value(self) -> float:
+        return self._stats.std
+
+    @property
+    def mean_abs(self) -> float:
+        return self._abs.value or 0.0
+
+    def update(self, price: float) -> float:
+        prev, self._prev = self._prev, price
+        if prev is None:
+            return 0.0
+        r = (price - prev) / prev if prev > 0 else 0.0
+        self._abs.update(abs(r))
+        return self._stats.update(r)
+
+
+# --- batch (NumPy) ----------------------------------------------------------
+
+def _ewm(x: np.ndarray, alpha: float, seed: float) -> np.ndarray:
+    """``y[i] = y[i-1] + alpha * (x[i] - y[i-1])`` with ``y[-1] = seed``, vectorised per block.
+
+    Within a block ``y[j] = a**(j+1) * y0 + alpha * a**j * cumsum(x * a**-i)``;
+    the block length keeps ``a**-i`` far from overflow.
+    """
+    a = 1.0 - alpha
+    n = len(x)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    if a <= 0.0:
+        out[:] = x
+        return out
+    block = n if a >= 1.0 else max(1, min(n, int(300.0 / -math.log10(a))))
+    powers = a ** np.arange(block + 1)
+    inv = 1.0 / powers[:block]
+    y0 = seed
+    for s in range(0, n, block):
+        xb = x[s:s + block]
+        m = len(xb)
+        acc = np.cumsum(xb * inv[:m])
+        yb = powers[1:m + 1] * y0 + alpha * powers[:m] * acc
+        out[s:s + m] = yb
+        y0 = yb[-1]
+    return out
+
+
+def ema_batch(x, period: int) -> np.ndarray:
+    """EMA series matching :class:`EMA` fed with ``x`` in order."""
+    x = np.asarray(x, dtype=np.float64)
+    if not len(x):
+        return np.empty(0)
+    out = np.empty(len(x))
+    out[0] = x[0]
+    out[1:] = _ewm(x[1:], 2.0 / (period + 1), x[0])
+    return out
+
+
+def sma_batch(x, period: int) -> np.ndarray:
+    """Rolling mean; NaN until ``period`` inputs are available."""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), _NAN)
+    if len(x) >= period:
+        c = np.cumsum(np.concatenate(([0.0], x)))
+        out[period - 1:] = (c[period:] - c[:-period]) / period
+    return out
+
+
+def rolling_std_batch(x, period: int) -> np.ndarray:
+    """Rolling population stdev; NaN until ``period`` inputs are available."""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), _NAN)
+    if len(x) >= period:
+        out[period - 1:] = np.lib.stride_tricks.sliding_window_view(x, period).std(axis=1)
+    return out
+
+
+def rolling_max_batch(x, period: int) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), _NAN)
+    if len(x) >= period:
+        out[period - 1:] = np.lib.stride_tricks.sliding_window_view(x, period).max(axis=1)
+    return out
+
+
+def rolling_min_batch(x, period: int) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), _NAN)
+    if len(x) >= period:
+        out[period - 1:] = np.lib.stride_tricks.sliding_window_view(x, period).min(axis=1)
+    return out
+
+
+def true_range_batch(high, low, close) -> np.ndarray:
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    tr = high - low
+    if len(tr) > 1:
+        pc = close[:-1]
+        tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - pc), np.abs(low[1:] - pc)))
+    return tr
+
+
+def atr_batch(high, low, close, period: int = 14) -> np.ndarray:
+    """ATR series matching :class:`ATR` fed bar by bar."""
+    tr = true_range_batch(high, low, close)
+    n = len(tr)
+    out = np.empty(n)
+    head = min(n, period)
+    out[:head] = np.cumsum(tr[:head]) / np.arange(1, head + 1)
+    if n > period:
+        out[period:] = _ewm(tr[period:], 1.0 / period, out[period - 1])
+    return out
+
+
+def vwap_batch(price, qty, window: Optional[int] = None) -> np.ndarray:
+    """Cumulative (or rolling ``window``) VWAP; NaN while no volume has traded."""
+    price = np.asarray(price, dtype=np.float64)
+    qty = np.asarray(qty, dtype=np.float64)
+    pv = np.cumsum(np.concatenate(([0.0], price * qty)))
+    v = np.cumsum(np.concatenate(([0.0], qty)))
+    if window:
+        lo = np.maximum(np.arange(1, len(price) + 1) - window, 0)
+        pv = pv[1:] - pv[lo]
+        v = v[1:] - v[lo]
+    else:
+        pv, v = pv[1:], v[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(v > 0, pv / v, _NAN)
+
+
+def returns_batch(prices) -> np.ndarray:
+    """Simple returns between consecutive prices; zero where the previous price is not positive."""
+    p = np.asarray(prices, dtype=np.float64)
+    if len(p) < 2:
+        return np.empty(0)
+    prev = p[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(prev > 0, (p[1:] - prev) / prev, 0.0)
+
+
+def realized_vol_batch(prices, period: Optional[int] = None) -> float:
+    """Stdev of the last ``period`` returns (all of them if ``period`` is None)."""
+    r = returns_batch(prices)
+    if period:
+        r = r[-period:]
+    return float(r.std()) if len(r) else 0.0
+
+
+def mean_abs_return(prices, period: Optional[int] = None) -> float:
+    """Mean absolute return over the last ``period`` steps (all of them if None)."""
+    r = returns_batch(prices)
+    if period:
+        r = r[-period:]
+    return float(np.abs(r).mean()) if len(r) else 0.0
+
+
+def mean_abs_return_rows(prices) -> np.ndarray:
+    """Row-wise :func:`mean_abs_return` of a 2-D array; NaN marks missing prices.
+
+    Each row is averaged over its consecutive pairs where both prices are
+    present; rows with no such pair give 0.
+    """
+    p = np.asarray(prices, dtype=np.float64)
+    if p.ndim != 2 or p.shape[1] < 2:
+        return np.zeros(p.shape[0] if p.ndim else 0)
+    prev, cur = p[:, :-1], p[:, 1:]
+    valid = np.isfinite(prev) & np.isfinite(cur)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(valid & (prev > 0), np.abs(cur - prev) / prev, 0.0)
+    n = valid.sum(axis=1)
+    return np.where(n > 0, r.sum(axis=1) / np.maximum(n, 1), 0.0)
@@ -0,0 +1,120 @@
+"""Shared JSON decoding for websocket ingestion.
+
+``loads`` uses the fastest parser that is installed (orjson, then msgspec,
+then the stdlib) and accepts both ``str`` and ``bytes`` frames. Call it as
+``json_codec.loads(...)`` so that :func:`set_backend` takes effect everywhere.
+
+``decode_trade`` / ``decode_depth`` decode Binance trade and depth frames
+straight into the hot-path :class:`TradeTick` / :class:`BookMsg` types; with
+msgspec available this skips the intermediate dicts entirely.
+"""
+from __future__ import annotations
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .contracts import BookMsg, Level, TradeTick
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+Raw = Union[str, bytes, bytearray, memoryview]
+
+_BACKENDS: Dict[str, Callable[[Raw], Any]] = {"json": json.loads}
+if msgspec is not None:
+    _BACKENDS["msgspec"] = msgspec.json.Decoder().decode
+if orjson is not None:
+    _BACKENDS["orjson"] = orjson.loads
+
+backend: str = "json"
+loads: Callable[[Raw], Any] = json.loads
+
+
+def set_backend(name: Optional[str] = None) -> str:
+    """Switch the decoder; ``None`` picks the fastest available. Returns the name in use."""
+    global backend, loads
+    if name is None:
+        name = next(n for n in ("orjson", "msgspec", "json") if n in _BACKENDS)
+    if name not in _BACKENDS:
+        raise ValueError(f"JSON backend not available: {name} (have {sorted(_BACKENDS)})")
+    backend, loads = name, _BACKENDS[name]
+    return name
+
+
+def available() -> List[str]:
+    return sorted(_BACKENDS)
+
+
+if orjson is not None:
+    def dumps(obj: Any) -> str:
+        """Compact JSON text (same output shape as ``json.dumps(obj, separators=(",", ":"))``)."""
+        return orjson.dumps(obj).decode()
+else:
+    def dumps(obj: Any) -> str:
+        """Compact JSON text (same output shape as ``json.dumps(obj, separators=(",", ":"))``)."""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+set_backend()
+
+
+# --- typed decode -----------------------------------------------------------
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+if msgspec is not None:
+    class _Trade(msgspec.Struct):
+        p: str
+        q: str
+        E: int = 0
+        m: Optional[bool] = None
+
+    class _Depth(msgspec.Struct):
+        E: int = 0
+        b: Optional[List[List[str]]] = None
+        a: Optional[List[List[str]]] = None
+        bids: Optional[List[List[str]]] = None
+        asks: Optional[List[List[str]]] = None
+
+    _trade_decoder = msgspec.json.Decoder(_Trade)
+    _depth_decoder = msgspec.json.Decoder(_Depth)
+
+    def decode_trade(raw: Raw, symbol: str) -> TradeTick:
+        t = _trade_decoder.decode(raw)
+        return TradeTick(t.E or _now_ms(), symbol, float(t.p), float(t.q), "buy" if t.m is False else "sell")
+
+    def decode_depth(raw: Raw, symbol: str) -> BookMsg:
+        d = _depth_decoder.decode(raw)
+        bids = d.b if d.b is not None else d.bids or []
+        asks = d.a if d.a is not None else d.asks or []
+        return BookMsg(
+            d.E or _now_ms(), symbol,
+            [Level(float(r[0]), float(r[1])) for r in bids],
+            [Level(float(r[0]), float(r[1])) for r in asks],
+            False,
+        )
+else:
+    def decode_trade(raw: Raw, symbol: str) -> TradeTick:
+        msg = loads(raw)
+        return TradeTick(int(msg.get("E") or _now_ms()), symbol, float(msg["p"]), float(msg["q"]),
+                         "buy" if msg.get("m") is False else "sell")
+
+    def decode_depth(raw: Raw, symbol: str) -> BookMsg:
+        msg = loads(raw)
+        bids = msg["b"] if "b" in msg else msg.get("bids") or []
+        asks = msg["a"] if "a" in msg else msg.get("asks") or []
+        return BookMsg(
+            int(msg.get("E") or _now_ms()), symbol,
+            [Level(float(r[0]), float(r[1])) for r in bids],
+            [Level(float(r[0]), float(r[1])) for r in asks],
+            False,
+        )
@@ -0,0 +1,126 @@
+"""In-process market-data hub shared by all /market websocket clients.
+
+One upstream adapter subscription per (exchange, category, symbol, channel):
+the first client opens it, the last one to leave tears it down. Every
+upstream message is serialised to JSON text once and fanned out to the
+clients, each through its own delivery (conflating for books, bounded queue
+for trades) so one slow browser never holds back the others.
+"""
+from __future__ import annotations
+import asyncio
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from . import json_codec
+from .delivery import ConflatingDelivery, QueueDelivery
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str, str, str]        # exchange, category, symbol, channel
+Send = Callable[[str], Awaitable[Any]]
+
+CHANNELS = {"book": "book", "trades": "trade"}   # channel -> "type" field of the pushed message
+
+
+class _Topic:
+    __slots__ = ("key", "clients", "unsub", "sent")
+
+    def __init__(self, key: Key):
+        self.key = key
+        self.clients: Dict[int, Any] = {}
+        self.unsub: Optional[Callable[[], Any]] = None
+        self.sent = 0
+
+
+class MarketDataHub:
+    def __init__(self, get_adapter: Optional[Callable[[str, str], Any]] = None):
+        if get_adapter is None:
+            from backend.adapters.registry import get_adapter
+        self._get_adapter = get_adapter
+        self._topics: Dict[Key, _Topic] = {}
+        self._lock = asyncio.Lock()
+        self._ids = 0
+
+    def upstream_count(self) -> int:
+        return sum(1 for t in self._topics.values() if t.unsub is not None)
+
+    def client_count(self, key: Optional[Key] = None) -> int:
+        if key is not None:
+            t = self._topics.get(key)
+            return len(t.clients) if t else 0
+        return sum(len(t.clients) for t in self._topics.values())
+
+    async def subscribe(self, exchange: str, category: str, symbol: str, channel: str,
+                        send: Send) -> Callable[[], Awaitable[None]]:
+        """Register ``send(text)`` for a topic; returns an async unsubscribe."""
+        if channel not in CHANNELS:
+            raise ValueError(f"unknown channel: {channel}")
+        key = (exchange, category, symbol, channel)
+        self._ids += 1
+        cid = self._ids
+        if channel == "book":
+            delivery = ConflatingDelivery(send, exchange, "ws_book")
+        else:
+            delivery = QueueDelivery(send, exchange, "ws_trades")
+        async with self._lock:
+            topic = self._topics.get(key)
+            if topic is None:
+                topic = self._topics[key] = _Topic(key)
+            topic.clients[cid] = delivery
+            if topic.unsub is None:
+                try:
+                    topic.unsub = await self._open(topic)
+                except Exception:
+                    del topic.clients[cid]
+                    if not topic.clients:
+                        self._topics.pop(key, None)
+                    delivery.close()
+                    raise
+
+        async def _unsubscribe() -> None:
+            await self._leave(key, cid)
+        return _unsubscribe
+
+    async def _open(self, topic: _Topic) -> Callable[[], Any]:
+        exchange, category, symbol, channel = topic.key
+        adapter = self._get_adapter(exchange, category)
+        kind = CHANNELS[channel]
+
+        async def _on_msg(msg: Any) -> None:
+            text = json_codec.dumps({"type": kind, "exchange": exchange, **msg.model_dump()})
+            topic.sent += 1
+            for delivery in tuple(topic.clients.values()):
+                delivery.push(text)
+
+        if channel == "book":
+            return await adapter.subscribe_book(symbol, "L2", _on_msg)
+        return await adapter.subscribe_trades(symbol, _on_msg)
+
+    async def _leave(self, key: Key, cid: int) -> None:
+        async with self._lock:
+            topic = self._topics.get(key)
+            if topic is None:
+                return
+            delivery = topic.clients.pop(cid, None)
+            if delivery is not None:
+                delivery.close()
+            if topic.clients:
+                return
+            del self._topics[key]
+            unsub, topic.unsub = topic.unsub, None
+        if unsub is not None:
+            try:
+                result = unsub()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.warning("upstream unsubscribe failed for %s", key, exc_info=True)
+
+    async def close(self) -> None:
+        for key, topic in list(self._topics.items()):
+            for cid in list(topic.clients):
+                await self._leave(key, cid)
+
+
+hub = MarketDataHub()
@@ -0,0 +1,254 @@
+from __future__ import annotations
+import glob
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Deque, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# One record inside a compressed block: receive time (ns since epoch), stream name length, payload length
+_REC = struct.Struct("<qHI")
+# One entry of the sidecar .idx file per block: min ts, max ts, offset, compressed length, record count
+_IDX = struct.Struct("<qqQII")
+
+SEGMENT_SUFFIX = ".rec.gz"
+INDEX_SUFFIX = ".idx"
+
+
+class CapturedFrame(NamedTuple):
+    ts_ns: int
+    stream: str
+    raw: bytes
+
+
+def _gzip_member(data: bytes, level: int) -> bytes:
+    # each block is a complete gzip member: the segment stays readable with plain `zcat`
+    c = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return c.compress(data) + c.flush()
+
+
+class MarketRecorder:
+    """Append-only capture of raw market-data frames.
+
+    ``record()`` only appends to an in-memory queue, so it is safe to call from
+    the event loop on every frame. A background thread drains the queue every
+    ``flush_interval`` seconds (or once ``batch_size`` frames are pending) and
+    writes the batch as one gzip member into the current segment, plus one
+    fixed-size entry with the block's time range and offset into the segment's
+    ``.idx`` file. Nothing is fsync'ed; a crash loses at most the unflushed batch.
+
+    Segments rotate by size and by age; file names carry the creation time, so
+    a lexicographic sort is also chronological.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            prefix: str = "capture",
+            max_segment_bytes: int = 256 * 1024 * 1024,
+            max_segment_age_s: float = 3600.0,
+            flush_interval: float = 0.5,
+            batch_size: int = 5000,
+            max_pending: int = 1_000_000,
+            compress_level: int = 6,
+    ):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age_s = max_segment_age_s
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.compress_level = compress_level
+
+        self.recorded = 0
+        self.dropped = 0
+        self.segments = 0
+
+        self._pending: Deque[Tuple[int, str, bytes]] = deque()
+        self._wake = threading.Event()
+        self._stop = False
+        self._seq = 0
+        self._seg = None
+        self._idx = None
+        self._seg_opened = 0.0
+        self._seg_size = 0
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._loop, name=f"recorder-{prefix}", daemon=True)
+        self._thread.start()
+
+    # ----------------- producer side -----------------
+    def record(self, stream: str, raw: Union[str, bytes], ts_ns: Optional[int] = None) -> None:
+        if self._stop:
+            return
+        if len(self._pending) >= self.max_pending:
+            # writer is behind; never block or grow the feed handler's memory unbounded
+            self.dropped += 1
+            return
+        if isinstance(raw, str):
+            raw = raw.encode()
+        self._pending.append((time.time_ns() if ts_ns is None else ts_ns, stream, raw))
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def close(self) -> None:
+        if self._stop:
+            return
+        self._stop = True
+        self._wake.set()
+        self._thread.join()
+
+    def __enter__(self) -> "MarketRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # ----------------- writer thread -----------------
+    def _loop(self) -> None:
+        try:
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                stopping = self._stop
+                while self._pending:
+                    self._write_batch()
+                if self._seg is not None and time.time() - self._seg_opened >= self.max_segment_age_s:
+                    self._close_segment()
+                if stopping:
+                    break
+        except Exception:
+            logger.exception("market recorder writer failed")
+        finally:
+            self._close_segment()
+
+    def _write_batch(self) -> None:
+        pending = self._pending
+        parts: List[bytes] = []
+        # records may arrive out of order: index the real min/max of the block
+        first_ts = last_ts = 0
+        n = 0
+        while pending and n < self.batch_size:
+            ts, stream, raw = pending.popleft()
+            name = stream.encode()
+            parts.append(_REC.pack(ts, len(name), len(raw)))
+            parts.append(name)
+            parts.append(raw)
+            if n == 0:
+                first_ts = last_ts = ts
+            else:
+                first_ts = min(first_ts, ts)
+                last_ts = max(last_ts, ts)
+            n += 1
+        if not n:
+            return
+        block = _gzip_member(b"".join(parts), self.compress_level)
+        if self._seg is None:
+            self._open_segment()
+        offset = self._seg_size
+        self._seg.write(block)
+        self._seg.flush()
+        self._idx.write(_IDX.pack(first_ts, last_ts, offset, len(block), n))
+        self._idx.flush()
+        self._seg_size += len(block)
+        self.recorded += n
+        if self._seg_size >= self.max_segment_bytes:
+            self._close_segment()
+
+    def _open_segment(self) -> None:
+        self._seq += 1
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        base = os.path.join(self.directory, f"{self.prefix}-{stamp}-{self._seq:04d}")
+        self._seg = open(base + SEGMENT_SUFFIX, "ab")
+        self._idx = open(base + INDEX_SUFFIX, "ab")
+        self._seg_size = self._seg.tell()
+        self._seg_opened = time.time()
+        self.segments += 1
+
+    def _close_segment(self) -> None:
+        for f in (self._seg, self._idx):
+            if f is not None:
+                try:
+                    f.close()
+                except Exception:
+                    logger.warning("failed to close capture file", exc_info=True)
+        self._seg = self._idx = None
+
+
+class CaptureReader:
+    """Reads segments written by :class:`MarketRecorder`.
+
+    A time range is located through the ``.idx`` files: whole segments and
+    blocks outside ``[start_ns, end_ns]`` are skipped without being read or
+    decompressed.
+    """
+
+    def __init__(self, directory: str, prefix: str = "capture"):
+        self.directory = directory
+        self.prefix = prefix
+
+    def segments(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, f"{self.prefix}-*{SEGMENT_SUFFIX}")))
+
+    @staticmethod
+    def index(segment: str) -> List[Tuple[int, int, int, int, int]]:
+        path = segment[: -len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        # a trailing partial entry means the writer was interrupted mid-write
+        usable = len(data) - len(data) % _IDX.size
+        return [_IDX.unpack_from(data, off) for off in range(0, usable, _IDX.size)]
+
+    def time_range(self) -> Optional[Tuple[int, int]]:
+        lo = hi = None
+        for seg in self.segments():
+            for first, last, *_ in self.index(seg):
+                lo = first if lo is None else min(lo, first)
+                hi = last if hi is None else max(hi, last)
+        return None if lo is None else (lo, hi)
+
+    def read(
+            self,
+            start_ns: Optional[int] = None,
+            end_ns: Optional[int] = None,
+            streams: Optional[set] = None,
+    ) -> Iterator[CapturedFrame]:
+        for seg in self.segments():
+            blocks = [
+                b for b in self.index(seg)
+                if (start_ns is None or b[1] >= start_ns) and (end_ns is None or b[0] <= end_ns)
+            ]
+            if not blocks:
+                continue
+            with open(seg, "rb") as f:
+                for _first, _last, offset, length, _count in blocks:
+                    f.seek(offset)
+                    data = zlib.decompress(f.read(length), 31)
+                    yield from self._frames(data, start_ns, end_ns, streams)
+
+    @staticmethod
+    def _frames(data: bytes, start_ns, end_ns, streams) -> Iterator[CapturedFrame]:
+        pos = 0
+        end = len(data)
+        while pos < end:
+            ts, name_len, raw_len = _REC.unpack_from(data, pos)
+            pos += _REC.size
+            stream = data[pos:pos + name_len].decode()
+            pos += name_len
+            raw = data[pos:pos + raw_len]
+            pos += raw_len
+            if start_ns is not None and ts < start_ns:
+                continue
+            if end_ns is not None and ts > end_ns:
+                continue
+            if streams is not None and stream not in streams:
+                continue
+            yield CapturedFrame(ts, stream, raw)
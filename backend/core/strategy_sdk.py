@@ -1,5 +1,5 @@
 from typing import Protocol, Any, Optional, Dict, Literal
-from .contracts import OrderBookMsg, TradeMsg
+from .contracts import AnyBookMsg, AnyTradeMsg
 
 class StrategyContext(Protocol):
     md: Any
@@ -18,5 +18,5 @@ class StrategyPlugin(Protocol):
     async def on_start(self) -> None: ...
     async def on_stop(self) -> None: ...
     async def on_tick(self, symbol: str) -> None: ...
-    async def on_book(self, msg: OrderBookMsg) -> None: ...
-    async def on_trade(self, msg: TradeMsg) -> None: ...
+    async def on_book(self, msg: AnyBookMsg) -> None: ...
+    async def on_trade(self, msg: AnyTradeMsg) -> None: ...
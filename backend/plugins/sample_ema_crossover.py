@@ -1,13 +1,10 @@
 import time
 from typing import Dict, Any, List
 from backend.core.strategy_sdk import StrategyPlugin, StrategyContext
+from backend.core.indicators import EMA, ema_batch
 
 def ema(series: List[float], period: int) -> float:
-    k = 2/(period+1)
-    e = series[0]
-    for x in series[1:]:
-        e = x * k + e * (1-k)
-    return e
+    return float(ema_batch(series, period)[-1])
 
 class SampleEmaCrossover(StrategyPlugin):
     id = "sample_ema_crossover"
@@ -26,11 +23,15 @@ class SampleEmaCrossover(StrategyPlugin):
     def __init__(self):
         self.ctx: StrategyContext | None = None
         self.cfg: Dict[str, Any] = {}
-        self.prices: List[float] = []
+        self.short: EMA | None = None
+        self.long: EMA | None = None
 
     async def init(self, ctx: StrategyContext, config: Dict[str, Any]) -> None:
         self.ctx = ctx
         self.cfg = config
+        # EMAs are updated in O(1) per price instead of being recomputed over a price list
+        self.short = EMA(self.cfg["short"])
+        self.long = EMA(self.cfg["long"])
 
     async def on_start(self) -> None:
         self.ctx.logger.info(f"[ema] start {self.cfg}")
@@ -57,25 +58,22 @@ class SampleEmaCrossover(StrategyPlugin):
         elif msg.asks:
             price = msg.asks[0].price
         if price is not None:
-            self.prices.append(price)
-            self._trim_prices()
+            self._add_price(price)
         await self._evaluate()
 
     async def on_trade(self, msg) -> None:
-        self.prices.append(msg.price)
-        self._trim_prices()
+        self._add_price(msg.price)
         await self._evaluate()
 
-    def _trim_prices(self) -> None:
-        maxlen = max(self.cfg["short"], self.cfg["long"]) * 4
-        if len(self.prices) > maxlen:
-            self.prices = self.prices[-maxlen:]
+    def _add_price(self, price: float) -> None:
+        self.short.update(price)
+        self.long.update(price)
 
     async def _evaluate(self) -> None:
-        if len(self.prices) < self.cfg["long"] + 2:
+        if self.long.count < self.cfg["long"] + 2:
             return
-        s = ema(self.prices[-self.cfg["short"]:], self.cfg["short"])
-        l = ema(self.prices[-self.cfg["long"]:], self.cfg["long"])
+        s = self.short.value
+        l = self.long.value
         if s > l:
             await self.ctx.trader.place_order({"symbol": self.cfg["symbol"], "side": "buy", "qty": self.cfg["qty"]})
         elif s < l:
@@ -0,0 +1,63 @@
+import json, websockets
+from urllib.parse import urlparse, parse_qs
+
+
+class BinanceStreamMock:
+    """Local stand-in for Binance combined streams (/stream?streams=...).
+
+    Handles SUBSCRIBE/UNSUBSCRIBE control frames and lets tests push
+    `{"stream": ..., "data": ...}` frames to every subscribed connection.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host; self.port = port
+        self.connections = 0          # total accepted connections
+        self.control = []             # received control frames
+        self._subs = {}               # websocket -> set of streams
+        self._server = None
+
+    async def _handler(self, websocket):
+        self.connections += 1
+        query = parse_qs(urlparse(websocket.request.path).query)
+        streams = set(filter(None, (query.get("streams") or [""])[0].split("/")))
+        self._subs[websocket] = streams
+        try:
+            async for raw in websocket:
+                msg = json.loads(raw)
+                self.control.append(msg)
+                params = msg.get("params") or []
+                if msg.get("method") == "SUBSCRIBE":
+                    streams.update(params)
+                elif msg.get("method") == "UNSUBSCRIBE":
+                    streams.difference_update(params)
+                await websocket.send(json.dumps({"result": None, "id": msg.get("id")}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._subs.pop(websocket, None)
+
+    def subscribed(self):
+        out = set()
+        for streams in self._subs.values():
+            out |= streams
+        return out
+
+    async def publish(self, stream, data):
+        frame = json.dumps({"stream": stream, "data": data})
+        for ws, streams in list(self._subs.items()):
+            if stream in streams:
+                await ws.send(frame)
+
+    async def drop_all(self):
+        for ws in list(self._subs):
+            await ws.close()
+
+    async def start(self):
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return f"ws://{self.host}:{self.port}"
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
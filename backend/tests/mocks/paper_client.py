@@ -0,0 +1,61 @@
+import asyncio
+from typing import Any, Optional
+
+from backend.app.services.replay import VirtualClock
+
+T0 = 1_700_000_000.0
+
+
+class QueueStream:
+    """Socket stand-in: recv() returns whatever the test put on the queue."""
+
+    def __init__(self, q: asyncio.Queue):
+        self.q = q
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def recv(self):
+        return await self.q.get()
+
+
+class QueueSocketManager:
+    """Socket manager whose book-ticker and multiplex sockets all read one queue."""
+
+    def __init__(self):
+        self.q = asyncio.Queue()
+
+    def book_ticker_socket(self, symbol):
+        return QueueStream(self.q)
+
+    def multiplex_socket(self, streams):
+        return QueueStream(self.q)
+
+
+class PaperClient:
+    """Client wrapper for paper strategies.
+
+    Strategy time comes from a replay VirtualClock started at `start`;
+    `start=None` leaves `clock` unset so the strategy runs on wall time.
+    """
+
+    def __init__(self, start: Optional[float] = T0, state: Any = None):
+        self.clock = VirtualClock(start) if start is not None else None
+        self.bm = QueueSocketManager()
+        if state is not None:
+            self.state = state
+
+    def advance(self, dt: float) -> float:
+        self.clock.set(self.clock() + dt)
+        return self.clock()
+
+
+def market_maker_cfg(**strategy):
+    """Config for MarketMakerStrategy / MultiSymbolMarketMaker with test defaults."""
+    strat = {"symbol": "BTCUSDT", "quote_size": 10.0, "paper_cash": 1000.0,
+             "reorder_interval": 60.0, "cancel_timeout": 60.0}
+    strat.update(strategy)
+    return {"strategy": {"market_maker": strat}}
@@ -1,12 +1,13 @@
-import asyncio, time, json
+import asyncio, time
 from typing import Optional
-import httpx, websockets
+import websockets
 from sqlmodel import Session
 from backend.core.db import engine
 from backend.core.keys import get_keys
 from backend.core.events import publish_fill
 from backend.core.models import FillRow
 from backend.core.pnl import apply_fill
+from backend.core import http, json_codec
 from backend.workers._util_strategy_map import find_strategy_by_order_id
 
 REST = "https://api.binance.com"
@@ -31,10 +32,9 @@ class BinanceSpotUserDataWorker:
         headers = await self._headers(db)
         if not headers:
             return None
-        async with httpx.AsyncClient(base_url=REST, timeout=20.0, headers=headers) as client:
-            r = await client.post("/api/v3/userDataStream")
-            r.raise_for_status()
-            return r.json()["listenKey"]
+        r = await http.client(REST).post("/api/v3/userDataStream", headers=headers)
+        r.raise_for_status()
+        return r.json()["listenKey"]
 
     async def _ws_loop(self):
         with Session(engine) as db:
@@ -44,7 +44,7 @@ class BinanceSpotUserDataWorker:
         url = f"{WS}/{lk}"
         async with websockets.connect(url, ping_interval=20, ping_timeout=20) as ws:
             while self._running:
-                msg = json.loads(await ws.recv())
+                msg = json_codec.loads(await ws.recv())
                 e = msg.get("e","")
                 if e == "executionReport":
                     side = "buy" if msg.get("S")=="BUY" else "sell"
@@ -7,6 +7,7 @@ from backend.core.keys import get_keys
 from backend.core.events import publish_fill
 from backend.core.models import FillRow
 from backend.core.pnl import apply_fill
+from backend.core import json_codec
 from backend.workers._util_strategy_map import find_strategy_by_order_id
 
 WS_API = "wss://ws-api.binance.com/ws-api/v3"
@@ -32,11 +33,11 @@ class BinanceSpotWsApiUserData:
             sig = _sign(secret, payload)
             req = {"id": rid, "method":"userDataStream.subscribe.signature", "params":{"apiKey": key, "timestamp": ts, "signature": sig}}
             await ws.send(json.dumps(req))
-            ack = json.loads(await ws.recv())
+            ack = json_codec.loads(await ws.recv())
             if not ack or (ack.get("status") not in (200, "200", "OK") and not ack.get("result")):
                 raise RuntimeError("wsapi subscribe failed")
             while self._running:
-                msg = json.loads(await ws.recv())
+                msg = json_codec.loads(await ws.recv())
                 e = msg.get("e") or msg.get("eventType") or ""
                 if e in ("executionReport","ORDER_TRADE_UPDATE"):
                     data = msg.get("o", msg)
@@ -1,12 +1,13 @@
-import asyncio, time, json
+import asyncio, time
 from typing import Optional
-import httpx, websockets
+import websockets
 from sqlmodel import Session
 from backend.core.db import engine
 from backend.core.keys import get_keys
 from backend.core.models import FillRow
 from backend.core.events import publish_fill
 from backend.core.pnl import apply_fill
+from backend.core import http, json_codec
 from backend.workers._util_strategy_map import find_strategy_by_order_id
 
 BINANCE_FUT = "https://fapi.binance.com"
@@ -33,10 +34,9 @@ class BinanceUserDataWorker:
         headers = await self._get_headers(session)
         if not headers:
             return None
-        async with httpx.AsyncClient(base_url=BINANCE_FUT, timeout=20.0, headers=headers) as client:
-            r = await client.post("/fapi/v1/listenKey")
-            r.raise_for_status()
-            return r.json()["listenKey"]
+        r = await http.client(BINANCE_FUT).post("/fapi/v1/listenKey", headers=headers)
+        r.raise_for_status()
+        return r.json()["listenKey"]
 
     async def _ws_loop(self):
         with Session(engine) as db:
@@ -47,7 +47,7 @@ class BinanceUserDataWorker:
         async with websockets.connect(url, ping_interval=20, ping_timeout=20) as ws:
             while self._running:
                 raw = await ws.recv()
-                msg = json.loads(raw)
+                msg = json_codec.loads(raw)
                 if msg.get("e") == "ORDER_TRADE_UPDATE":
                     o = msg.get("o", {})
                     if o.get("X") in ("FILLED","PARTIALLY_FILLED") and float(o.get("l",0))>0:
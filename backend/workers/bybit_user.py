@@ -7,6 +7,7 @@ from backend.core.keys import get_keys
 from backend.core.models import FillRow
 from backend.core.events import publish_fill
 from backend.core.pnl import apply_fill
+from backend.core import json_codec
 from backend.workers._util_strategy_map import find_strategy_by_order_id
 
 WS_PRIV = "wss://stream.bybit.com/v5/private"
@@ -38,7 +39,7 @@ class BybitUserDataWorker:
             await ws.send(json.dumps({"op":"subscribe","args":[f"execution.{self.category}", f"order.{self.category}", f"wallet.{self.category}"]}))
             while self._running:
                 raw = await ws.recv()
-                msg = json.loads(raw)
+                msg = json_codec.loads(raw)
                 topic = msg.get("topic","")
                 if topic.startswith("execution."):
                     for e in msg.get("data", []):
@@ -0,0 +1,89 @@
+import asyncio
+
+from backend.app.services.binance_client import SimpleBinanceSocketManager
+from backend.tests.mocks.binance_stream_mock import BinanceStreamMock
+
+
+async def _wait_for(cond, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not cond():
+        if loop.time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+def test_readers_share_one_connection_and_fan_out():
+    async def _run():
+        server = BinanceStreamMock()
+        root = await server.start()
+        bm = SimpleBinanceSocketManager(paper=True)
+        bm._root = root
+        try:
+            async with bm.book_ticker_socket("BTCUSDT") as s1, bm.book_ticker_socket("BTCUSDT") as s2:
+                async with bm.trade_socket("ETHUSDT") as s3:
+                    await _wait_for(lambda: {"btcusdt@bookTicker", "ethusdt@trade"} <= server.subscribed())
+                    assert bm.connection_count == 1
+                    assert server.connections == 1
+
+                    await server.publish("btcusdt@bookTicker", {"s": "BTCUSDT", "b": "100", "a": "101"})
+                    await server.publish("ethusdt@trade", {"s": "ETHUSDT", "p": "10"})
+                    m1 = await asyncio.wait_for(s1.recv(), 1.0)
+                    m2 = await asyncio.wait_for(s2.recv(), 1.0)
+                    m3 = await asyncio.wait_for(s3.recv(), 1.0)
+                    assert m1 == m2 == {"s": "BTCUSDT", "b": "100", "a": "101"}
+                    assert m3["p"] == "10"
+
+                # last reader of ethusdt@trade left -> unsubscribed on the same socket
+                await _wait_for(lambda: "ethusdt@trade" not in server.subscribed())
+                assert server.connections == 1
+            await _wait_for(lambda: bm.connection_count == 0)
+        finally:
+            await bm.close()
+            await server.stop()
+
+    asyncio.run(_run())
+
+
+def test_reconnects_with_current_streams():
+    async def _run():
+        server = BinanceStreamMock()
+        root = await server.start()
+        bm = SimpleBinanceSocketManager(paper=True)
+        bm._root = root
+        try:
+            async with bm.multiplex_socket(["BTCUSDT@bookTicker"]) as s:
+                await _wait_for(lambda: "btcusdt@bookTicker" in server.subscribed())
+                await server.drop_all()
+                await _wait_for(lambda: server.connections == 2 and "btcusdt@bookTicker" in server.subscribed(), 5.0)
+                await server.publish("btcusdt@bookTicker", {"b": "1"})
+                msg = await asyncio.wait_for(s.recv(), 1.0)
+                assert msg == {"stream": "btcusdt@bookTicker", "data": {"b": "1"}}
+        finally:
+            await bm.close()
+            await server.stop()
+
+    asyncio.run(_run())
+
+
+def test_close_wakes_pending_recv():
+    async def _run():
+        server = BinanceStreamMock()
+        root = await server.start()
+        bm = SimpleBinanceSocketManager(paper=True)
+        bm._root = root
+        try:
+            async with bm.book_ticker_socket("BTCUSDT") as s:
+                await _wait_for(lambda: "btcusdt@bookTicker" in server.subscribed())
+                pending = asyncio.ensure_future(s.recv())
+                await asyncio.sleep(0)
+                await bm.close()
+                try:
+                    await asyncio.wait_for(pending, 1.0)
+                except RuntimeError as e:
+                    return str(e)
+        finally:
+            await bm.close()
+            await server.stop()
+
+    assert asyncio.run(_run()) == "WebSocket is not connected"
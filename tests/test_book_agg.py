@@ -0,0 +1,77 @@
+import random
+
+from backend.core.book_agg import OrderBookAgg, PriceLadder
+
+
+def test_ladder_top_and_best():
+    bids = PriceLadder(0.01, "bid")
+    asks = PriceLadder(0.01, "ask")
+    for px, q in [(100.0, 1.0), (99.99, 2.0), (100.01, 3.0)]:
+        bids.set(px, q)
+        asks.set(px + 1, q)
+    bids.set(99.99, 0.0)
+    assert bids.best() == (100.01, 3.0)
+    assert bids.top(5) == [(100.01, 3.0), (100.0, 1.0)]
+    assert asks.top(2) == [(100.99, 2.0), (101.0, 1.0)]
+
+
+def test_snapshot_is_sorted_and_truncated():
+    agg = OrderBookAgg(depth=2, window_ms=100, tick_size=0.5)
+    for px in (10.0, 11.5, 9.0):
+        agg.apply_delta("bid", px, 1.0)
+        agg.apply_delta("ask", px + 5, 1.0)
+    snap = agg.maybe_emit(ts_ms=1000)
+    assert [lvl.px for lvl in snap.bids] == [11.5, 10.0]
+    assert [lvl.px for lvl in snap.asks] == [14.0, 15.0]
+    assert agg.maybe_emit(ts_ms=1050) is None
+
+
+def test_deltas_reconstruct_top_k():
+    rng = random.Random(7)
+    depth = 5
+    agg = OrderBookAgg(depth=depth, window_ms=10, tick_size=0.01)
+    view = {"bid": {}, "ask": {}}
+    ts = 0
+    for _ in range(300):
+        for _ in range(rng.randint(1, 8)):
+            side = rng.choice(["bid", "ask"])
+            base = 100.0 if side == "bid" else 101.0
+            off = rng.randint(0, 30) * 0.01
+            px = round(base - off if side == "bid" else base + off, 2)
+            agg.apply_delta(side, px, rng.choice([0.0, 0.0, 1.0, 2.5]))
+        ts += 10
+        delta = agg.maybe_emit_delta(ts_ms=ts)
+        for side, levels, best_first in (("bid", delta.bids, True), ("ask", delta.asks, False)):
+            book = view[side]
+            for lvl in levels:
+                if lvl.qty > 0:
+                    book[lvl.px] = lvl.qty
+                else:
+                    book.pop(lvl.px, None)
+            keep = sorted(book, reverse=best_first)[:depth]
+            view[side] = {px: book[px] for px in keep}
+        assert sorted(view["bid"].items(), reverse=True) == agg._bids.top(depth)
+        assert sorted(view["ask"].items()) == agg._asks.top(depth)
+
+
+def test_manager_emits_only_changed_symbols_as_columns():
+    from backend.core.book_agg import BookAggManager
+    import numpy as np
+
+    mgr = BookAggManager(depth=3, window_ms=100, tick_sizes={"ETHUSDT": 0.01})
+    mgr.apply_levels("BTCUSDT", "bid", [(100.0, 1.0), (99.0, 2.0)])
+    mgr.apply_levels("BTCUSDT", "ask", [(101.0, 1.5)])
+    mgr.apply_delta("ETHUSDT", "ask", 10.01, 3.0)
+    out = mgr.maybe_emit(ts_ms=1000)
+    assert set(out) == {"BTCUSDT", "ETHUSDT"}
+    btc = out["BTCUSDT"]
+    assert np.array_equal(btc.bid_px, [100.0, 99.0]) and np.array_equal(btc.bid_qty, [1.0, 2.0])
+    assert np.array_equal(out["ETHUSDT"].ask_px, [10.01])
+
+    # within the window: coalesced, nothing emitted yet
+    mgr.apply_delta("BTCUSDT", "bid", 100.0, 0.0)
+    mgr.apply_delta("BTCUSDT", "bid", 99.5, 4.0)
+    assert mgr.maybe_emit(ts_ms=1050) == {}
+    symbols, buf = mgr.maybe_emit_packed(ts_ms=1100)
+    assert symbols == ["BTCUSDT"] and buf.shape == (1, 4, 3)
+    assert list(buf[0, 0, :2]) == [99.5, 99.0] and np.isnan(buf[0, 0, 2])
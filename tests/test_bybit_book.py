@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import pytest
+import websockets
+
+from backend.adapters import bybit
+from backend.adapters.bybit import BybitAdapter, BybitBook, BybitBookGap
+from backend.core.contracts import Level
+
+TOPIC = "orderbook.50.BTCUSDT"
+
+
+def _msg(kind, u, seq=0, b=(), a=(), ts=1):
+    return {"topic": TOPIC, "type": kind, "ts": ts,
+            "data": {"s": "BTCUSDT", "b": [list(x) for x in b], "a": [list(x) for x in a], "u": u, "seq": seq}}
+
+
+def test_book_applies_deltas_and_detects_gaps():
+    book = BybitBook("BTCUSDT")
+    assert not book.apply(_msg("delta", 5))                      # waiting for a snapshot
+    assert book.apply(_msg("snapshot", 10, 100, b=[("100", "1"), ("99", "2")], a=[("101", "1")]))
+    assert book.apply(_msg("delta", 11, 101, b=[("100", "0"), ("99.5", "3")], a=[("100.5", "1")], ts=7))
+    assert not book.apply(_msg("delta", 11, 101))                 # duplicate
+    top = book.top(5)
+    assert top.snapshot and top.ts == 7
+    assert top.bids == [Level(99.5, 3.0), Level(99.0, 2.0)]
+    assert top.asks == [Level(100.5, 1.0), Level(101.0, 1.0)]
+    assert book.top(1).bids == [Level(99.5, 3.0)]
+
+    with pytest.raises(BybitBookGap):
+        book.apply(_msg("delta", 13, 102))
+    with pytest.raises(BybitBookGap):
+        book.apply(_msg("delta", 12, 90))                         # seq went back
+    with pytest.raises(BybitBookGap):
+        book.apply(_msg("delta", 12, 103, b=[("101", "1")]))      # crossed
+
+    # u == 1 after a service restart is a snapshot
+    assert book.apply(_msg("delta", 1, 200, b=[("50", "1")], a=[("51", "1")]))
+    assert book.top(5).bids == [Level(50.0, 1.0)] and book.last_u == 1
+
+
+def test_adapter_resubscribes_on_gap_and_pushes_only_consistent_books(monkeypatch):
+    async def _run():
+        subscribes = []
+
+        async def handler(ws):
+            async for raw in ws:
+                req = json.loads(raw)
+                if req["op"] != "subscribe":
+                    continue
+                subscribes.append(req)
+                await ws.send(json.dumps({"success": True, "op": "subscribe"}))
+                if len(subscribes) == 1:
+                    await ws.send(json.dumps(_msg("snapshot", 10, 1, b=[("100", "1")], a=[("101", "1")])))
+                    await ws.send(json.dumps(_msg("delta", 11, 2, b=[("100", "2")])))
+                    await ws.send(json.dumps(_msg("delta", 14, 3, b=[("99", "9")])))     # gap
+                    await ws.send(json.dumps(_msg("delta", 15, 4, b=[("98", "9")])))     # ignored until snapshot
+                else:
+                    await ws.send(json.dumps(_msg("snapshot", 20, 5, b=[("100", "3")], a=[("100.5", "1")])))
+
+        async with websockets.serve(handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            monkeypatch.setitem(bybit.WS_BASE, "spot", f"ws://127.0.0.1:{port}")
+            got = []
+
+            async def cb(msg):
+                got.append(msg)
+
+            unsub = await BybitAdapter("spot", top_n=10).subscribe_book("BTCUSDT", "L2", cb)
+            try:
+                for _ in range(200):
+                    if got and got[-1].bids == [Level(100.0, 3.0)]:
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                unsub()
+            return subscribes, got
+
+    subscribes, got = asyncio.run(_run())
+    assert len(subscribes) == 2
+    assert all(m.snapshot for m in got)
+    assert all(Level(99.0, 9.0) not in m.bids and Level(98.0, 9.0) not in m.bids for m in got)
+    assert got[-1].asks == [Level(100.5, 1.0)]
@@ -0,0 +1,118 @@
+import asyncio
+
+from backend.app.services.candles import BarSeries, CandleFeed, tf_seconds
+
+
+class FakeAdapter:
+    id = "fake"
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.rest_calls = 0
+        self.trade_subs = 0
+        self.cb = None
+
+    async def get_ohlcv(self, symbol, tf, since=None, limit=200):
+        self.rest_calls += 1
+        await asyncio.sleep(0)
+        return [dict(b) for b in self.bars[-limit:]]
+
+    async def subscribe_trades(self, symbol, cb):
+        self.trade_subs += 1
+        self.cb = cb
+
+        async def unsub():
+            self.cb = None
+        return unsub
+
+
+def test_tf_seconds():
+    assert tf_seconds("1s") == 1 and tf_seconds("5m") == 300 and tf_seconds("4h") == 14400
+    assert tf_seconds("1M2") is None and tf_seconds("") is None
+
+
+def test_bar_series_builds_ohlcv_from_trades():
+    s = BarSeries(60, maxlen=5)
+    s.add_trade(120.5, 10.0, 1.0)
+    s.add_trade(130.0, 12.0, 0.5)
+    s.add_trade(179.9, 9.0, 0.25)
+    s.add_trade(300.0, 11.0, 1.0)        # 180 и 240 без сделок — плоские бары
+    s.add_trade(150.0, 13.0, 1.0)        # запоздавшая сделка в бар 120
+    assert [b["t"] for b in s.bars] == [120, 180, 240, 300]
+    assert s.bars[0] == {"t": 120, "o": 10.0, "h": 13.0, "l": 9.0, "c": 9.0, "v": 2.75}
+    assert s.bars[1] == {"t": 180, "o": 9.0, "h": 9.0, "l": 9.0, "c": 9.0, "v": 0.0}
+    assert s.last(2)[-1]["c"] == 11.0
+    for t in range(360, 1000, 60):
+        s.add_trade(t, 1.0, 1.0)
+    assert len(s.bars) == 5
+
+
+def test_feed_backfills_once_and_serves_ticks_from_memory():
+    async def _run():
+        base = 1_700_000_040                                     # кратно 60
+        adapter = FakeAdapter([{"t": base + 60 * i, "o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 3} for i in range(10)])
+        feed = CandleFeed(adapter, maxlen=100)
+        first = await asyncio.gather(*(feed.get_ohlcv("BTCUSDT", "1m", limit=50) for _ in range(3)))
+        assert adapter.rest_calls == 1 and adapter.trade_subs == 1
+        assert all(len(c) == 10 for c in first)
+
+        await adapter.cb({"symbol": "BTCUSDT", "price": 2.5, "qty": 1.0, "ts": base + 9 * 60 + 1})
+        await adapter.cb({"symbol": "BTCUSDT", "price": 1.0, "qty": 2.0, "ts": (base + 10 * 60) * 1000 + 5})   # мс
+        for _ in range(20):
+            candles = await feed.get_ohlcv("BTCUSDT", "1m", limit=3)
+        assert adapter.rest_calls == 1
+        assert [c["t"] for c in candles] == [base + 480, base + 540, base + 600]
+        assert candles[1]["h"] == 2.5 and candles[1]["c"] == 2.5 and candles[1]["v"] == 4.0
+        assert candles[2] == {"t": base + 600, "o": 1.0, "h": 1.0, "l": 1.0, "c": 1.0, "v": 2.0}
+
+        # второй таймфрейм — свой бэкфилл, но та же подписка на сделки
+        await feed.get_ohlcv("BTCUSDT", "5m", limit=10)
+        assert adapter.rest_calls == 2 and adapter.trade_subs == 1
+        assert feed.id == "fake"
+        await feed.close()
+        assert adapter.cb is None
+
+    asyncio.run(_run())
+
+
+def test_feed_falls_back_to_rest_without_trades():
+    async def _run():
+        adapter = FakeAdapter([{"t": 0, "o": 1, "h": 1, "l": 1, "c": 1, "v": 1}])
+        feed = CandleFeed(adapter, rest_fallback_s=0.05)
+        await feed.get_ohlcv("BTCUSDT", "1m")
+        await feed.get_ohlcv("BTCUSDT", "1m")
+        assert adapter.rest_calls == 1
+        await asyncio.sleep(0.06)
+        adapter.bars = [{"t": 0, "o": 1, "h": 3, "l": 1, "c": 3, "v": 2}]
+        candles = await feed.get_ohlcv("BTCUSDT", "1m")
+        assert adapter.rest_calls == 2 and candles[-1]["c"] == 3.0
+
+    asyncio.run(_run())
+
+
+def test_seed_rebuilds_series_when_new_bars_leave_a_hole():
+    s = BarSeries(60, maxlen=10)
+    s.seed([{"t": 60 * i, "o": 1, "h": 1, "l": 1, "c": 1, "v": 1} for i in range(3)])
+    s.seed([{"t": 60 * i, "o": 2, "h": 2, "l": 2, "c": 2, "v": 1} for i in range(2, 5)])
+    assert [b["t"] for b in s.bars] == [0, 60, 120, 180, 240]
+    s.seed([{"t": 60 * i, "o": 3, "h": 3, "l": 3, "c": 3, "v": 1} for i in range(8, 10)])
+    assert [b["t"] for b in s.bars] == [480, 540]
+
+
+def test_stall_longer_than_limit_leaves_no_gap():
+    async def _run():
+        base = 1_700_000_040
+        bars = [{"t": base + 60 * i, "o": 1, "h": 1, "l": 1, "c": 1, "v": 1} for i in range(30)]
+        adapter = FakeAdapter(bars[:10])
+        feed = CandleFeed(adapter, maxlen=100, rest_fallback_s=0.05)
+        await feed.get_ohlcv("BTCUSDT", "1m", limit=5)
+        # стрим молчал 20 баров, стратегия спрашивает только последние 5
+        adapter.bars = bars
+        await asyncio.sleep(0.06)
+        tail = await feed.get_ohlcv("BTCUSDT", "1m", limit=5)
+        full = await feed.get_ohlcv("BTCUSDT", "1m", limit=200)
+        return tail, full
+
+    tail, full = asyncio.run(_run())
+    assert [c["t"] for c in tail] == [1_700_000_040 + 60 * i for i in range(25, 30)]
+    assert [c["t"] for c in full] == [1_700_000_040 + 60 * i for i in range(30)]
@@ -0,0 +1,23 @@
+from backend.core.contracts import BookMsg, Level, OrderBookMsg, TradeMsg, TradeTick, levels
+
+
+def test_book_msg_matches_pydantic_model():
+    raw_bids = [["100.5", "1.25", "ignored"], ["100.0", "2"]]
+    raw_asks = [["101", "0.5"]]
+    fast = BookMsg(1, "BTCUSDT", levels(raw_bids), levels(raw_asks), True)
+    model = OrderBookMsg(
+        ts=1, symbol="BTCUSDT", snapshot=True,
+        bids=[{"price": 100.5, "size": 1.25}, {"price": 100.0, "size": 2.0}],
+        asks=[{"price": 101.0, "size": 0.5}],
+    )
+    assert fast.bids[0] == Level(100.5, 1.25) and fast.bids[0].price == 100.5
+    assert fast.model_dump() == model.model_dump()
+    assert fast.to_model() == model
+
+
+def test_trade_tick_matches_pydantic_model():
+    fast = TradeTick(5, "ETHUSDT", 10.0, 0.1, "sell")
+    model = TradeMsg(ts=5, symbol="ETHUSDT", price=10.0, size=0.1, side="sell")
+    assert fast.model_dump() == model.model_dump()
+    assert fast.to_model() == model
+    assert fast == TradeTick(5, "ETHUSDT", 10.0, 0.1, "sell")
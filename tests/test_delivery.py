@@ -0,0 +1,64 @@
+import asyncio
+
+from backend.core.contracts import BookMsg, Level
+from backend.core.delivery import ConflatingDelivery, QueueDelivery, merge_book
+
+
+def _book(ts, bids=(), asks=(), snapshot=False):
+    return BookMsg(ts, "BTCUSDT", [Level(*b) for b in bids], [Level(*a) for a in asks], snapshot)
+
+
+def test_slow_book_consumer_gets_latest_value_only():
+    async def _run():
+        got = []
+        release = asyncio.Event()
+
+        async def slow(msg):
+            got.append(msg.ts)
+            await release.wait()
+
+        d = ConflatingDelivery(slow, "test", "book")
+        d.push(_book(1))
+        await asyncio.sleep(0)          # consumer picks up ts=1 and blocks
+        for ts in range(2, 50):
+            d.push(_book(ts))           # never awaits, never blocks the reader
+        release.set()
+        await asyncio.sleep(0.01)
+        d.close()
+        return got, d.stats()
+
+    got, stats = asyncio.run(_run())
+    assert got == [1, 49]
+    assert stats == {"delivered": 2, "conflated": 47, "dropped": 0}
+
+
+def test_trade_queue_drops_oldest_when_full():
+    async def _run():
+        got = []
+
+        async def consume(msg):
+            got.append(msg)
+
+        d = QueueDelivery(consume, "test", "trades", maxsize=10)
+        for i in range(25):
+            d.push(i)
+        await asyncio.sleep(0.01)
+        d.close()
+        return got, d.stats()
+
+    got, stats = asyncio.run(_run())
+    assert got == list(range(15, 25))
+    assert stats["dropped"] == 15 and stats["delivered"] == 10
+
+
+def test_merge_book_deltas():
+    snap = _book(1, bids=[(100, 1), (99, 1)], asks=[(101, 1)], snapshot=True)
+    d1 = _book(2, bids=[(100, 0), (99.5, 2)])
+    d2 = _book(3, asks=[(100.5, 3)])
+    merged = merge_book(merge_book(snap, d1), d2)
+    assert merged.snapshot and merged.ts == 3
+    assert merged.bids == [Level(99.5, 2), Level(99, 1)]
+    assert merged.asks == [Level(100.5, 3), Level(101, 1)]
+    # delta on delta keeps the deletion for the consumer
+    assert merge_book(d1, d2).bids == [Level(100, 0), Level(99.5, 2)]
+    assert merge_book(d1, snap) is snap
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+from backend.app.services.events import EventDispatcher, EventPipeline
+from backend.app.services.market_maker_strategy import MarketMakerStrategy
+
+
+def test_batches_keep_order_and_conflate_market():
+    batches = []
+
+    async def _run():
+        pipe = EventPipeline(batches.append, batch_size=100)
+        mm = pipe.producer("mm")
+        pipe.start()
+        for i in range(10):
+            mm({"type": "order_event", "id": i})
+            mm({"type": "market", "symbol": "BTCUSDT", "bestBid": i})
+            mm({"type": "market", "symbol": "ETHUSDT", "bestBid": i})
+        await asyncio.sleep(0)
+        await pipe.stop()
+        return pipe
+
+    pipe = asyncio.run(_run())
+    assert len(batches) == 1
+    evts = batches[0]
+    assert [e["id"] for e in evts if e["type"] == "order_event"] == list(range(10))
+    market = [e for e in evts if e["type"] == "market"]
+    # по одному на символ, с последними ценами и после всех более ранних событий
+    assert [(e["symbol"], e["bestBid"]) for e in market] == [("BTCUSDT", 9), ("ETHUSDT", 9)]
+    assert [e["type"] for e in evts[-3:]] == ["order_event", "market", "market"]
+    p = pipe.stats()["producers"]["mm"]
+    assert p["emitted"] == 30 and p["conflated"] == 18 and p["queued"] == 0
+
+
+def test_conflation_never_reorders_against_other_events():
+    got = []
+    pipe = EventPipeline(got.extend)
+    p = pipe.producer("mm")
+    p({"type": "market", "symbol": "BTCUSDT", "bestBid": 1})
+    p({"type": "order_event", "evt": "FILLED"})
+    p({"type": "market", "symbol": "BTCUSDT", "bestBid": 2})
+    p({"type": "market", "symbol": "BTCUSDT", "bestBid": 3})
+    assert len(p) == 2 and p.conflated == 2
+    asyncio.run(pipe.flush())
+    assert [(e["type"], e.get("bestBid")) for e in got] == [("order_event", None), ("market", 3)]
+
+
+def test_bounded_buffer_counts_drops():
+    got = []
+    pipe = EventPipeline(got.extend, capacity=5)
+    p = pipe.producer("noisy")
+    for i in range(12):
+        p({"type": "diag", "text": str(i)})
+    assert len(p) == 5 and p.dropped == 7
+    asyncio.run(pipe.flush())
+    assert [e["text"] for e in got] == ["7", "8", "9", "10", "11"]
+
+
+def test_dispatch_many_feeds_dispatcher_without_per_event_tasks():
+    class _State:
+        def __init__(self):
+            self.out = []
+
+        def on_equity(self, v):
+            pass
+
+        def _broadcast_obj(self, evt):
+            self.out.append(evt)
+
+        def broadcast(self, kind, **kw):
+            self.out.append({"type": kind, **kw})
+
+    state = _State()
+    dispatcher = EventDispatcher(state)
+
+    async def _run():
+        pipe = EventPipeline(dispatcher.dispatch_many, batch_size=64)
+        pipe.start()
+        cfg = {"strategy": {"market_maker": {"symbol": "BTCUSDT", "quote_size": 10.0, "paper_cash": 1000.0}}}
+        # свои часы у клиента — таймеры ордеров без фоновой задачи, считаем только задачи событий
+        client = type("C", (), {"clock": staticmethod(time.time)})()
+        mm = MarketMakerStrategy(cfg, client, pipe.producer("mm"))
+        mm.best_bid, mm.best_ask = 100.0, 100.2
+        before = len(asyncio.all_tasks())
+        mm._reseed_quotes()
+        created = len(asyncio.all_tasks()) - before
+        await pipe.stop()
+        return created, pipe
+
+    created, pipe = asyncio.run(_run())
+    assert created == 0
+    kinds = [e["type"] for e in state.out]
+    assert kinds[:2] == ["order_event", "diag"] and "status" in kinds
+    assert pipe.batches == 1
@@ -0,0 +1,52 @@
+import asyncio
+
+import httpx
+from httpx import MockTransport, Response
+
+from backend.core import http
+from backend.adapters.bybit import BybitAdapter, REST_BASE
+
+
+def test_client_is_shared_per_base_url_and_closed_on_shutdown():
+    async def _run():
+        a = http.client("https://a.test")
+        assert http.client("https://a.test") is a
+        assert http.client("https://b.test") is not a
+        assert http.open_clients() == 2
+        await http.aclose_all()
+        assert a.is_closed and http.open_clients() == 0
+        assert http.client("https://a.test") is not a
+        await http.aclose_all()
+
+    asyncio.run(_run())
+
+
+def test_new_event_loop_gets_its_own_client():
+    async def _get():
+        return http.client("https://a.test")
+
+    first = asyncio.run(_get())
+    second = asyncio.run(_get())
+    assert first is not second
+    http._clients.clear()
+
+
+def test_adapter_reuses_pooled_client():
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.path)
+        return Response(200, json={"result": {"list": [["1000", "1", "2", "0.5", "1.5", "10"]]}})
+
+    async def _run():
+        pooled = httpx.AsyncClient(transport=MockTransport(handler), base_url=REST_BASE)
+        http._clients[REST_BASE] = (pooled, asyncio.get_running_loop())
+        adapter = BybitAdapter(category="linear")
+        for _ in range(3):
+            candles = await adapter.get_ohlcv("BTCUSDT", "1m", limit=1)
+        assert candles[0].c == 1.5
+        assert http.client(REST_BASE) is pooled
+        await http.aclose_all()
+
+    asyncio.run(_run())
+    assert seen == ["/v5/market/kline"] * 3
@@ -0,0 +1,109 @@
+import math
+
+import numpy as np
+import pytest
+
+from backend.core.indicators import (
+    ATR, EMA, SMA, VWAP, RealizedVol, RingBuffer, RollingMax, RollingMin, RollingStats,
+    atr_batch, ema_batch, mean_abs_return, mean_abs_return_rows, realized_vol_batch, rolling_max_batch,
+    rolling_min_batch, rolling_std_batch, sma_batch, vwap_batch,
+)
+
+rng = np.random.default_rng(7)
+PRICES = 100 + np.cumsum(rng.normal(0, 0.5, 3000))
+QTYS = rng.uniform(0.1, 5, 3000)
+
+
+def test_ring_buffer_evicts_oldest():
+    r = RingBuffer(3)
+    assert [r.push(x) for x in (1, 2, 3, 4, 5)] == [None, None, None, 1, 2]
+    assert r.values().tolist() == [3, 4, 5] and r.oldest() == 3 and r.full
+
+
+@pytest.mark.parametrize("period", [1, 2, 9, 21, 200])
+def test_ema_streaming_matches_recursive_and_batch(period):
+    k = 2 / (period + 1)
+    ref = PRICES[0]
+    ema = EMA(period)
+    for x in PRICES:
+        ema.update(x)
+    for x in PRICES[1:]:
+        ref = x * k + ref * (1 - k)
+    batch = ema_batch(PRICES, period)
+    assert ema.value == pytest.approx(ref, rel=1e-12)
+    assert batch[-1] == pytest.approx(ref, rel=1e-9)
+    assert ema.peek(123.0) == pytest.approx(ref + k * (123.0 - ref))
+    assert ema.value == pytest.approx(ref, rel=1e-12)
+
+
+def test_sma_and_rolling_stats_match_numpy():
+    period = 50
+    sma, stats = SMA(period), RollingStats(period)
+    for x in PRICES:
+        sma.update(x)
+        stats.update(x)
+    tail = PRICES[-period:]
+    assert sma.value == pytest.approx(tail.mean(), rel=1e-12)
+    assert stats.mean == pytest.approx(tail.mean(), rel=1e-12)
+    assert stats.std == pytest.approx(tail.std(), rel=1e-6)
+    assert sma_batch(PRICES, period)[-1] == pytest.approx(tail.mean())
+    assert rolling_std_batch(PRICES, period)[-1] == pytest.approx(tail.std())
+    assert math.isnan(sma_batch(PRICES, period)[period - 2])
+    assert sma.peek(1.0) == pytest.approx((tail[1:].sum() + 1.0) / period)
+
+
+def test_rolling_min_max():
+    period = 30
+    mx, mn = RollingMax(period), RollingMin(period)
+    for i, x in enumerate(PRICES):
+        mx.update(x)
+        mn.update(x)
+        if i % 97 == 0 or i == len(PRICES) - 1:
+            window = PRICES[max(0, i - period + 1):i + 1]
+            assert mx.value == window.max() and mn.value == window.min()
+    assert rolling_max_batch(PRICES, period)[-1] == mx.value
+    assert rolling_min_batch(PRICES, period)[-1] == mn.value
+
+
+def test_atr_streaming_matches_batch():
+    high = PRICES + QTYS * 0.1
+    low = PRICES - QTYS * 0.1
+    close = PRICES + rng.uniform(-0.05, 0.05, len(PRICES))
+    atr = ATR(14)
+    out = [atr.update(h, l, c) for h, l, c in zip(high, low, close)]
+    np.testing.assert_allclose(atr_batch(high, low, close, 14), out, rtol=1e-9)
+
+
+def test_vwap_cumulative_and_rolling():
+    cum, roll = VWAP(), VWAP(window=100)
+    for p, q in zip(PRICES, QTYS):
+        cum.update(p, q)
+        roll.update(p, q)
+    assert cum.value == pytest.approx((PRICES * QTYS).sum() / QTYS.sum())
+    tail_p, tail_q = PRICES[-100:], QTYS[-100:]
+    assert roll.value == pytest.approx((tail_p * tail_q).sum() / tail_q.sum(), rel=1e-9)
+    assert vwap_batch(PRICES, QTYS)[-1] == pytest.approx(cum.value)
+    assert vwap_batch(PRICES, QTYS, window=100)[-1] == pytest.approx(roll.value, rel=1e-9)
+    cum.reset()
+    assert cum.value is None
+
+
+def test_realized_vol():
+    rv = RealizedVol(60)
+    for x in PRICES:
+        rv.update(x)
+    r = np.diff(PRICES) / PRICES[:-1]
+    assert rv.value == pytest.approx(r[-60:].std(), rel=1e-6)
+    assert rv.mean_abs == pytest.approx(np.abs(r[-60:]).mean(), rel=1e-9)
+    assert realized_vol_batch(PRICES, 60) == pytest.approx(rv.value, rel=1e-6)
+    assert mean_abs_return([100, 101, 0, 5]) == pytest.approx((0.01 + 1.0 + 0.0) / 3)
+    assert mean_abs_return([100]) == 0.0
+
+
+def test_mean_abs_return_rows_matches_scalar_per_row():
+    rows = [PRICES[:50], PRICES[100:150], [100.0, 0.0, 5.0] + [np.nan] * 47]
+    out = mean_abs_return_rows(np.array(rows))
+    assert out[0] == pytest.approx(mean_abs_return(PRICES[:50]))
+    assert out[1] == pytest.approx(mean_abs_return(PRICES[100:150]))
+    assert out[2] == pytest.approx(mean_abs_return([100.0, 0.0, 5.0]))
+    assert mean_abs_return_rows(np.array([[1.0], [2.0]])).tolist() == [0.0, 0.0]
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from backend.core import json_codec
+from backend.core.contracts import BookMsg, Level, TradeTick
+
+TRADE = '{"e":"trade","E":1700000000123,"s":"BTCUSDT","p":"60000.10","q":"0.25","m":false}'
+DEPTH = '{"lastUpdateId":7,"bids":[["100.5","1"],["100.0","2"]],"asks":[["101","0.5"]]}'
+DIFF = '{"e":"depthUpdate","E":5,"U":1,"u":2,"b":[["99","0"]],"a":[]}'
+
+
+def test_all_backends_agree():
+    frame = '{"stream":"btcusdt@bookTicker","data":{"u":1,"b":"1.5","B":"2","a":"1.6","A":"3"}}'
+    current = json_codec.backend
+    try:
+        for name in json_codec.available():
+            json_codec.set_backend(name)
+            assert json_codec.loads(frame) == json.loads(frame)
+            assert json_codec.loads(frame.encode()) == json.loads(frame)
+    finally:
+        json_codec.set_backend(current)
+    with pytest.raises(ValueError):
+        json_codec.set_backend("nope")
+
+
+def test_typed_decode():
+    assert json_codec.decode_trade(TRADE, "BTCUSDT") == TradeTick(1700000000123, "BTCUSDT", 60000.10, 0.25, "buy")
+    book = json_codec.decode_depth(DEPTH.encode(), "BTCUSDT")
+    assert isinstance(book, BookMsg)
+    assert book.bids == [Level(100.5, 1.0), Level(100.0, 2.0)] and book.asks == [Level(101.0, 0.5)]
+    diff = json_codec.decode_depth(DIFF, "BTCUSDT")
+    assert diff.ts == 5 and diff.bids == [Level(99.0, 0.0)] and diff.asks == []
+
+
+def test_msgspec_backend_and_typed_path():
+    msgspec = pytest.importorskip("msgspec")
+    current = json_codec.backend
+    try:
+        json_codec.set_backend("msgspec")
+        assert json_codec.loads(TRADE.encode()) == json.loads(TRADE)
+    finally:
+        json_codec.set_backend(current)
+
+    # with msgspec installed decode_* go through the typed Struct decoders
+    assert hasattr(json_codec, "_trade_decoder") and hasattr(json_codec, "_depth_decoder")
+    tick = json_codec.decode_trade(TRADE.encode(), "BTCUSDT")
+    assert tick == TradeTick(1700000000123, "BTCUSDT", 60000.10, 0.25, "buy")
+    seller = json_codec.decode_trade('{"p":"1","q":"2","m":true}', "X")
+    assert seller.side == "sell" and seller.ts > 0
+    book = json_codec.decode_depth(DEPTH, "BTCUSDT")
+    assert book.bids == [Level(100.5, 1.0), Level(100.0, 2.0)] and book.asks == [Level(101.0, 0.5)]
+    diff = json_codec.decode_depth(DIFF.encode(), "BTCUSDT")
+    assert diff.ts == 5 and diff.bids == [Level(99.0, 0.0)] and diff.asks == []
+    with pytest.raises(msgspec.DecodeError):
+        json_codec.decode_trade('{"p":1.5,"q":"2"}', "X")
@@ -0,0 +1,95 @@
+import asyncio
+
+import httpx
+import pytest
+from httpx import MockTransport, Request, Response
+
+from backend.app.services.binance_client import BinanceRestClient, SimpleBinanceSocketManager
+from backend.app.services.local_book import BookGap, LocalBookManager, LocalOrderBook
+from backend.tests.mocks.binance_stream_mock import BinanceStreamMock
+
+
+def _diff(U, u, b=(), a=()):
+    return {"e": "depthUpdate", "E": 1, "s": "BTCUSDT", "U": U, "u": u, "b": list(b), "a": list(a)}
+
+
+def test_apply_diff_sequence_rules():
+    book = LocalOrderBook("btcusdt")
+    book.load_snapshot(100, [["10", "1"], ["9", "2"]], [["11", "1"], ["12", "3"]])
+    assert not book.apply_diff(_diff(95, 100))          # stale
+    with pytest.raises(BookGap):
+        book.apply_diff(_diff(102, 103))                # snapshot too old
+    assert book.apply_diff(_diff(99, 102, b=[["10", "0"], ["9.5", "4"]]))
+    assert book.best_bid() == (9.5, 4.0)
+    assert book.best_ask() == (11.0, 1.0)
+    assert book.apply_diff(_diff(103, 104, a=[["10.5", "2"]]))
+    assert book.top(2) == ([(9.5, 4.0), (9.0, 2.0)], [(10.5, 2.0), (11.0, 1.0)])
+    with pytest.raises(BookGap):
+        book.apply_diff(_diff(106, 107))
+    assert not book.synced
+
+
+def test_gap_unsyncs_book_until_diff_over_new_snapshot():
+    book = LocalOrderBook("BTCUSDT")
+    book.load_snapshot(100, [["10", "1"]], [["11", "1"]])
+    assert book.apply_diff(_diff(101, 101)) and book.synced
+    with pytest.raises(BookGap):
+        book.apply_diff(_diff(110, 111))
+    assert not book.synced
+    book.load_snapshot(120, [["20", "1"]], [["21", "1"]])
+    assert not book.synced
+    assert book.apply_diff(_diff(121, 121))
+    assert book.synced and book.best_bid() == (20.0, 1.0)
+
+
+def test_manager_resyncs_only_gapped_symbol():
+    async def _run():
+        server = BinanceStreamMock()
+        root = await server.start()
+        bm = SimpleBinanceSocketManager(paper=True)
+        bm._root = root
+
+        snaps = {
+            "BTCUSDT": [
+                {"lastUpdateId": 100, "bids": [["10", "1"]], "asks": [["11", "1"]]},
+                {"lastUpdateId": 120, "bids": [["20", "1"]], "asks": [["21", "1"]]},
+            ],
+            "ETHUSDT": [{"lastUpdateId": 5, "bids": [["1", "1"]], "asks": [["2", "1"]]}],
+        }
+        calls = {"BTCUSDT": 0, "ETHUSDT": 0}
+
+        def handler(request: Request) -> Response:
+            sym = request.url.params["symbol"]
+            i = calls[sym]
+            calls[sym] += 1
+            return Response(200, json=snaps[sym][min(i, len(snaps[sym]) - 1)])
+
+        rest = BinanceRestClient(api_key=None, api_secret=None, paper=True)
+        rest._client = httpx.AsyncClient(transport=MockTransport(handler), base_url="https://test/api")
+        mgr = LocalBookManager(bm, rest)
+        btc = mgr.track("BTCUSDT")
+        eth = mgr.track("ETHUSDT")
+        try:
+            loop = asyncio.get_running_loop()
+            while {"btcusdt@depth@100ms", "ethusdt@depth@100ms"} - server.subscribed():
+                await asyncio.sleep(0.01)
+            await server.publish("btcusdt@depth@100ms", _diff(101, 102, b=[["10.5", "2"]]))
+            await server.publish("ethusdt@depth@100ms", _diff(6, 6, a=[["1.5", "3"]]))
+            await server.publish("btcusdt@depth@100ms", _diff(110, 111))      # gap
+            await server.publish("btcusdt@depth@100ms", _diff(121, 121, a=[["20.5", "1"]]))
+
+            deadline = loop.time() + 2.0
+            while not (btc.synced and btc.last_update_id == 121 and eth.last_update_id == 6):
+                assert loop.time() < deadline
+                await asyncio.sleep(0.01)
+            assert btc.resyncs == 1 and eth.resyncs == 0
+            assert calls == {"BTCUSDT": 2, "ETHUSDT": 1}
+            assert btc.best_bid() == (20.0, 1.0) and btc.best_ask() == (20.5, 1.0)
+            assert eth.best_ask() == (1.5, 3.0)
+        finally:
+            await mgr.close()
+            await bm.close()
+            await rest.aclose()
+            await server.stop()
+
+    asyncio.run(_run())
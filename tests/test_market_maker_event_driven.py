@@ -0,0 +1,108 @@
+import asyncio
+
+from backend.app.services.market_maker_strategy import MarketMakerStrategy
+from backend.tests.mocks.paper_client import PaperClient, market_maker_cfg
+
+
+def _mm(client=None, **extra):
+    return MarketMakerStrategy(market_maker_cfg(event_driven=True, **extra),
+                               client or PaperClient(), lambda evt: None)
+
+
+def _book(bid, ask):
+    return {"s": "BTCUSDT", "b": f"{bid:.2f}", "a": f"{ask:.2f}"}
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_book_update_steps_without_polling():
+    async def _run():
+        mm = _mm()
+        mm.position = 1.0
+        await mm.start()
+        try:
+            mm.client_wrap.bm.q.put_nowait(_book(100.0, 100.2))
+            await _settle()
+            first = {o.side: o.price for o in mm.orders.values() if o.status == "NEW"}
+            # рынок сдвинулся — котировки переставлены без ожидания reorder_interval
+            mm.client_wrap.bm.q.put_nowait(_book(101.0, 101.2))
+            await _settle()
+            second = {o.side: o.price for o in mm.orders.values() if o.status == "NEW"}
+            return mm, first, second
+        finally:
+            await mm.stop()
+
+    mm, first, second = asyncio.run(_run())
+    assert set(first) == {"BUY", "SELL"} and set(second) == {"BUY", "SELL"}
+    assert second["BUY"] > first["BUY"] and second["SELL"] > first["SELL"]
+    assert mm.event_steps == 2
+
+
+def test_burst_is_coalesced_into_latest_book():
+    async def _run():
+        # без виртуальных часов интервал между шагами выдерживается сном
+        mm = _mm(PaperClient(start=None), min_step_interval=0.05)
+        await mm.start()
+        try:
+            q = mm.client_wrap.bm.q
+            q.put_nowait(_book(100.0, 100.2))
+            await _settle()
+            for i in range(1, 20):
+                q.put_nowait(_book(100.0 + i * 0.1, 100.2 + i * 0.1))
+            await _settle()
+            steps_during_burst = mm.event_steps
+            await asyncio.sleep(0.1)
+            return mm, steps_during_burst
+        finally:
+            await mm.stop()
+
+    mm, steps_during_burst = asyncio.run(_run())
+    assert mm.ticks_total == 20
+    assert steps_during_burst == 1
+    assert mm.event_steps == 2 and mm.coalesced >= 17
+    assert mm._quoted_book == (101.9, 102.1)
+
+
+def test_step_only_runs_timers_in_event_mode():
+    async def _run():
+        mm = _mm()
+        await mm.start()
+        try:
+            mm.best_bid, mm.best_ask = 100.0, 100.2
+            mm._place("BUY", 101.0, 0.1)       # касается ask, но step() рынок не трогает
+            await mm.step()
+            return mm
+        finally:
+            await mm.stop()
+
+    mm = asyncio.run(_run())
+    assert mm.orders_filled == 0
+
+
+def test_min_step_interval_uses_strategy_clock():
+    async def _run():
+        mm = _mm(min_step_interval=1.0)
+        client = mm.client_wrap
+        await mm.start()
+        try:
+            q = mm.client_wrap.bm.q
+            wall = asyncio.get_running_loop().time()
+            for i in range(6):
+                q.put_nowait(_book(100.0 + i * 0.1, 100.2 + i * 0.1))
+                await _settle()
+                client.advance(0.3)
+            # 6 обновлений за 1.8 с виртуального времени: шаги в 0 и в 1.2, обновление в 1.5 ждёт
+            steps = mm.event_steps
+            client.advance(1.0)
+            await mm.step()                    # отложенный шаг догоняет последнюю цену
+            return mm, steps, asyncio.get_running_loop().time() - wall
+        finally:
+            await mm.stop()
+
+    mm, steps, wall = asyncio.run(_run())
+    assert steps == 2 and mm.event_steps == 3
+    assert mm._quoted_book == (100.5, 100.7)
+    assert wall < 0.5
@@ -0,0 +1,48 @@
+import asyncio
+
+from backend.app.services.market_maker_strategy import MarketMakerStrategy, PaperOrder
+from backend.tests.mocks.paper_client import PaperClient, market_maker_cfg
+
+
+def _mm(**extra):
+    mm = MarketMakerStrategy(market_maker_cfg(reorder_interval=0.0, order_archive=50, **extra),
+                             PaperClient(), lambda evt: None)
+    mm.position = 1.0
+    return mm
+
+
+def test_paper_order_has_slots():
+    po = PaperOrder(id="P1", side="BUY", price=1.0, qty=1.0, ts_new=0.0, expires_at=1.0)
+    assert not hasattr(po, "__dict__")
+
+
+def test_terminal_orders_leave_live_book():
+    mm = _mm()
+    mm.best_bid, mm.best_ask = 100.0, 100.2
+    for i in range(2000):
+        # мид гуляет — каждая перестановка отменяет прошлую пару
+        mm.best_bid, mm.best_ask = 100.0 + (i % 7) * 0.1, 100.2 + (i % 7) * 0.1
+        mm.client_wrap.advance(1.0)
+        asyncio.run(mm._step_once())
+
+    assert mm.orders_total > 1000
+    assert len(mm.orders) == mm.orders_active <= 2
+    assert all(o.status == "NEW" for o in mm.orders.values())
+    assert len(mm.order_archive) == 50
+    assert all(o.status in ("FILLED", "CANCELED") for o in mm.order_archive)
+    assert sum(len(v) for v in mm._open.values()) == len(mm.orders)
+
+
+def test_find_open_returns_freshest_on_side():
+    mm = _mm()
+    mm._place("BUY", 99.0, 0.1)
+    mm.client_wrap.advance(1.0)
+    mm._place("BUY", 99.5, 0.1)
+    mm._place("SELL", 101.0, 0.1)
+    assert mm._find_open("BUY").price == 99.5
+    mm._cancel(mm._find_open("BUY"))
+    assert mm._find_open("BUY").price == 99.0
+    mm.best_bid, mm.best_ask = 101.0, 101.1
+    mm._try_fill_by_touch()
+    assert mm._find_open("SELL") is None
+    assert [o.status for o in mm.order_archive] == ["CANCELED", "FILLED"]
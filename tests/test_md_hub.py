@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+from backend.core.contracts import BookMsg, Level, TradeTick
+from backend.core.md_hub import MarketDataHub
+
+
+class FakeAdapter:
+    def __init__(self):
+        self.subs = {}
+        self.opened = 0
+        self.closed = 0
+
+    async def subscribe_book(self, symbol, depth, cb):
+        return self._sub(("book", symbol), cb)
+
+    async def subscribe_trades(self, symbol, cb):
+        return self._sub(("trades", symbol), cb)
+
+    def _sub(self, key, cb):
+        self.opened += 1
+        self.subs[key] = cb
+
+        def _unsub():
+            self.closed += 1
+            del self.subs[key]
+        return _unsub
+
+
+def test_clients_share_one_upstream_and_one_serialisation():
+    async def _run():
+        adapter = FakeAdapter()
+        hub = MarketDataHub(lambda exchange, category: adapter)
+        inbox = {i: [] for i in range(5)}
+
+        def sender(i):
+            async def send(text):
+                inbox[i].append(text)
+            return send
+
+        unsubs = [await hub.subscribe("mock", "spot", "BTCUSDT", "book", sender(i)) for i in range(3)]
+        t_unsub = await hub.subscribe("mock", "spot", "BTCUSDT", "trades", sender(3))
+        e_unsub = await hub.subscribe("mock", "spot", "ETHUSDT", "book", sender(4))
+        assert adapter.opened == 3 and hub.upstream_count() == 3
+        assert hub.client_count(("mock", "spot", "BTCUSDT", "book")) == 3
+
+        await adapter.subs[("book", "BTCUSDT")](BookMsg(1, "BTCUSDT", [Level(1.0, 2.0)], [], False))
+        await adapter.subs[("trades", "BTCUSDT")](TradeTick(2, "BTCUSDT", 1.5, 0.1, "buy"))
+        await asyncio.sleep(0.01)
+        assert inbox[0] == inbox[1] == inbox[2] and len(inbox[0]) == 1
+        assert inbox[0][0] is inbox[1][0]            # serialised once, shared by all clients
+        assert json.loads(inbox[0][0]) == {"type": "book", "exchange": "mock", "ts": 1, "symbol": "BTCUSDT",
+                                           "bids": [{"price": 1.0, "size": 2.0}], "asks": [], "snapshot": False}
+        assert json.loads(inbox[3][0])["type"] == "trade" and inbox[4] == []
+
+        for u in unsubs[:2]:
+            await u()
+        assert adapter.closed == 0
+        await unsubs[2]()
+        assert adapter.closed == 1 and ("book", "BTCUSDT") not in adapter.subs
+        await t_unsub()
+        await e_unsub()
+        assert hub.upstream_count() == 0 and hub.client_count() == 0
+
+    asyncio.run(_run())
@@ -0,0 +1,155 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from backend.app.services.market_maker_strategy import MarketMakerStrategy
+from backend.app.services.multi_market_maker import BUY, SELL, MultiSymbolMarketMaker
+from backend.app.services.replay import ReplayRunner, ReplaySocketManager
+from backend.core.recorder import CapturedFrame
+from backend.tests.mocks.paper_client import PaperClient, market_maker_cfg
+
+T0 = 1_700_000_000 * 10**9
+SYMBOLS = [f"S{i:02d}USDT" for i in range(40)]
+
+
+def _cfg(**extra):
+    strat = {"symbols": SYMBOLS, "paper_cash": 1000.0 * len(SYMBOLS),
+             "reorder_interval": 1.0, "cancel_timeout": 5.0, "min_spread_pct": 0.01}
+    strat.update(extra)
+    return market_maker_cfg(**strat)
+
+
+def test_quotes_match_single_symbol_strategy():
+    mm = MarketMakerStrategy(_cfg(symbol="S00USDT"), PaperClient(), lambda e: None)
+    mm.cash, mm.position = 1000.0, 0.3
+    mm.best_bid, mm.best_ask = 100.0, 100.5
+    mm._reseed_quotes()
+    single = {o.side: (o.price, o.qty) for o in mm.orders.values()}
+
+    multi = MultiSymbolMarketMaker(_cfg(), PaperClient(), lambda e: None)
+    multi.position[0] = 0.3
+    multi.on_book_ticker({"s": "S00USDT", "b": "100.0", "a": "100.5"})
+    multi._step_once()
+    assert multi.order_px[0, BUY] == pytest.approx(single["BUY"][0])
+    assert multi.order_px[0, SELL] == pytest.approx(single["SELL"][0])
+    assert multi.order_qty[0, BUY] == pytest.approx(single["BUY"][1])
+    assert multi.order_qty[0, SELL] == pytest.approx(single["SELL"][1])
+    # остальные символы без котировок не трогаются
+    assert multi.orders_active == 2
+
+
+def test_only_changed_symbols_requote_and_accounting_is_per_symbol():
+    events = []
+    multi = MultiSymbolMarketMaker(_cfg(), PaperClient(), events.append)
+    for s in SYMBOLS:
+        multi.on_book_ticker({"s": s, "b": "10.00", "a": "10.10"})
+    multi._step_once()
+    assert multi.orders_active == len(SYMBOLS)          # только BUY: базы нет
+    events.clear()
+
+    multi.client_wrap.advance(0.1)
+    # S03: ask упал до нашей покупки — исполнение и перестановка только у него
+    buy_px = multi.order_px[3, BUY]
+    multi.on_book_ticker({"s": "S03USDT", "b": f"{buy_px - 0.05:.2f}", "a": f"{buy_px:.2f}"})
+    multi._step_once()
+
+    fills = [e for e in events if e.get("evt") == "FILLED"]
+    assert [e["symbol"] for e in fills] == ["S03USDT"]
+    assert multi.position[3] > 0 and (multi.position[np.arange(len(SYMBOLS)) != 3] == 0).all()
+    assert multi.cash[3] < 1000.0 and multi.cash[4] == 1000.0
+    new = {e["symbol"] for e in events if e.get("evt") == "NEW"}
+    assert new == {"S03USDT"}
+    assert multi.order_id[3, SELL] != 0
+
+
+def test_expiry_cancels_orders():
+    multi = MultiSymbolMarketMaker(_cfg(reorder_interval=60.0), PaperClient(), lambda e: None)
+    multi.on_book_ticker({"s": "S00USDT", "b": "10.00", "a": "10.10"})
+    multi._step_once()
+    multi.client_wrap.advance(6.0)
+    multi._step_once()
+    assert multi.orders_expired == 1 and multi.orders_active == 0
+
+
+def _frames(seconds=10, hz=5):
+    out = []
+    for k in range(seconds * hz):
+        ts = T0 + k * (10**9 // hz)
+        for j, sym in enumerate(SYMBOLS[:8]):
+            mid = 10.0 + j + (k % 10) * 0.01
+            bt = {"u": k, "s": sym, "b": f"{mid - 0.02:.2f}", "B": "1", "a": f"{mid + 0.02:.2f}", "A": "1"}
+            stream = f"{sym.lower()}@bookTicker"
+            out.append(CapturedFrame(ts + j, stream, json.dumps({"stream": stream, "data": bt}).encode()))
+    return out
+
+
+def test_replay_runs_many_symbols_on_one_socket():
+    bm = ReplaySocketManager(_frames(), speed=0)
+    runner = ReplayRunner(bm, lambda c: MultiSymbolMarketMaker(_cfg(symbols=SYMBOLS[:8]), c, lambda e: None))
+    stats = asyncio.run(runner.run())
+    mm = runner.strategy
+    assert stats.delivered == 8 * 50 and mm.ticks_total == 8 * 50
+    assert mm.orders_total >= 8
+    assert len({o["symbol"] for o in mm.open_orders()}) == 8
+
+
+
+
+def test_fills_feed_risk_manager_with_aggregate_position():
+    class _RM:
+        def __init__(self):
+            self.calls = []
+
+        def on_position(self, qty, price, entry_price=None):
+            self.calls.append((qty, price, entry_price))
+
+    class _State:
+        risk_manager = _RM()
+
+        def check_risk(self, symbol):
+            return True, None
+
+    client = PaperClient(state=_State())
+    multi = MultiSymbolMarketMaker(_cfg(symbols=["AUSDT", "BUSDT"], paper_cash=2000.0), client, lambda e: None)
+    for s in ("AUSDT", "BUSDT"):
+        multi.on_book_ticker({"s": s, "b": "10.00", "a": "10.10"})
+    multi._step_once()
+    px = multi.order_px[:, BUY].copy()
+    # A исполнился и подешевел, B исполнился и подорожал
+    multi.on_book_ticker({"s": "AUSDT", "b": f"{px[0] - 1.0:.2f}", "a": f"{px[0] - 0.9:.2f}"})
+    multi.on_book_ticker({"s": "BUSDT", "b": f"{px[1] + 0.9:.2f}", "a": f"{px[1]:.2f}"})
+    multi._step_once()
+
+    qty, value, entry = client.state.risk_manager.calls[-1]
+    mark = 0.5 * (multi.bid + multi.ask)
+    assert qty == 1.0
+    assert value == pytest.approx(float(np.sum(multi.position * mark)))
+    # убыток A не гасится прибылью B
+    loss_a = multi.position[0] * (multi.avg_entry[0] - mark[0])
+    assert entry - value == pytest.approx(loss_a)
+
+
+def test_min_step_interval_uses_strategy_clock():
+    async def _run():
+        client = PaperClient()
+        q = client.bm.q
+        multi = MultiSymbolMarketMaker(_cfg(event_driven=True, min_step_interval=1.0), client, lambda e: None)
+        await multi.start()
+        try:
+            wall = asyncio.get_running_loop().time()
+            # обновления каждые 0.3 с виртуального времени: шаги в 0 и в 1.2
+            for i in range(5):
+                q.put_nowait({"stream": "s00usdt@bookTicker",
+                              "data": {"s": "S00USDT", "b": f"{10 + i * 0.1:.2f}", "a": f"{10.2 + i * 0.1:.2f}"}})
+                for _ in range(5):
+                    await asyncio.sleep(0)
+                client.advance(0.3)
+            return multi, asyncio.get_running_loop().time() - wall
+        finally:
+            await multi.stop()
+
+    multi, wall = asyncio.run(_run())
+    assert multi.event_steps == 2 and multi.ticks_total == 5
+    assert wall < 0.5
@@ -1,4 +1,5 @@
 import asyncio
+import pytest
 import httpx
 from httpx import MockTransport, Response, Request
 
@@ -145,3 +146,67 @@ def test_scan_best_symbol_no_pairs_due_to_spread():
             await client.aclose()
 
     asyncio.run(_run())
+
+
+def test_scan_uses_bulk_endpoints_and_kline_cache():
+    async def _run():
+        names = [f"C{i:02d}USDT" for i in range(30)]
+        exchange_info = {"symbols": [
+            {"symbol": s, "status": "TRADING", "quoteAsset": "USDT", "isSpotTradingAllowed": True} for s in names
+        ]}
+        requests = []
+
+        def handler(request: Request) -> Response:
+            path = request.url.path
+            requests.append(path)
+            params = request.url.params
+            if path == "/api/v3/exchangeInfo":
+                return Response(200, json=exchange_info)
+            if path == "/api/v3/ticker/24hr":
+                assert "symbol" not in params
+                return Response(200, json=[{"symbol": s, "quoteVolume": str(1000 + i), "lastPrice": "10"}
+                                           for i, s in enumerate(names)])
+            if path == "/api/v3/ticker/bookTicker":
+                assert "symbol" not in params
+                return Response(200, json=[{"symbol": s, "bidPrice": "10", "askPrice": str(10 + 0.001 * (i + 1))}
+                                           for i, s in enumerate(names)])
+            if path == "/api/v3/klines":
+                return Response(200, json=[[0, 0, "10.1", "9.9", "10", "0"], [0, 0, "10.2", "10", "10.1", "0"]])
+            return Response(404)
+
+        client = BinanceRestClient(api_key=None, api_secret=None, paper=True)
+        client._client = httpx.AsyncClient(transport=MockTransport(handler), base_url="https://test/api")
+        cfg = {"scanner": {"min_price": 0, "min_vol_usdt_24h": 0, "min_spread_bps": 0,
+                           "max_pairs": 20, "top_by_volume": 5, "vol_bars": 2}}
+        try:
+            first = await scan_best_symbol(cfg, client)
+            n_first = len(requests)
+            second = await scan_best_symbol(cfg, client)
+        finally:
+            await client.aclose()
+        # в топ-5 по объёму попадают C25..C29, самый широкий спред — у C29
+        assert first["best"]["symbol"] == second["best"]["symbol"] == "C29USDT"
+        assert requests[:n_first].count("/api/v3/ticker/24hr") == 1
+        assert requests[:n_first].count("/api/v3/ticker/bookTicker") == 1
+        assert requests[:n_first].count("/api/v3/klines") == 5
+        # второй скан: exchangeInfo и klines из кэша, по одному bulk-запросу на этап
+        assert requests[n_first:] == ["/api/v3/ticker/24hr", "/api/v3/ticker/bookTicker"]
+
+    asyncio.run(_run())
+
+
+def test_vectorised_kline_volatility():
+    from backend.app.services.pair_scanner import _vol_bps_rows
+
+    def k(h, l, c):
+        return [0, 0, str(h), str(l), str(c), "0"]
+
+    klines = [
+        [k(101, 99, 100), k(102, 100, 101), k(0, 0, 103)],   # mid 100 -> 101 -> close 103
+        [k(10, 10, 10)],                                      # одна свеча — волатильность 0
+        None,                                                 # klines не получены
+    ]
+    vol = _vol_bps_rows(klines, 3)
+    expected = 1e4 * (0.01 + 2 / 101) / 2
+    assert vol[0] == pytest.approx(expected)
+    assert vol[1:].tolist() == [0.0, 0.0]
@@ -0,0 +1,65 @@
+import asyncio
+import gzip
+import json
+
+from backend.app.services.binance_client import SimpleBinanceSocketManager
+from backend.core.recorder import CaptureReader, MarketRecorder
+from backend.tests.mocks.binance_stream_mock import BinanceStreamMock
+
+
+def test_roundtrip_rotation_and_time_range(tmp_path):
+    rec = MarketRecorder(str(tmp_path), max_segment_bytes=2048, batch_size=50, flush_interval=0.01)
+    for i in range(1000):
+        stream = "btcusdt@trade" if i % 2 else "ethusdt@trade"
+        rec.record(stream, json.dumps({"i": i, "pad": "x" * (i % 7)}), ts_ns=1_000 + i)
+    rec.close()
+    assert rec.recorded == 1000 and rec.dropped == 0
+
+    reader = CaptureReader(str(tmp_path))
+    segs = reader.segments()
+    assert len(segs) > 1
+    # every segment is plain concatenated gzip
+    assert sum(len(gzip.decompress(open(s, "rb").read())) > 0 for s in segs) == len(segs)
+    assert reader.time_range() == (1_000, 1_999)
+
+    frames = list(reader.read())
+    assert [f.ts_ns for f in frames] == list(range(1_000, 2_000))
+    assert json.loads(frames[3].raw)["i"] == 3 and frames[3].stream == "btcusdt@trade"
+
+    part = list(reader.read(start_ns=1_500, end_ns=1_509, streams={"ethusdt@trade"}))
+    assert [f.ts_ns for f in part] == [1_500, 1_502, 1_504, 1_506, 1_508]
+
+
+def test_index_covers_out_of_order_records(tmp_path):
+    rec = MarketRecorder(str(tmp_path), batch_size=10, flush_interval=0.01)
+    for ts in (5_000, 4_000, 6_000, 3_000):
+        rec.record("btcusdt@trade", b"{}", ts_ns=ts)
+    rec.close()
+
+    reader = CaptureReader(str(tmp_path))
+    [(first, last, *_)] = reader.index(reader.segments()[0])
+    assert (first, last) == (3_000, 6_000)
+    assert [f.ts_ns for f in reader.read(start_ns=3_000, end_ns=3_500)] == [3_000]
+
+def test_socket_manager_records_raw_frames(tmp_path):
+    async def _run():
+        server = BinanceStreamMock()
+        root = await server.start()
+        rec = MarketRecorder(str(tmp_path), flush_interval=0.01)
+        bm = SimpleBinanceSocketManager(paper=True, recorder=rec)
+        bm._root = root
+        try:
+            async with bm.book_ticker_socket("BTCUSDT") as s:
+                while "btcusdt@bookTicker" not in server.subscribed():
+                    await asyncio.sleep(0.01)
+                await server.publish("btcusdt@bookTicker", {"b": "1", "a": "2"})
+                assert await asyncio.wait_for(s.recv(), 1.0) == {"b": "1", "a": "2"}
+        finally:
+            await bm.close()
+            await server.stop()
+            rec.close()
+
+    asyncio.run(_run())
+    frames = list(CaptureReader(str(tmp_path)).read())
+    assert len(frames) == 1 and frames[0].stream == "btcusdt@bookTicker"
+    assert json.loads(frames[0].raw) == {"stream": "btcusdt@bookTicker", "data": {"b": "1", "a": "2"}}
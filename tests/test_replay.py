@@ -0,0 +1,91 @@
+import asyncio
+import json
+import time
+
+from backend.app.services.market_maker_strategy import MarketMakerStrategy
+from backend.app.services.replay import ReplayRunner, ReplaySocketManager
+from backend.app.services.shadow_executor import ShadowExecutor
+from backend.core.recorder import CaptureReader, CapturedFrame, MarketRecorder
+
+T0 = 1_700_000_000 * 10**9
+
+
+def _frames(seconds=60, hz=10):
+    out = []
+    for i in range(seconds * hz):
+        ts = T0 + i * (10**9 // hz)
+        mid = 100.0 + (i % 50) * 0.02
+        bt = {"u": i, "s": "BTCUSDT", "b": f"{mid - 0.05:.2f}", "B": "1", "a": f"{mid + 0.05:.2f}", "A": "1"}
+        out.append(CapturedFrame(ts, "btcusdt@bookTicker", json.dumps({"stream": "btcusdt@bookTicker", "data": bt}).encode()))
+        if i % 5 == 0:
+            tr = {"e": "trade", "s": "BTCUSDT", "p": f"{mid:.2f}", "q": "0.5", "m": True}
+            out.append(CapturedFrame(ts + 1, "btcusdt@trade", json.dumps(tr).encode()))
+    return out
+
+
+def _mm(client):
+    cfg = {"strategy": {"market_maker": {
+        "symbol": "BTCUSDT", "quote_size": 10.0, "paper_cash": 1000.0,
+        "reorder_interval": 1.0, "cancel_timeout": 5.0, "loop_sleep": 0.5,
+    }}}
+    return MarketMakerStrategy(cfg, client, lambda evt: None)
+
+
+def test_replay_drives_strategy_on_virtual_time():
+    shadow = ShadowExecutor(latency_ms=0)
+    runner = ReplayRunner(ReplaySocketManager(_frames(), speed=0), _mm, shadow_exec=shadow)
+    wall = time.monotonic()
+    stats = asyncio.run(runner.run())
+    assert time.monotonic() - wall < 10.0
+
+    mm = runner.strategy
+    assert stats.frames == 720 and stats.delivered == 600
+    assert mm.ticks_total == 600
+    # шаги каждые 0.5 с виртуального времени на ~60 с записи
+    assert abs(stats.virtual_seconds - 59.9) < 0.2
+    assert 119 <= stats.steps <= 122
+    assert mm.orders_total > 0
+    t_first, t_last = T0 / 1e9, T0 / 1e9 + 60
+    assert all(t_first <= o.ts_new <= t_last for o in mm.orders.values())
+    assert shadow._best["BTCUSDT"][0] is not None
+
+
+def test_replay_speed_multiplier_paces_wall_clock():
+    frames = _frames(seconds=2, hz=10)
+    bm = ReplaySocketManager(frames, speed=10)
+
+    async def _run():
+        async with bm.book_ticker_socket("BTCUSDT") as s:
+            got = []
+
+            async def _read():
+                while len(got) < 20:
+                    got.append(await s.recv())
+
+            reader = asyncio.create_task(_read())
+            t = time.monotonic()
+            await bm.run()
+            await reader
+            return time.monotonic() - t, got
+
+    elapsed, got = asyncio.run(_run())
+    assert 0.15 <= elapsed < 1.0          # 1.9 s записи при 10x
+    assert [int(m["u"]) for m in got] == list(range(20))
+
+
+def test_replay_from_capture(tmp_path):
+    with MarketRecorder(str(tmp_path), flush_interval=0.01) as rec:
+        for f in _frames(seconds=1):
+            rec.record(f.stream, f.raw, ts_ns=f.ts_ns)
+    bm = ReplaySocketManager.from_capture(str(tmp_path), start_ns=T0 + 5 * 10**8)
+
+    async def _run():
+        async with bm.trade_socket("BTCUSDT") as s:
+            task = asyncio.create_task(bm.run())
+            msg = await asyncio.wait_for(s.recv(), 1.0)
+            await task
+            return msg
+
+    msg = asyncio.run(_run())
+    assert msg["p"] == "100.10" and bm.clock() >= (T0 + 9 * 10**8) / 1e9
+    assert CaptureReader(str(tmp_path)).time_range()[0] == T0
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import httpx
+from httpx import MockTransport, Response
+
+from backend.app.services.binance_client import BinanceRestClient
+from backend.app.services.rest_weight import (
+    Priority, WeightScheduler, current_priority, request_weight, rest_priority,
+)
+
+
+def test_endpoint_weights():
+    assert request_weight("/v3/ticker/24hr", {"symbol": "BTCUSDT"}) == 2
+    assert request_weight("/v3/ticker/24hr") == 80
+    assert request_weight("/v3/ticker/24hr", {"symbols": '["A","B"]'}) == 2
+    assert request_weight("/v3/ticker/bookTicker") == 4
+    assert request_weight("/v3/depth", {"limit": 1000}) == 50
+    assert request_weight("/v3/unknown") == 1
+
+
+def _aligned_scheduler(window):
+    # начинаем в самом начале окна, чтобы смена минуты не попала посреди теста
+    now = time.time()
+    time.sleep(window - now % window + 0.005)
+    return WeightScheduler(limit=10, window=window)
+
+
+def test_budget_is_shared_by_priority():
+    async def _run():
+        s = _aligned_scheduler(0.3)
+        done = []
+
+        async def req(name, w, p):
+            await s.acquire(w, p)
+            done.append(name)
+
+        await req("orders", 10, Priority.ORDERS)          # бюджет окна исчерпан
+        t_scan = asyncio.create_task(req("scanner", 5, Priority.SCANNER))
+        await asyncio.sleep(0)
+        t_md = asyncio.create_task(req("market", 8, Priority.MARKET_DATA))
+        await asyncio.sleep(0.05)
+        assert done == ["orders"] and s.stats()["queued"] == 2
+        await asyncio.wait_for(t_md, 1.0)
+        assert done == ["orders", "market"]               # рыночные данные раньше сканера
+        assert not t_scan.done()                          # 8 + 5 > 60% лимита — ждёт следующего окна
+        await asyncio.wait_for(t_scan, 1.0)
+        assert done == ["orders", "market", "scanner"] and s.throttled == 2
+
+    asyncio.run(_run())
+
+
+def test_priority_context_reaches_child_tasks():
+    async def _run():
+        async def child():
+            return current_priority()
+        assert current_priority() == Priority.MARKET_DATA
+        with rest_priority(Priority.SCANNER):
+            inner = await asyncio.gather(child(), child())
+        assert inner == [Priority.SCANNER, Priority.SCANNER]
+        assert current_priority() == Priority.MARKET_DATA
+
+    asyncio.run(_run())
+
+
+def test_rest_client_backs_off_on_429_and_tracks_used_weight():
+    calls = []
+
+    def handler(request):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return Response(429, headers={"Retry-After": "0.2"})
+        return Response(200, json={"symbol": "BTCUSDT"}, headers={"X-MBX-USED-WEIGHT-1M": "42"})
+
+    async def _run():
+        sched = WeightScheduler(limit=6000, window=60.0)
+        client = BinanceRestClient(api_key=None, api_secret=None, paper=True, scheduler=sched)
+        client._client = httpx.AsyncClient(transport=MockTransport(handler), base_url="https://test/api")
+        try:
+            data = await client.get_ticker("btcusdt")
+        finally:
+            await client.aclose()
+        assert data["symbol"] == "BTCUSDT"
+        assert sched.rejected == 1 and sched.used >= 42
+
+    asyncio.run(_run())
+    assert len(calls) == 2 and calls[1] - calls[0] >= 0.15
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from backend.app.services.scan_cache import ScanCache, scan_key
+
+
+def test_scan_key_ignores_unrelated_config():
+    a = {"api": {"paper": True}, "scanner": {"quote": "USDT", "max_pairs": 5}, "strategy": {"x": 1}}
+    b = {"api": {"paper": True, "key": "k"}, "scanner": {"max_pairs": 5, "quote": "USDT"}}
+    assert scan_key(a) == scan_key(b)
+    assert scan_key(a) != scan_key({"api": {"paper": False}, "scanner": a["scanner"]})
+    # без api.paper — testnet, как у клиента роутера
+    assert scan_key({}) == scan_key({"api": {"paper": True}})
+    assert scan_key({}) != scan_key({"api": {"paper": False}})
+
+
+def test_fresh_stale_and_single_flight():
+    now = [0.0]
+    calls = []
+
+    async def scan(cfg, client):
+        calls.append(client)
+        await asyncio.sleep(0.01)
+        return {"best": {"symbol": f"S{len(calls)}"}, "top": []}
+
+    async def _run():
+        cache = ScanCache(scan, ttl=5.0, max_stale=60.0, clock=lambda: now[0])
+        cfg = {"scanner": {"quote": "USDT"}}
+        res = await asyncio.gather(*(cache.get(cfg, "client") for _ in range(10)))
+        assert len(calls) == 1 and all(r["best"]["symbol"] == "S1" for r in res)
+
+        now[0] = 3.0
+        assert (await cache.get(cfg, "client"))["best"]["symbol"] == "S1" and len(calls) == 1
+
+        now[0] = 10.0                                   # устарел: отдаём старое, пересчёт в фоне
+        assert (await cache.get(cfg, "client"))["best"]["symbol"] == "S1"
+        assert (await cache.get(cfg, "client"))["best"]["symbol"] == "S1"
+        await asyncio.sleep(0.02)
+        assert len(calls) == 2
+        assert (await cache.get(cfg, "client"))["best"]["symbol"] == "S2"
+
+        now[0] = 100.0                                  # слишком старый — ждём новый скан
+        assert (await cache.get(cfg, "client"))["best"]["symbol"] == "S3"
+
+    asyncio.run(_run())
+
+
+def test_errors_propagate_and_owned_client_is_reused():
+    made = []
+    closed = []
+
+    class Client:
+        async def close_connection(self):
+            closed.append(self)
+
+    async def make_client():
+        made.append(Client())
+        return made[-1]
+
+    fail = [True]
+
+    async def scan(cfg, client):
+        assert isinstance(client, Client)
+        if fail[0]:
+            raise RuntimeError("Scanner: no pairs with spread >= min_spread_bps")
+        return {"best": {"symbol": "X"}, "top": []}
+
+    async def _run():
+        cache = ScanCache(scan, ttl=0.0, max_stale=0.0)
+        with pytest.raises(RuntimeError):
+            await cache.get({}, None, make_client)
+        fail[0] = False
+        assert (await cache.get({}, None, make_client))["best"]["symbol"] == "X"
+        await cache.get({}, None, make_client)
+        assert len(made) == 1 and cache.scans == 3
+        await cache.close()
+        assert closed == made
+
+    asyncio.run(_run())
+
+
+def test_owned_clients_per_mode_and_bounded_results():
+    made = []
+    now = [0.0]
+
+    def make_client():
+        made.append(object())
+        return made[-1]
+
+    async def scan(cfg, client):
+        return {"best": {"symbol": cfg["scanner"]["quote"]}, "top": [], "client": client}
+
+    async def _run():
+        cache = ScanCache(scan, ttl=5.0, max_stale=60.0, clock=lambda: now[0], max_entries=4)
+        for i in range(10):
+            await cache.get({"scanner": {"quote": f"Q{i}"}}, None, make_client)
+        live = await cache.get({"api": {"paper": False}, "scanner": {"quote": "Q0"}}, None, make_client)
+        paper = await cache.get({"scanner": {"quote": "Q9"}}, None, make_client)
+        assert len(made) == 2 and live["client"] is made[1] and paper["client"] is made[0]
+        assert len(cache._results) == 4
+
+        now[0] = 61.0
+        await cache.get({"scanner": {"quote": "Q9"}}, None, make_client)
+        assert len(cache._results) == 1
+
+    asyncio.run(_run())
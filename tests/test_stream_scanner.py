@@ -0,0 +1,148 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.app.services.replay import ReplaySocketManager
+from backend.app.services.stream_scanner import StreamingPairScanner
+from backend.core.recorder import CapturedFrame
+
+CFG = {"scanner": {"quote": "USDT", "min_price": 0, "min_vol_usdt_24h": 1000, "min_spread_bps": 0,
+                   "vol_bars": 3, "spread_ema": 1, "score": {"w_spread": 1.0, "w_vol": 1.0},
+                   "blacklist": ["BADUSDT"]}}
+
+
+def _mini(sym, close, qv, minute):
+    return {"e": "24hrMiniTicker", "E": minute * 60_000, "s": sym, "c": str(close), "q": str(qv)}
+
+
+def _book(sym, bid, ask):
+    return {"u": 1, "s": sym, "b": str(bid), "B": "1", "a": str(ask), "A": "1"}
+
+
+def test_ranking_updates_only_changed_symbols():
+    sc = StreamingPairScanner(None, CFG)
+    sc.on_miniticker([_mini("AUSDT", 100, 5000, 0), _mini("BUSDT", 10, 5000, 0), _mini("CUSDT", 1, 10, 0),
+                      _mini("ETHBTC", 0.05, 1e9, 0), _mini("BADUSDT", 1, 1e9, 0)])
+    sc.on_book_ticker(_book("AUSDT", 100, 100.1))      # 10 bps
+    sc.on_book_ticker(_book("BUSDT", 10, 10.05))       # 50 bps
+    sc.on_book_ticker(_book("CUSDT", 1, 1.1))          # мал объём — не в рейтинге
+    top = sc.top(5)
+    assert [p.symbol for p in top] == ["BUSDT", "AUSDT"]
+    assert top[0].spread_bps == pytest.approx(50.0)
+
+    sc.on_book_ticker(_book("AUSDT", 100, 101))        # 100 bps: A выходит вперёд
+    sc._flush()
+    assert len(sc._heap) == 3                          # в кучу добавлен только A, старая запись A устарела
+    assert [p.symbol for p in sc.top(5)] == ["AUSDT", "BUSDT"]
+    assert len(sc._heap) == 2                          # устаревшая запись выброшена при чтении
+    assert sc.result(1)["best"]["symbol"] == "AUSDT"
+
+    # волатильность — из минутных сэмплов цены
+    sc.on_miniticker([_mini("BUSDT", 11, 5000, 1)])
+    sc.on_miniticker([_mini("BUSDT", 10.5, 5000, 1)])  # та же минута — не сэмпл
+    sc.on_miniticker([_mini("BUSDT", 11, 5000, 2)])
+    b = next(p for p in sc.top(5) if p.symbol == "BUSDT")
+    assert b.vol_bps_1m == pytest.approx(1e4 * (0.1 + 0.0) / 2)
+
+
+def test_scanner_consumes_shared_streams():
+    frames = []
+    t0 = 1_700_000_000 * 10**9
+    for i in range(20):
+        mini = [_mini("AUSDT", 100 + i, 5000, i), _mini("BUSDT", 10, 5000, i)]
+        frames.append(CapturedFrame(t0 + i, "!miniTicker@arr", json.dumps(mini).encode()))
+        book = _book("BUSDT" if i % 2 else "AUSDT", 10 if i % 2 else 100, 10.2 if i % 2 else 100.1)
+        frames.append(CapturedFrame(t0 + i, "!bookTicker", json.dumps(book).encode()))
+
+    async def _run():
+        bm = ReplaySocketManager(frames)
+        sc = StreamingPairScanner(bm, CFG)
+        await sc.start()
+        while bm.streams() != {"!miniTicker@arr", "!bookTicker"}:
+            await asyncio.sleep(0)
+        await bm.run()
+        assert sc.running
+        res = sc.result()
+        await sc.stop()
+        await bm.close()
+        return res
+
+    res = asyncio.run(_run())
+    assert [p["symbol"] for p in res["top"]] == ["BUSDT", "AUSDT"]
+    assert res["best"]["spread_bps"] == pytest.approx(200.0)
+
+
+def test_top_by_volume_limits_ranking():
+    sc = StreamingPairScanner(None, {"scanner": {**CFG["scanner"], "top_by_volume": 2}})
+    sc.on_miniticker([_mini("AUSDT", 1, 9000, 0), _mini("BUSDT", 1, 8000, 0), _mini("CUSDT", 1, 2000, 0)])
+    for sym, ask in (("AUSDT", 1.001), ("BUSDT", 1.002), ("CUSDT", 1.1)):
+        sc.on_book_ticker(_book(sym, 1, ask))
+    # у C лучший спред, но по объёму он третий
+    assert [p.symbol for p in sc.top(5)] == ["BUSDT", "AUSDT"]
+    sc.on_miniticker([_mini("CUSDT", 1, 10_000, 0)])
+    assert [p.symbol for p in sc.top(5)] == ["CUSDT", "AUSDT"]
+
+
+class _Socket:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def recv(self):
+        await asyncio.Event().wait()
+
+
+class _BM:
+    made = []
+
+    def __init__(self, paper=True):
+        self.closed = False
+        _BM.made.append(self)
+
+    def miniticker_socket(self):
+        return _Socket()
+
+    def book_ticker_socket(self, symbol=None):
+        return _Socket()
+
+    async def close(self):
+        self.closed = True
+
+
+class _Rest:
+    async def get_exchange_info(self):
+        return {"symbols": [
+            {"symbol": "AUSDT", "quoteAsset": "USDT", "status": "TRADING"},
+            {"symbol": "BUSDT", "quoteAsset": "USDT", "status": "BREAK"},
+        ]}
+
+
+def test_app_state_pair_stream_lifecycle(monkeypatch):
+    from backend.app.services import state as state_mod
+
+    monkeypatch.setattr(state_mod, "SimpleBinanceSocketManager", _BM)
+    _BM.made.clear()
+    app = state_mod.AppState()
+
+    async def _run():
+        sc = await app.start_pair_stream(CFG, _Rest())
+        # статус из exchangeInfo: B на паузе — не в рейтинге
+        sc.on_miniticker([_mini("AUSDT", 1, 5000, 0), _mini("BUSDT", 1, 5000, 0)])
+        sc.on_book_ticker(_book("AUSDT", 1, 1.01))
+        sc.on_book_ticker(_book("BUSDT", 1, 1.02))
+        symbols = [p.symbol for p in sc.top(5)]
+        # сканер умер — замена закрывает его подключения
+        for t in sc._tasks:
+            t.cancel()
+        await asyncio.gather(*sc._tasks, return_exceptions=True)
+        second = await app.start_pair_stream(CFG)
+        await app.stop_pair_stream()
+        return symbols, second
+
+    symbols, second = asyncio.run(_run())
+    assert symbols == ["AUSDT"]
+    assert second.symbols is None
+    assert [bm.closed for bm in _BM.made] == [True, True]
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from backend.app.services.market_maker_strategy import MarketMakerStrategy
+from backend.app.services.pair_scanner import scan_best_symbol
+from backend.app.services.symbols import SymbolRecord, SymbolRegistry, registry_for
+
+
+def _sym(symbol, quote="USDT", status="TRADING", tick="0.01", step="0.001", notional=("NOTIONAL", "5")):
+    return {
+        "symbol": symbol, "status": status, "baseAsset": symbol[:-len(quote)], "quoteAsset": quote,
+        "isSpotTradingAllowed": True,
+        "filters": [
+            {"filterType": "PRICE_FILTER", "minPrice": "0.01", "tickSize": tick},
+            {"filterType": "LOT_SIZE", "minQty": step, "stepSize": step},
+            {"filterType": notional[0], "minNotional": notional[1]},
+        ],
+    }
+
+
+class FakeClient:
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.calls = 0
+
+    async def get_exchange_info(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return {"symbols": self.symbols}
+
+    async def get_ticker(self, symbol):
+        return {"symbol": symbol, "quoteVolume": "1000000", "lastPrice": "100"}
+
+    async def get_orderbook_ticker(self, symbol):
+        return {"symbol": symbol, "bidPrice": "100", "askPrice": "100.5" if symbol == "BTCUSDT" else "100.1"}
+
+
+def test_record_parses_filters_and_rounds_to_exchange_precision():
+    rec = SymbolRecord.from_exchange(_sym("BNBUSDT", tick="0.1", step="0.001"))
+    assert (rec.tick_size, rec.step_size, rec.min_notional) == (0.1, 0.001, 5.0)
+    assert rec.round_price(300.37) == 300.3 and rec.round_price(0.3) == 0.3
+    assert rec.round_qty(0.0339) == 0.033
+    legacy = SymbolRecord.from_exchange(_sym("ETHBTC", quote="BTC", notional=("MIN_NOTIONAL", "0.0001")))
+    assert legacy.min_notional == 0.0001 and legacy.base == "ETH"
+
+
+def test_registry_single_flight_and_background_refresh():
+    now = [0.0]
+
+    async def _run():
+        client = FakeClient([_sym("BTCUSDT"), _sym("ETHBTC", quote="BTC"), _sym("OLDUSDT", status="BREAK")])
+        reg = SymbolRegistry(client, ttl=10.0, clock=lambda: now[0])
+        await asyncio.gather(*(reg.ensure() for _ in range(5)))
+        assert client.calls == 1 and len(reg) == 3
+        assert reg.get("btcusdt").tick_size == 0.01 and "ETHBTC" in reg
+        assert [r.symbol for r in reg.records(quote="USDT")] == ["BTCUSDT"]
+
+        now[0] = 11.0
+        client.symbols = [_sym("BTCUSDT", tick="0.1")]
+        await reg.ensure()                     # старые данные отдаются сразу
+        assert reg.get("BTCUSDT").tick_size == 0.01
+        await asyncio.sleep(0.01)
+        assert client.calls == 2 and reg.get("BTCUSDT").tick_size == 0.1 and reg.get("ETHBTC") is None
+        await reg.close()
+
+    asyncio.run(_run())
+
+
+def test_scanner_reuses_exchange_info_between_scans():
+    async def _run():
+        client = FakeClient([_sym("BTCUSDT"), _sym("ETHUSDT")])
+        cfg = {"scanner": {"min_vol_usdt_24h": 0, "min_spread_bps": 0, "min_price": 0}}
+        first = await scan_best_symbol(cfg, client)
+        second = await scan_best_symbol(cfg, client)
+        assert first["best"]["symbol"] == second["best"]["symbol"] == "BTCUSDT"
+        assert client.calls == 1
+        assert registry_for(client) is registry_for(client)
+
+    asyncio.run(_run())
+
+
+def test_market_maker_takes_steps_from_registry():
+    async def _run():
+        client = FakeClient([_sym("BNBUSDT", tick="0.1", step="0.01")])
+
+        class Wrap:
+            symbols = SymbolRegistry(client)
+
+        cfg = {"strategy": {"market_maker": {"symbol": "BNBUSDT"}}}
+        mm = MarketMakerStrategy(cfg, Wrap(), lambda evt: None)
+        await mm._load_symbol_filters()
+        assert mm._price_step == 0.1 and mm._qty_step == 0.01
+        assert mm._round_price(300.37) == pytest.approx(300.3) and mm._round_qty(1.239) == 1.23
+
+    asyncio.run(_run())
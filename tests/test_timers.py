@@ -0,0 +1,90 @@
+import asyncio
+
+from backend.app.services.market_maker_strategy import MarketMakerStrategy
+from backend.app.services.replay import VirtualClock
+from backend.app.services.shadow_executor import ShadowExecutor
+from backend.app.services.timers import TimerScheduler
+from backend.tests.mocks.paper_client import T0, PaperClient, market_maker_cfg
+
+
+def test_run_due_fires_only_due_timers_in_order():
+    clock = VirtualClock(1000.0)
+    timers = TimerScheduler(clock=clock, autorun=False)
+    fired = []
+    for i in (5, 1, 3, 2, 4):
+        timers.call_at(1000.0 + i, fired.append, i)
+    dead = timers.call_at(1002.5, fired.append, "dead")
+    dead.cancel()
+    assert len(timers) == 5
+
+    clock.set(1003.0)
+    assert timers.run_due() == 3
+    assert fired == [1, 2, 3]
+    assert timers.next_deadline() == 1004.0
+    assert timers.run_due(1010.0) == 2 and fired == [1, 2, 3, 4, 5]
+    assert len(timers) == 0 and timers.next_deadline() is None
+
+
+def test_mass_cancel_compacts_heap():
+    timers = TimerScheduler(clock=VirtualClock(1000.0), autorun=False)
+    handles = [timers.call_later(10.0 + i, lambda: None) for i in range(1000)]
+    for h in handles[:900]:
+        h.cancel()
+    assert len(timers) == 100
+    assert len(timers._heap) < 1000
+
+
+def test_autorun_fires_on_time_without_polling():
+    async def _run():
+        timers = TimerScheduler()
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        t0 = loop.time()
+        timers.call_later(0.2, lambda: done.set_result(loop.time() - t0))
+        timers.call_later(0.05, lambda: None)
+        late = await asyncio.wait_for(done, 1.0)
+        await asyncio.sleep(0)
+        return late, timers._pump.done()
+
+    late, pump_done = asyncio.run(_run())
+    assert 0.19 <= late < 0.35
+    assert pump_done
+
+
+def test_market_maker_expires_orders_via_timers():
+    client = PaperClient()
+    mm = MarketMakerStrategy(market_maker_cfg(cancel_timeout=5.0), client, lambda evt: None)
+    mm._place("BUY", 99.0, 0.1)
+    client.advance(2.0)
+    mm._place("SELL", 101.0, 0.1)
+    client.advance(4.0)
+    mm._cancel_expired()
+    assert [o.side for o in mm.orders.values()] == ["SELL"]
+    assert mm.orders_expired == 1
+    # отменённый раньше срока ордер не оставляет живого таймера
+    mm._cancel(mm._find_open("SELL"))
+    assert len(mm.timers) == 0
+
+
+def test_shadow_executor_expires_gtd_limit():
+    clock = VirtualClock(T0)
+    shadow = ShadowExecutor(latency_ms=0, clock=clock)
+
+    async def _run():
+        gtd = int((clock() + 30) * 1000)
+        o = await shadow.create_order(symbol="BTCUSDT", side="BUY", type="LIMIT", quantity=1.0,
+                                      price=99.0, timeInForce="GTD", goodTillDate=gtd)
+        keep = await shadow.create_order(symbol="BTCUSDT", side="BUY", type="LIMIT", quantity=1.0, price=98.0)
+        clock.set(clock() + 10)
+        await shadow.on_book_update("BTCUSDT", [["99.5", "1"]], [["100.0", "1"]])
+        mid = (await shadow.get_order(symbol="BTCUSDT", orderId=o["orderId"]))["status"]
+        clock.set(clock() + 30)
+        await shadow.on_book_update("BTCUSDT", [["99.5", "1"]], [["100.0", "1"]])
+        # после срока сделки по цене ордера его уже не исполняют
+        await shadow.on_trade("BTCUSDT", 98.0, 5.0, True)
+        return (mid,
+                (await shadow.get_order(symbol="BTCUSDT", orderId=o["orderId"]))["status"],
+                (await shadow.get_order(symbol="BTCUSDT", orderId=keep["orderId"]))["status"])
+
+    assert asyncio.run(_run()) == ("NEW", "EXPIRED", "FILLED")
+    assert not shadow.timers.autorun and len(shadow.timers) == 0